@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Highlighting throughput of GraphvizHighlighter against the previous
+str.find implementation.
+
+    python3 benchmarks/bench_highlighter.py --lines 100000
+"""
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+here = pathlib.Path(__file__).parent.resolve()
+sys.path.insert(0, str(here.parent / "src"))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QSyntaxHighlighter, QTextDocument
+
+from graphviz_code_viewer.modules.highlighter import GraphvizHighlighter, make_format
+
+RULES = {
+    "digraph": {"color": "blue", "bold": True},
+    "graph": {"color": "blue", "bold": True},
+    "subgraph": {"color": "blue", "bold": True},
+    "node": {"color": "blue", "bold": True},
+    "edge": {"color": "blue", "bold": True},
+    "strict": {"color": "blue", "bold": True},
+    "->": {"color": "darkRed", "bold": True},
+    "=": {"color": "darkGreen", "bold": True},
+    "\"": {"color": "darkMagenta", "bold": True},
+    "[": {"color": "black", "bold": True},
+    "]": {"color": "black", "bold": True},
+    "{": {"color": "darkGreen", "bold": True},
+    "}": {"color": "darkGreen", "bold": True},
+    ";": {"color": "darkGray", "bold": True},
+    "<": {"color": "darkCyan", "bold": False},
+    "//": {"color": "gray", "bold": False},
+    "/*": {"color": "gray", "bold": False}
+}
+
+
+# Default rules plus the attribute names users typically add
+EXTENDED_RULES = dict(RULES)
+for name in ["label", "color", "fillcolor", "fontcolor", "fontname", "fontsize", "shape",
+             "style", "penwidth", "arrowhead", "arrowtail", "dir", "rankdir", "rank",
+             "splines", "width", "height", "weight", "constraint", "xlabel", "tooltip",
+             "URL", "bgcolor", "margin", "nodesep", "ranksep", "cluster"]:
+    EXTENDED_RULES[name] = {"color": "darkBlue", "bold": False}
+
+
+class FindHighlighter(QSyntaxHighlighter):
+    """Previous implementation: one str.find loop per rule."""
+    def __init__(self, parent, rules_dict):
+        super().__init__(parent)
+        self.rules = [(key, make_format(data)) for key, data in rules_dict.items()]
+
+    def highlightBlock(self, text):
+        for keyword, fmt in self.rules:
+            index = text.find(keyword)
+            while index != -1:
+                length = len(keyword)
+                self.setFormat(index, length, fmt)
+                index = text.find(keyword, index + length)
+
+
+def make_source(lines):
+    out = ["digraph G {"]
+    for i in range(lines - 2):
+        if i % 10 == 0:
+            out.append(f'    n{i} [label="node {i}", shape=box, color="red"];')
+        elif i % 10 == 1:
+            out.append(f'    /* block {i} */ n{i} -> n{i-1};')
+        else:
+            out.append(f'    n{i} -> n{i-1} [label="e{i}", penwidth=2]; // edge')
+    out.append("}")
+    return "\n".join(out)
+
+
+def measure(highlighter_class, source, rules, repeat):
+    best = None
+    for _ in range(repeat):
+        document = QTextDocument()
+        document.setPlainText(source)
+        highlighter = highlighter_class(document, rules)
+        t0 = time.perf_counter()
+        highlighter.rehighlight()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    source = make_source(args.lines)
+
+    for name, rules in (("default", RULES), ("extended", EXTENDED_RULES)):
+        find_s = measure(FindHighlighter, source, rules, args.repeat)
+        tokenizer_s = measure(GraphvizHighlighter, source, rules, args.repeat)
+
+        print(json.dumps({
+            "benchmark": "highlighter",
+            "rules": name,
+            "rule_count": len(rules),
+            "lines": args.lines,
+            "find_s": round(find_s, 4),
+            "tokenizer_s": round(tokenizer_s, 4),
+            "speedup": round(find_s / tokenizer_s, 2)
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Startup time of graphviz-code-viewer: from the start of a new process to
+the first paint of the main window, plus the import time of program.py.
+Every run is a new process with its own HOME; the first run (config and
+desktop files created) is reported separately.
+
+    python3 benchmarks/bench_startup.py --runs 10
+"""
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+here = pathlib.Path(__file__).parent.resolve()
+
+
+def child():
+    """Runs program.main() and exits at the first paint of the main window."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, str(here.parent / "src"))
+    start = float(os.environ["BENCH_START"])
+
+    t0 = time.time()
+    import graphviz_code_viewer.program as program
+    import_s = time.time() - t0
+
+    from PyQt5.QtCore import QObject, QEvent
+    from PyQt5.QtWidgets import QApplication
+
+    class PaintProbe(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                print(json.dumps({"first_paint_s": time.time() - start, "import_s": import_s}), flush=True)
+                os._exit(0)
+            return False
+
+    probe = PaintProbe()
+    init = program.MainWindow.__init__
+
+    def probed_init(self, *args):
+        init(self, *args)
+        self.installEventFilter(probe)
+
+    program.MainWindow.__init__ = probed_init
+    sys.argv = [sys.argv[0]]
+    program.main()
+
+
+def run_once(home):
+    env = dict(os.environ, HOME=home, QT_QPA_PLATFORM="offscreen", BENCH_START=repr(time.time()))
+    output = subprocess.run([sys.executable, __file__, "--child"], env=env,
+                            capture_output=True, text=True, timeout=120).stdout
+    for line in output.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError("no measurement: " + output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    with tempfile.TemporaryDirectory() as home:
+        first = run_once(home)
+        runs = [run_once(home) for _ in range(args.runs)]
+
+    paint = [r["first_paint_s"] for r in runs]
+    imports = [r["import_s"] for r in runs]
+    print(json.dumps({
+        "benchmark": "startup",
+        "runs": args.runs,
+        "first_launch_s": round(first["first_paint_s"], 4),
+        "first_paint_median_s": round(statistics.median(paint), 4),
+        "first_paint_min_s": round(min(paint), 4),
+        "import_median_s": round(statistics.median(imports), 4)
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite over synthetic graphs (see dotgen.py): highlighting, DOT
+parsing, the CompileThread pipeline (Graphviz), the QSvgRenderer parse and
+the tile rasterization of the viewer at several zoom levels, and the build
+and painting of the scene viewer (Graphviz JSON output).
+Prints one JSON object per case and stage; --output writes them all to a
+file and --compare prints the change against a previous file.
+
+    python3 benchmarks/bench_suite.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+here = pathlib.Path(__file__).parent.resolve()
+sys.path.insert(0, str(here.parent / "src"))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QTextDocument, QImage, QPainter
+from PyQt5.QtCore import QByteArray, QRectF
+
+from dotgen import generate
+
+# name -> parameters of dotgen.generate
+CASES = {
+    "small": dict(nodes=50, density=1.5),
+    "medium": dict(nodes=500, density=2),
+    "large": dict(nodes=3000, density=2),
+    "dense": dict(nodes=300, density=8),
+    "clusters": dict(nodes=1000, density=2, clusters=20),
+    "long-labels": dict(nodes=500, density=1.5, label_size=60),
+    "html": dict(nodes=500, density=1.5, html=True, label_size=20)
+}
+
+ZOOMS = (0.25, 1.0, 4.0)
+VIEWPORT = (1200, 800)
+
+
+def best_of(repeat, function):
+    """Shortest time of repeat calls, and the result of the last one."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_highlighter(source, repeat):
+    from graphviz_code_viewer.program import DEFAULT_EDITOR_CONTENT
+    from graphviz_code_viewer.modules.highlighter import GraphvizHighlighter
+    document = QTextDocument()
+    document.setPlainText(source)
+    highlighter = GraphvizHighlighter(document, DEFAULT_EDITOR_CONTENT["syntax_rules"])
+    seconds, _ = best_of(repeat, highlighter.rehighlight)
+    return {"seconds": seconds, "mb_per_s": len(source) / seconds / 1e6}
+
+
+def bench_parser(source, repeat):
+    from graphviz_code_viewer.modules.dot_parser import parse
+    seconds, model = best_of(repeat, lambda: parse(source))
+    return {"seconds": seconds, "mb_per_s": len(source) / seconds / 1e6,
+            "nodes": model.node_count(), "edges": model.edge_count(), "errors": len(model.errors)}
+
+
+def bench_compile(source, engine, repeat):
+    """CompileThread.run() without the render cache, in this thread."""
+    from graphviz_code_viewer.program import CompileThread
+    result = {}
+
+    def compile_once():
+        thread = CompileThread(source, engine=engine, cache=None, track_phases=True)
+        thread.finished.connect(lambda generation, data, error: result.update(data=data, error=error))
+        thread.run()
+        return thread
+
+    seconds, thread = best_of(repeat, compile_once)
+    if result["error"]:
+        raise RuntimeError(result["error"].strip())
+    return {"seconds": seconds, "svg_bytes": len(result["data"]),
+            "phases": {phase: round(s, 4) for phase, s in thread.phase_times}}, result["data"]
+
+
+def bench_svg_parse(svg, repeat):
+    from PyQt5.QtSvg import QSvgRenderer
+    seconds, renderer = best_of(repeat, lambda: QSvgRenderer(QByteArray(svg)))
+    if not renderer.isValid():
+        raise RuntimeError("invalid SVG")
+    size = renderer.defaultSize()
+    return {"seconds": seconds, "width": size.width(), "height": size.height()}, renderer
+
+
+def bench_raster(renderer, zoom, tile_size, repeat):
+    """Tiles of a viewport at the top-left corner of the image, as SvgViewer draws them."""
+    from graphviz_code_viewer.modules.wsvgviewer import SvgRenderThread, tile_range
+    worker = SvgRenderThread(tile_size)
+    size = renderer.defaultSize()
+    width, height = max(1, int(size.width() * zoom)), max(1, int(size.height() * zoom))
+    tiles = tile_range(width, height, 0, 0, VIEWPORT[0], VIEWPORT[1], tile_size)
+
+    def render():
+        for column, row in tiles:
+            worker.render_tile(renderer, zoom, column, row)
+
+    seconds, _ = best_of(repeat, render)
+    pixels = len(tiles) * tile_size * tile_size
+    return {"seconds": seconds, "tiles": len(tiles), "mpixels_per_s": pixels / seconds / 1e6}
+
+
+def bench_scene_build(source, engine, repeat):
+    """JSON output of Graphviz to the items of SceneViewer, without the overview."""
+    from graphviz_code_viewer.program import CompileThread
+    from graphviz_code_viewer.modules.xdot import build_objects
+    from graphviz_code_viewer.modules.wsceneviewer import SceneItem, ItemLayer
+    from PyQt5.QtWidgets import QGraphicsScene
+    thread = CompileThread(source, engine=engine, cache=None, scene=True)
+    thread.run()
+    if thread.scene_data is None:
+        raise RuntimeError("no JSON output")
+
+    def build():
+        objects, rect = build_objects(thread.scene_data)
+        scene = QGraphicsScene()
+        layer = ItemLayer(rect)
+        for z, obj in enumerate(objects):
+            SceneItem(obj, layer).setZValue(z)
+        scene.addItem(layer)
+        return scene
+
+    seconds, scene = best_of(repeat, build)
+    return {"seconds": seconds, "json_bytes": len(thread.scene_data), "items": len(scene.items())}, scene
+
+
+def bench_scene_paint(scene, zoom, repeat):
+    """A viewport of the scene at the top-left corner, as SceneViewer paints it without the overview."""
+    image = QImage(VIEWPORT[0], VIEWPORT[1], QImage.Format_ARGB32_Premultiplied)
+    rect = scene.sceneRect()
+    source = QRectF(rect.x(), rect.y(), VIEWPORT[0] / zoom, VIEWPORT[1] / zoom)
+
+    def paint():
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        scene.render(painter, QRectF(image.rect()), source)
+        painter.end()
+
+    seconds, _ = best_of(repeat, paint)
+    return {"seconds": seconds}
+
+
+def run_case(name, params, args):
+    source = generate(seed=args.seed, **params)
+    base = {"benchmark": "suite", "case": name, "source_bytes": len(source)}
+    base.update(params)
+
+    def emit(stage, values):
+        record = dict(base, stage=stage)
+        for key, value in values.items():
+            record[key] = round(value, 4) if isinstance(value, float) else value
+        print(json.dumps(record), flush=True)
+        return record
+
+    records = [emit("highlighter", bench_highlighter(source, args.repeat)),
+               emit("parser", bench_parser(source, args.repeat))]
+    try:
+        values, svg = bench_compile(source, args.engine, args.repeat)
+    except RuntimeError as e:  # Graphviz missing or failed: the Qt stages need its SVG
+        records.append(emit("compile", {"error": str(e)}))
+        return records
+    records.append(emit("compile", values))
+
+    values, renderer = bench_svg_parse(svg, args.repeat)
+    records.append(emit("svg_parse", values))
+    for zoom in ZOOMS:
+        values = bench_raster(renderer, zoom, args.tile_size, args.repeat)
+        records.append(emit(f"raster@{zoom:g}", values))
+
+    values, scene = bench_scene_build(source, args.engine, args.repeat)
+    records.append(emit("scene_build", values))
+    for zoom in ZOOMS:
+        records.append(emit(f"scene_paint@{zoom:g}", bench_scene_paint(scene, zoom, args.repeat)))
+    return records
+
+
+def compare(before_path, records):
+    """Prints the time of each (case, stage) against a previous result file."""
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = {(r["case"], r["stage"]): r for r in json.load(f)}
+    for record in records:
+        old = before.get((record["case"], record["stage"]))
+        if old and old.get("seconds") and record.get("seconds"):
+            print(json.dumps({
+                "benchmark": "compare",
+                "case": record["case"],
+                "stage": record["stage"],
+                "before_s": old["seconds"],
+                "after_s": record["seconds"],
+                "speedup": round(old["seconds"] / record["seconds"], 2)
+            }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma separated cases: " + ", ".join(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engine", default="dot")
+    parser.add_argument("--tile-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="Write all results to this JSON file")
+    parser.add_argument("--compare", default="", help="Previous --output file to compare with")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    records = []
+    for name in args.cases.split(","):
+        records.extend(run_case(name.strip(), CASES[name.strip()], args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=1)
+    if args.compare:
+        compare(args.compare, records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Synthetic DOT graphs for the benchmarks. The same parameters and seed
+always give the same graph.
+
+    python3 benchmarks/dotgen.py --nodes 2000 --density 2 --clusters 20 --html > graph.dot
+"""
+import random
+import argparse
+
+WORDS = ("alpha", "beta", "gamma", "delta", "kappa", "sigma", "omega", "node", "state", "value")
+
+
+def label_text(rng, size):
+    """About size characters of words."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:max(1, size)]
+
+
+def html_label(rng, name, size):
+    return (f'<<TABLE BORDER="0" CELLBORDER="1" CELLSPACING="0">'
+            f'<TR><TD BGCOLOR="lightgrey"><B>{name}</B></TD></TR>'
+            f'<TR><TD>{label_text(rng, size)}</TD></TR></TABLE>>')
+
+
+def generate(nodes=100, density=1.5, clusters=0, label_size=8, html=False, seed=0):
+    """
+    DOT source of a digraph with nodes nodes and about density*nodes edges.
+    With clusters > 0 the nodes are spread over that many clusters and most
+    edges stay inside their cluster. label_size is the length of the labels
+    in characters (0 for no labels); html uses HTML table labels.
+    """
+    rng = random.Random(seed)
+    out = ["digraph G {", "    node [shape=box];"]
+
+    def node_line(i, indent):
+        name = f"n{i}"
+        if html:
+            return f"{indent}{name} [shape=plain, label={html_label(rng, name, label_size)}];"
+        if label_size:
+            return f'{indent}{name} [label="{label_text(rng, label_size)}"];'
+        return f"{indent}{name};"
+
+    groups = max(1, clusters)
+    members = [list(range(k, nodes, groups)) for k in range(groups)]
+    if clusters:
+        for k, group in enumerate(members):
+            out.append(f"    subgraph cluster_{k} {{")
+            out.append(f'        label="cluster {k}";')
+            out.extend(node_line(i, "        ") for i in group)
+            out.append("    }")
+    else:
+        out.extend(node_line(i, "    ") for i in range(nodes))
+
+    for e in range(int(nodes * density)):
+        if clusters and rng.random() < 0.8:
+            group = members[rng.randrange(groups)]
+            tail, head = rng.choice(group), rng.choice(group)
+        else:
+            tail, head = rng.randrange(nodes), rng.randrange(nodes)
+        if label_size and not html and e % 4 == 0:
+            out.append(f'    n{tail} -> n{head} [label="{label_text(rng, label_size // 2)}"];')
+        else:
+            out.append(f"    n{tail} -> n{head};")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--density", type=float, default=1.5, help="Edges per node")
+    parser.add_argument("--clusters", type=int, default=0)
+    parser.add_argument("--label-size", type=int, default=8, help="Label length in characters")
+    parser.add_argument("--html", action="store_true", help="HTML table labels")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.nodes, args.density, args.clusters, args.label_size, args.html, args.seed), end="")
+
+
+if __name__ == "__main__":
+    main()
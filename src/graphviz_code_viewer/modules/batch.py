@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import graphviz_code_viewer.about as about
+from graphviz_code_viewer.modules.compiler import GraphvizError, auto_engine
+from graphviz_code_viewer.modules.render_cache import make_key, graphviz_version
+from graphviz_code_viewer.modules.multiformat import render_formats
+from graphviz_code_viewer.modules.dot_parser import parse, line_number
+
+MANIFEST_NAME = ".graphviz-code-viewer-manifest.json"
+DOT_EXTENSIONS = (".dot", ".gv")
+
+
+def find_inputs(paths):
+    """Returns (input_path, relative_path) of the DOT files in paths; a file found twice is kept once."""
+    inputs = []
+    seen = set()
+
+    def add(full, relative):
+        real = os.path.realpath(full)
+        if real not in seen:
+            seen.add(real)
+            inputs.append((full, relative))
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(DOT_EXTENSIONS):
+                        full = os.path.join(root, name)
+                        add(full, os.path.relpath(full, path))
+        elif os.path.isfile(path):
+            add(path, os.path.basename(path))
+        else:
+            print(f"File not found: {path}", file=sys.stderr)
+    return inputs
+
+
+def output_path(input_path, relative_path, output_dir, fmt):
+    if output_dir:
+        base = os.path.join(output_dir, os.path.splitext(relative_path)[0])
+    else:
+        base = os.path.splitext(input_path)[0]
+    return base + "." + fmt
+
+
+def output_collisions(inputs, output_dir):
+    """
+    Returns (input_path, other_input_path, output base) of the inputs that
+    would write the same output files, such as a/g.dot and b/g.dot with
+    --output, or g.dot and g.gv.
+    """
+    owners = {}
+    collisions = []
+    for input_path, relative_path in inputs:
+        base = os.path.normcase(os.path.abspath(output_path(input_path, relative_path, output_dir, "")[:-1]))
+        other = owners.setdefault(base, input_path)
+        if other != input_path:
+            collisions.append((input_path, other, base))
+    return collisions
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_job(source, engine, outputs, split_components=False, check=True, timeout=None, memory_limit=None):
+    """
+    Runs in a worker process. outputs is a list of (fmt, path); the graph is
+    laid out once for all of them. engine "auto" is dot or sfdp by the size
+    of the graph.
+    Returns (seconds, error_message).
+    """
+    t0 = time.perf_counter()
+    if check or engine == "auto":
+        model = parse(source)
+        if check and model.errors:  # reported without starting Graphviz
+            offset, message = model.errors[0]
+            return time.perf_counter() - t0, f"syntax error in line {line_number(source, offset)}: {message}"
+        if engine == "auto":
+            engine = auto_engine(model.node_count(), model.edge_count())
+    try:
+        results = render_formats(source, [fmt for fmt, path in outputs], engine=engine,
+                                 split_components=split_components, jobs=1,
+                                 timeout=timeout, memory_limit=memory_limit)
+        for fmt, path in outputs:
+            data = results[fmt]
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+    except (GraphvizError, OSError) as e:
+        return time.perf_counter() - t0, str(e).strip()
+    return time.perf_counter() - t0, ""
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=about.__program_name__ + " render",
+        description="Render DOT files without opening the window."
+    )
+    parser.add_argument("paths", nargs="+", help="DOT files or directories")
+    parser.add_argument("--format", default="svg", help="Comma separated output formats (default: svg)")
+    parser.add_argument("--engine", default="dot", help="Graphviz layout engine, or auto for sfdp on large graphs (default: dot)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", "-o", default="", help="Output directory (default: next to each input)")
+    parser.add_argument("--manifest", default="", help="Manifest of content hashes (default: "+MANIFEST_NAME+" in the output directory)")
+    parser.add_argument("--components", action="store_true", help="Lay out connected components separately and pack them")
+    parser.add_argument("--force", action="store_true", help="Render unchanged inputs too")
+    parser.add_argument("--no-check", action="store_true", help="Do not check the syntax before running Graphviz")
+    parser.add_argument("--timeout", type=float, default=0, help="Seconds allowed per file (default: no limit)")
+    parser.add_argument("--memory-mb", type=int, default=0, help="Memory limit of each Graphviz process in MB (default: no limit)")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    formats = [fmt.strip() for fmt in args.format.split(",") if fmt.strip()]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    manifest_path = args.manifest or os.path.join(args.output or os.getcwd(), MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    version = graphviz_version("dot" if args.engine == "auto" else args.engine)
+    engine_key = args.engine + "/components" if args.components else args.engine
+
+    inputs = find_inputs(args.paths)
+    collisions = output_collisions(inputs, args.output)
+    for input_path, other, base in collisions:
+        print(f"{input_path} and {other} would both be rendered to {base}.*", file=sys.stderr)
+    if collisions:  # nothing is rendered rather than overwriting outputs
+        return 2
+
+    t0 = time.perf_counter()
+    pending = []
+    skipped = 0
+    for input_path, relative_path in inputs:
+        try:
+            with open(input_path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except OSError as e:
+            print(f"FAIL  {input_path}: {e}")
+            continue
+
+        outputs = []
+        keys = {}
+        for fmt in formats:
+            path = output_path(input_path, relative_path, args.output, fmt)
+            key = make_key(source, engine=engine_key, fmt=fmt, version=version)
+            if args.force or manifest.get(os.path.abspath(path)) != key or not os.path.exists(path):
+                outputs.append((fmt, path))
+                keys[os.path.abspath(path)] = key
+        if outputs:
+            pending.append((input_path, source, outputs, keys))
+        else:
+            skipped += 1
+            print(f"SKIP  {input_path}")
+
+    rendered = 0
+    failed = 0
+    busy_s = 0.0
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            futures = {}
+            for input_path, source, outputs, keys in pending:
+                future = pool.submit(render_job, source, args.engine, outputs,
+                                     split_components=args.components,
+                                     check=not args.no_check,
+                                     timeout=args.timeout or None,
+                                     memory_limit=args.memory_mb*1024*1024 or None)
+                futures[future] = (input_path, keys)
+
+            for future in as_completed(futures):
+                input_path, keys = futures[future]
+                seconds, error = future.result()
+                busy_s += seconds
+                if error:
+                    failed += 1
+                    print(f"FAIL  {input_path} ({seconds:.3f} s): {error}")
+                else:
+                    rendered += 1
+                    manifest.update(keys)
+                    print(f"OK    {input_path} ({seconds:.3f} s)")
+
+        save_manifest(manifest_path, manifest)
+
+    wall_s = time.perf_counter() - t0
+    print(f"{rendered} rendered, {skipped} unchanged, {failed} failed "
+          f"in {wall_s:.3f} s ({busy_s:.3f} s of rendering, {jobs} jobs)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
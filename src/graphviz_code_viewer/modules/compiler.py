@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+import re
+import subprocess
+import threading
+
+try:
+    from resource import prlimit, RLIMIT_AS
+except ImportError:  # only Linux sets the limit of another process
+    prlimit = None
+
+ENGINES = ("dot", "neato", "fdp", "sfdp", "twopi", "circo", "osage")
+
+# Graphs above these sizes are laid out with sfdp in the auto mode
+AUTO_MAX_NODES = 5000
+AUTO_MAX_EDGES = 20000
+
+
+class GraphvizError(Exception):
+    """
+    Graphviz finished with an error; the message is its stderr. timed_out
+    tells a process stopped by its timeout from one that failed.
+    """
+    def __init__(self, message, returncode=None, timed_out=False):
+        super().__init__(message)
+        self.returncode = returncode
+        self.timed_out = timed_out
+
+
+def auto_engine(nodes, edges, max_nodes=AUTO_MAX_NODES, max_edges=AUTO_MAX_EDGES):
+    """dot, or sfdp for graphs that dot would take too long to lay out."""
+    return "sfdp" if nodes > max_nodes or edges > max_edges else "dot"
+
+
+def limit_memory(process, limit):
+    """
+    Caps the address space of a started process. It is set from the parent
+    after the spawn, as a preexec_fn is not safe in a threaded program, and
+    before the source is written to stdin, so the layout runs under it.
+    """
+    try:
+        prlimit(process.pid, RLIMIT_AS, (limit, limit))
+    except ProcessLookupError:  # already exited
+        pass
+
+
+class GraphvizProcess:
+    """
+    Runs one Graphviz process.
+    The DOT source goes to stdin and the rendered output is read from stdout,
+    so no temporary file is created. timeout (seconds) and memory_limit
+    (bytes) cap the process; None means no limit.
+    With on_stderr, Graphviz runs in verbose mode (-v) and each stderr line is
+    passed to on_stderr as it arrives.
+    """
+    def __init__(self, source, engine="dot", fmt="svg", extra_args=None, returncodes=(0,),
+                 timeout=None, memory_limit=None, on_stderr=None):
+        self.source = source
+        self.engine = engine
+        self.fmt = fmt
+        self.extra_args = list(extra_args or [])
+        self.returncodes = returncodes
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.on_stderr = on_stderr
+        self.process = None
+        self.killed = False
+        self.timed_out = False
+
+    def command(self):
+        if self.fmt is None:  # tools such as ccomps and gvpack
+            return [self.engine] + self.extra_args
+        verbose = ["-v"] if self.on_stderr is not None else []
+        return [self.engine, "-T" + self.fmt] + verbose + self.extra_args
+
+    def run(self):
+        """Returns the output bytes or raises GraphvizError."""
+        if self.killed:
+            raise GraphvizError("Graphviz process cancelled")
+
+        try:
+            self.process = subprocess.Popen(
+                self.command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except OSError as e:  # engine not installed
+            raise GraphvizError(str(e))
+        if self.memory_limit and prlimit is not None:
+            limit_memory(self.process, self.memory_limit)
+
+        if self.on_stderr is not None:
+            stdout, stderr = self.communicate_verbose(self.source.encode("utf-8"))
+        else:
+            try:
+                stdout, stderr = self.process.communicate(self.source.encode("utf-8"), timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.communicate()
+                self.timed_out = True
+        if self.timed_out:
+            raise GraphvizError(f"{self.engine} did not finish in {self.timeout:g} s", self.process.returncode, timed_out=True)
+
+        returncode = self.process.returncode
+        if returncode not in self.returncodes:
+            if self.killed:
+                raise GraphvizError("Graphviz process cancelled", returncode)
+            message = stderr.decode("utf-8", errors="replace")
+            if not message:
+                message = "Unknown error running Graphviz"
+            if self.memory_limit and (returncode < 0 or "memory" in message.lower()):
+                message += f"\n{self.engine} may have reached the memory limit of {self.memory_limit // (1024*1024)} MB"
+            raise GraphvizError(message, returncode)
+        return stdout
+
+    def communicate_verbose(self, data):
+        """
+        Like communicate(), but stderr is read line by line and passed to
+        on_stderr. Only warnings and errors are kept for the error message.
+        """
+        process = self.process
+        output = []
+
+        def feed():
+            try:
+                process.stdin.write(data)
+                process.stdin.close()
+            except OSError:  # the process exited without reading everything
+                pass
+
+        def drain():
+            output.append(process.stdout.read())
+            process.stdout.close()
+
+        def expire():
+            self.timed_out = True
+            process.kill()
+
+        threads = [threading.Thread(target=feed, daemon=True), threading.Thread(target=drain, daemon=True)]
+        for thread in threads:
+            thread.start()
+        timer = threading.Timer(self.timeout, expire) if self.timeout else None
+        if timer is not None:
+            timer.start()
+
+        messages = []
+        for raw in iter(process.stderr.readline, b""):
+            line = raw.decode("utf-8", errors="replace")
+            if line.startswith(("Error", "Warning")) or ERROR_LINE.search(line):
+                messages.append(line)
+            self.on_stderr(line)
+        process.stderr.close()
+        for thread in threads:
+            thread.join()
+        process.wait()
+        if timer is not None:
+            timer.cancel()
+        return output[0] if output else b"", "".join(messages).encode("utf-8")
+
+    def kill(self):
+        """Kills the process if it is running; may be called from any thread."""
+        self.killed = True
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+
+def render(source, engine="dot", fmt="svg", extra_args=None, timeout=None, memory_limit=None):
+    """Renders source and returns the output bytes."""
+    return GraphvizProcess(source, engine=engine, fmt=fmt, extra_args=extra_args,
+                           timeout=timeout, memory_limit=memory_limit).run()
+
+
+ERROR_LINE = re.compile(r"in line (\d+)")
+
+def error_lines(message):
+    """(line, text) of the stderr lines of Graphviz that name a source line."""
+    lines = []
+    for text in message.splitlines():
+        m = ERROR_LINE.search(text)
+        if m:
+            lines.append((int(m.group(1)), text.strip()))
+    return lines
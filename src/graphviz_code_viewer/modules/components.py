@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from graphviz_code_viewer.modules.compiler import GraphvizProcess, GraphvizError
+
+
+def split_graphs(text):
+    """
+    Splits the output of `ccomps -x` into one DOT source per graph.
+    Graphviz writes the closing brace of a root graph alone at column 0.
+    """
+    graphs = []
+    current = []
+    for line in text.splitlines(keepends=True):
+        current.append(line)
+        if line.rstrip() == "}":
+            graphs.append("".join(current))
+            current = []
+    return graphs
+
+
+class ComponentPipeline:
+    """
+    Lays out each connected component in its own Graphviz process and packs
+    the results, as in `ccomps -x | dot | gvpack | neato -s -n2`.
+    It has the run()/kill() interface of GraphvizProcess; timeout applies to
+    the whole pipeline and memory_limit to each process. extra_args (such
+    as more -T outputs) are passed to the process that renders the result.
+    """
+    def __init__(self, source, engine="dot", fmt="svg", jobs=0, timeout=None, memory_limit=None, extra_args=None):
+        self.source = source
+        self.engine = engine
+        self.fmt = fmt
+        self.extra_args = list(extra_args or [])
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.deadline = None
+        self.components = 0
+
+        self._lock = threading.Lock()
+        self._processes = []
+        self.killed = False
+
+    def _run(self, process):
+        with self._lock:
+            if self.killed:
+                raise GraphvizError("Graphviz process cancelled")
+            self._processes.append(process)
+        process.memory_limit = self.memory_limit
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise GraphvizError(f"{self.engine} did not finish in {self.timeout:g} s", timed_out=True)
+            process.timeout = remaining
+        return process.run()
+
+    def run(self):
+        """Returns the output bytes or raises GraphvizError."""
+        if self.timeout:
+            self.deadline = time.monotonic() + self.timeout
+        # ccomps exits with 1 when the graph has more than one component
+        output = self._run(GraphvizProcess(self.source, engine="ccomps", fmt=None, extra_args=["-x"], returncodes=(0, 1)))
+        graphs = split_graphs(output.decode("utf-8", errors="replace"))
+        self.components = len(graphs)
+
+        # A single component gains nothing from the split
+        if len(graphs) <= 1:
+            return self._run(GraphvizProcess(self.source, engine=self.engine, fmt=self.fmt, extra_args=self.extra_args))
+
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(graphs))) as pool:
+            processes = [GraphvizProcess(graph, engine=self.engine, fmt="dot") for graph in graphs]
+            positioned = list(pool.map(self._run, processes))
+
+        packed = self._run(GraphvizProcess(
+            b"".join(positioned).decode("utf-8", errors="replace"),
+            engine="gvpack",
+            fmt=None
+        ))
+        return self._run(GraphvizProcess(
+            packed.decode("utf-8", errors="replace"),
+            engine="neato",
+            fmt=self.fmt,
+            extra_args=["-s", "-n2"] + self.extra_args
+        ))
+
+    def kill(self):
+        """Kills every running process of the pipeline."""
+        with self._lock:
+            self.killed = True
+            processes = list(self._processes)
+        for process in processes:
+            process.kill()
@@ -0,0 +1,701 @@
+#!/usr/bin/python3
+"""
+Pure Python DOT parser.
+
+The document is kept as a flat list of items, one per statement (the graph
+header, node, edge and attribute statements, and the opening and closing
+braces of subgraphs). Items are parsed independently, so an edit only
+re-parses the items around it. GraphModel is built from the items on demand
+and stores nodes and edges in arrays.
+"""
+import re
+import sys
+import bisect
+from array import array
+
+# Item kinds
+HEADER = 0   # [strict] (graph|digraph) [ID] {
+NODE = 1     # ID [port] [attr_list]
+EDGE = 2     # (node_id|subgraph) edge_op ... [attr_list]
+ATTR = 3     # (graph|node|edge) attr_list
+ASSIGN = 4   # ID = ID
+OPEN = 5     # [subgraph [ID]] {
+CLOSE = 6    # }
+ERROR = 7
+
+KEYWORDS = ("strict", "graph", "digraph", "subgraph", "node", "edge")
+
+# Edge endpoint standing for the subgraph closed right before the edge operator
+PREVIOUS_SUBGRAPH = None
+
+# IDs start with a letter, '_' or any character above ASCII; written with
+# negated classes because a \w range up to \U0010ffff is slow to compile
+SKIP = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/|^#[^\n]*)*', re.S | re.M)
+TOKEN = re.compile(r'''
+  (?P<edge>->|--)
+| (?P<id>[^\x00-\x40\x5b-\x5e\x60\x7b-\x7f][^\x00-\x2f\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]*)
+| (?P<num>-?(?:\.\d+|\d+(?:\.\d*)?))
+| (?P<str>"(?:[^"\\]|\\.)*")
+| (?P<punct>[{}\[\];,=:+])
+| (?P<html><)
+''', re.S | re.X)
+HTML_BRACKET = re.compile(r'[<>]')
+STRING_ESCAPES = re.compile(r'\\(\n|")')
+
+
+class DotSyntaxError(Exception):
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class Group(tuple):
+    """
+    Node names of a subgraph used as an edge endpoint. items holds its
+    statements as (kind, start, end, payload), between its OPEN and CLOSE.
+    """
+    def __new__(cls, names, items):
+        group = super().__new__(cls, names)
+        group.items = items
+        return group
+
+
+def unquote(token):
+    """Value of a quoted string: escaped quotes and line continuations resolved."""
+    return STRING_ESCAPES.sub(lambda m: "" if m.group(1) == "\n" else "\"", token[1:-1])
+
+# ------------------------------------------------------------------------------
+# Statement parser
+# ------------------------------------------------------------------------------
+class _Parser:
+    """
+    Parses one item at a time starting from a statement boundary.
+    Names are interned and equal attribute lists share one tuple, so a
+    million edges with the same style cost one attribute object.
+    """
+    def __init__(self, text, pos=0, memo=None):
+        self.text = text
+        self.memo = {} if memo is None else memo
+        self.length = len(text)
+        self.pos = pos
+        self.prev_end = pos
+        self.tok = self.lex(pos)
+        self.pos = self.tok[3]
+
+    # --------------------------------------------------------------------------
+    def lex(self, pos):
+        text = self.text
+        pos = SKIP.match(text, pos).end()
+        if pos >= self.length:
+            return ("eof", "", pos, pos)
+        if text.startswith("/*", pos):
+            return ("bad", "unterminated comment", pos, self.length)
+
+        m = TOKEN.match(text, pos)
+        if m is None:
+            if text[pos] == "\"":
+                return ("bad", "unterminated string", pos, self.length)
+            return ("bad", "unexpected character " + repr(text[pos]), pos, pos + 1)
+
+        kind = m.lastgroup
+        end = m.end()
+        if kind == "id":
+            value = m.group(kind)
+            lower = value.lower()
+            if lower in KEYWORDS:
+                return ("kw", lower, pos, end)
+            return ("id", sys.intern(value), pos, end)
+        if kind == "num":
+            return ("id", sys.intern(m.group(kind)), pos, end)
+        if kind == "str":
+            value = unquote(m.group(kind))
+            # "a" + "b" concatenation
+            while True:
+                p = SKIP.match(text, end).end()
+                if not text.startswith("+", p):
+                    break
+                m2 = TOKEN.match(text, SKIP.match(text, p + 1).end())
+                if m2 is None or m2.lastgroup != "str":
+                    break
+                value += unquote(m2.group("str"))
+                end = m2.end()
+            return ("id", sys.intern(value), pos, end)
+        if kind == "html":
+            depth = 0
+            for b in HTML_BRACKET.finditer(text, pos):
+                depth += 1 if b.group() == "<" else -1
+                if depth == 0:
+                    return ("id", text[pos + 1:b.start()], pos, b.end())
+            return ("bad", "unterminated HTML label", pos, self.length)
+        return (kind, m.group(kind), pos, end)
+
+    def advance(self):
+        self.prev_end = self.tok[3]
+        self.tok = self.lex(self.pos)
+        self.pos = self.tok[3]
+
+    def expect(self, kind, value=None):
+        tok = self.tok
+        if tok[0] != kind or (value is not None and tok[1] != value):
+            raise DotSyntaxError(self.describe(value or kind), tok[2])
+        self.advance()
+        return tok
+
+    def describe(self, expected):
+        kind, value, start, end = self.tok
+        if kind == "bad":
+            return value
+        if kind == "eof":
+            return f"expected '{expected}' at end of file"
+        near = self.text[start:min(end, start + 20)].split("\n", 1)[0]
+        return f"expected '{expected}' near '{near}'"
+
+    # --------------------------------------------------------------------------
+    def parse_attr_list(self):
+        """Returns the (key, value) pairs of one or more [...] lists, or None."""
+        if not (self.tok[0] == "punct" and self.tok[1] == "["):
+            return None
+        attrs = {}
+        while self.tok[0] == "punct" and self.tok[1] == "[":
+            self.advance()
+            while not (self.tok[0] == "punct" and self.tok[1] == "]"):
+                key = self.tok
+                if key[0] not in ("id", "kw"):
+                    raise DotSyntaxError(self.describe("]"), key[2])
+                self.advance()
+                value = "true"
+                if self.tok[0] == "punct" and self.tok[1] == "=":
+                    self.advance()
+                    value = self.expect_id()
+                attrs[key[1]] = value
+                if self.tok[0] == "punct" and self.tok[1] in ",;":
+                    self.advance()
+            self.advance()
+        attrs = tuple(attrs.items())
+        return self.memo.setdefault(attrs, attrs)
+
+    def expect_id(self):
+        tok = self.tok
+        if tok[0] != "id":
+            raise DotSyntaxError(self.describe("ID"), tok[2])
+        self.advance()
+        return tok[1]
+
+    def parse_node_id(self):
+        name = self.expect_id()
+        # port: ':' ID [':' compass_pt]
+        for _ in range(2):
+            if self.tok[0] == "punct" and self.tok[1] == ":":
+                self.advance()
+                self.expect_id()
+        return name
+
+    def parse_group(self):
+        """Anonymous or named subgraph used as an edge endpoint; returns its Group."""
+        start = self.tok[2]
+        name = None
+        if self.tok[0] == "kw" and self.tok[1] == "subgraph":
+            self.advance()
+            if self.tok[0] == "id":
+                name = self.tok[1]
+                self.advance()
+        self.expect("punct", "{")
+        items = [(OPEN, start, self.last_end(), name)]
+        names = []
+        while not (self.tok[0] == "punct" and self.tok[1] == "}"):
+            kind, value, item_start = self.tok[0], self.tok[1], self.tok[2]
+            if kind == "eof" or kind == "bad":
+                raise DotSyntaxError(self.describe("}"), self.tok[2])
+            if (kind == "kw" and value == "subgraph") or (kind == "punct" and value == "{"):
+                group = self.parse_group()
+                names.extend(group)
+                if self.tok[0] == "edge":
+                    endpoints, attrs = self.parse_edge_rhs(group)
+                    items.append((EDGE, item_start, self.last_end(), (endpoints, attrs)))
+                    for endpoint in endpoints[1:]:
+                        names.extend(endpoint if isinstance(endpoint, tuple) else (endpoint,))
+                else:
+                    items.extend(group.items)
+                self.skip_separator()
+                continue
+            item = self.parse_statement()
+            items.append(item)
+            kind, payload = item[0], item[3]
+            if kind == NODE:
+                names.append(payload[0])
+            elif kind == EDGE:
+                for endpoint in payload[0]:
+                    if isinstance(endpoint, tuple):
+                        names.extend(endpoint)
+                    elif endpoint is not PREVIOUS_SUBGRAPH:
+                        names.append(endpoint)
+            self.skip_separator()
+        close_start = self.tok[2]
+        self.advance()
+        items.append((CLOSE, close_start, self.last_end(), None))
+        return Group(names, items)
+
+    def parse_endpoint(self):
+        tok = self.tok
+        if tok[0] == "id":
+            return self.parse_node_id()
+        if (tok[0] == "kw" and tok[1] == "subgraph") or (tok[0] == "punct" and tok[1] == "{"):
+            return self.parse_group()
+        raise DotSyntaxError(self.describe("ID"), tok[2])
+
+    def parse_edge_rhs(self, first):
+        endpoints = [first]
+        while self.tok[0] == "edge":
+            self.advance()
+            endpoints.append(self.parse_endpoint())
+        return tuple(endpoints), self.parse_attr_list()
+
+    def parse_statement(self):
+        """Returns (kind, start, end, payload) of the statement at the current token."""
+        kind, value, start, _ = self.tok
+
+        if kind == "kw":
+            if value in ("graph", "node", "edge"):
+                self.advance()
+                if self.tok[0] == "punct" and self.tok[1] == "[":
+                    attrs = self.parse_attr_list()
+                    return (ATTR, start, self.last_end(), (value, attrs))
+                if value != "graph":
+                    raise DotSyntaxError(self.describe("["), self.tok[2])
+                return self.parse_header(start, False, True if value == "digraph" else False)
+            if value in ("strict", "digraph"):
+                self.advance()
+                if value == "strict":
+                    tok = self.tok
+                    if tok[0] != "kw" or tok[1] not in ("graph", "digraph"):
+                        raise DotSyntaxError(self.describe("graph"), tok[2])
+                    self.advance()
+                    return self.parse_header(start, True, tok[1] == "digraph")
+                return self.parse_header(start, False, True)
+            if value == "subgraph":
+                self.advance()
+                name = None
+                if self.tok[0] == "id":
+                    name = self.tok[1]
+                    self.advance()
+                self.expect("punct", "{")
+                return (OPEN, start, self.last_end(), name)
+
+        elif kind == "punct":
+            if value == "{":
+                self.advance()
+                return (OPEN, start, self.last_end(), None)
+            if value == "}":
+                self.advance()
+                return (CLOSE, start, self.last_end(), None)
+
+        elif kind == "edge":
+            # Edge whose tail is the subgraph closed just before
+            endpoints, attrs = self.parse_edge_rhs(PREVIOUS_SUBGRAPH)
+            return (EDGE, start, self.last_end(), (endpoints, attrs))
+
+        elif kind == "id":
+            self.advance()
+            if self.tok[0] == "punct" and self.tok[1] == "=":
+                self.advance()
+                assigned = self.expect_id()
+                return (ASSIGN, start, self.last_end(), (value, assigned))
+            # port
+            for _ in range(2):
+                if self.tok[0] == "punct" and self.tok[1] == ":":
+                    self.advance()
+                    self.expect_id()
+            if self.tok[0] == "edge":
+                endpoints, attrs = self.parse_edge_rhs(value)
+                return (EDGE, start, self.last_end(), (endpoints, attrs))
+            attrs = self.parse_attr_list()
+            return (NODE, start, self.last_end(), (value, attrs))
+
+        raise DotSyntaxError(self.describe("statement"), start)
+
+    def parse_header(self, start, strict, directed):
+        name = None
+        if self.tok[0] == "id":
+            name = self.tok[1]
+            self.advance()
+        self.expect("punct", "{")
+        return (HEADER, start, self.last_end(), (strict, directed, name))
+
+    def last_end(self):
+        """End of the last consumed token."""
+        return self.prev_end
+
+    def skip_separator(self):
+        """Skips the separator after a statement, and empty statements (";;"), which Graphviz accepts."""
+        if self.tok[0] == "punct" and self.tok[1] in ";,":
+            self.advance()
+            while self.tok[0] == "punct" and self.tok[1] == ";":
+                self.advance()
+
+    # --------------------------------------------------------------------------
+    def next_item(self):
+        """
+        Returns (kind, start, end, payload) or None at the end of the text.
+        end excludes the optional ';' that follows the statement.
+        """
+        tok = self.tok
+        if tok[0] == "eof":
+            return None
+        try:
+            item = self.parse_statement()
+        except DotSyntaxError as e:
+            # The offset is relative to the item, so it survives edits before it
+            item = (ERROR, tok[2], self.recover(tok[2]), (str(e), e.offset - tok[2]))
+        self.skip_separator()
+        return item
+
+    def recover(self, start):
+        """
+        Skips the rest of a bad statement: up to a ';', a brace or the end of
+        the line. Returns the end of the skipped text.
+        """
+        while True:
+            kind, value, tok_start, _ = self.tok
+            if kind == "eof":
+                break
+            if self.prev_end > start:
+                if kind == "punct" and value in "{}":
+                    break
+                if "\n" in self.text[self.prev_end:tok_start]:
+                    break
+            self.advance()
+            if kind == "bad" or (kind == "punct" and value == ";"):
+                break
+        return max(self.prev_end, start + 1)
+
+
+# ------------------------------------------------------------------------------
+# Graph model
+# ------------------------------------------------------------------------------
+class Subgraph:
+    __slots__ = ("name", "start", "end", "body_start", "parent", "nodes")
+
+    def __init__(self, name, start, body_start, parent):
+        self.name = name
+        self.start = start
+        self.end = -1
+        self.body_start = body_start
+        self.parent = parent
+        self.nodes = array("l")
+
+
+class GraphModel:
+    """
+    Nodes, edges, attributes and subgraphs of a DOT document.
+    Node i is node_names[i]; edge j goes from node edge_tail[j] to
+    edge_head[j]. Spans are character offsets in the source.
+    """
+    __slots__ = ("strict", "directed", "name", "attrs",
+                 "node_names", "node_index", "node_attrs", "node_start", "node_end",
+                 "edge_tail", "edge_head", "edge_attrs", "edge_start", "edge_end",
+                 "subgraphs", "attr_stmts", "errors", "warnings")
+
+    def __init__(self):
+        self.strict = False
+        self.directed = True
+        self.name = None
+        self.attrs = {}
+
+        self.node_names = []
+        self.node_index = {}
+        self.node_attrs = []          # None or dict of the merged node statements
+        self.node_start = array("l")  # first mention
+        self.node_end = array("l")
+
+        self.edge_tail = array("l")
+        self.edge_head = array("l")
+        self.edge_attrs = []          # None or tuple of (key, value), shared
+        self.edge_start = array("l")  # edge statement
+        self.edge_end = array("l")
+
+        self.subgraphs = []
+        self.attr_stmts = []          # (kind, attrs dict, start, end) of graph/node/edge [...] and ID=ID
+        self.errors = []              # (offset, message)
+        self.warnings = []            # (offset, message) of input that Graphviz accepts
+
+    def node_count(self):
+        return len(self.node_names)
+
+    def edge_count(self):
+        return len(self.edge_tail)
+
+    def node_id(self, name, start, end):
+        index = self.node_index.get(name)
+        if index is None:
+            index = len(self.node_names)
+            self.node_index[name] = index
+            self.node_names.append(name)
+            self.node_attrs.append(None)
+            self.node_start.append(start)
+            self.node_end.append(end)
+        return index
+
+
+def build_model(items):
+    """Builds a GraphModel from the items of a document."""
+    model = GraphModel()
+    starts, ends, kinds, payloads = items.starts, items.ends, items.kinds, items.payloads
+    stack = []         # open subgraphs
+    last_closed = None
+    root_open = False
+    root_closed = False
+    trailing_reported = False
+
+    def add_statement(kind, start, end, payload):
+        """Adds a statement of the graph body; subgraphs used as edge endpoints are added after their edge."""
+        nonlocal last_closed, root_closed
+        if kind == NODE:
+            name, attrs = payload
+            index = model.node_id(name, start, end)
+            if attrs:
+                if model.node_attrs[index] is None:
+                    model.node_attrs[index] = dict(attrs)
+                else:
+                    model.node_attrs[index].update(attrs)
+            for sub in stack:
+                sub.nodes.append(index)
+        elif kind == EDGE:
+            endpoints, attrs = payload
+            groups = []
+            for endpoint in endpoints:
+                if endpoint is PREVIOUS_SUBGRAPH:
+                    names = [model.node_names[n] for n in last_closed.nodes] if last_closed else []
+                elif isinstance(endpoint, tuple):
+                    names = endpoint
+                else:
+                    names = (endpoint,)
+                ids = [model.node_id(name, start, end) for name in names]
+                for sub in stack:
+                    sub.nodes.extend(ids)
+                groups.append(ids)
+            for tails, heads in zip(groups, groups[1:]):
+                for tail in tails:
+                    for head in heads:
+                        model.edge_tail.append(tail)
+                        model.edge_head.append(head)
+                        model.edge_attrs.append(attrs)
+                        model.edge_start.append(start)
+                        model.edge_end.append(end)
+            # After the edges of the statement, so edge_start stays sorted
+            closed = last_closed
+            for endpoint in endpoints:
+                if isinstance(endpoint, Group):
+                    for item in endpoint.items:
+                        add_statement(*item)
+            last_closed = closed
+        elif kind == ATTR:
+            target, attrs = payload
+            model.attr_stmts.append((target, dict(attrs or ()), start, end))
+            if target == "graph" and not stack and attrs:
+                model.attrs.update(attrs)
+        elif kind == ASSIGN:
+            model.attr_stmts.append(("graph", {payload[0]: payload[1]}, start, end))
+            if not stack:
+                model.attrs[payload[0]] = payload[1]
+        elif kind == OPEN:
+            sub = Subgraph(payload, start, end, stack[-1] if stack else None)
+            model.subgraphs.append(sub)
+            stack.append(sub)
+        elif kind == CLOSE:
+            if stack:
+                last_closed = stack.pop()
+                last_closed.end = end
+            else:
+                root_closed = True
+
+    for i in range(len(kinds)):
+        kind = kinds[i]
+        start = starts[i]
+        end = ends[i]
+        payload = payloads[i]
+
+        if root_closed and kind != ERROR:
+            if not trailing_reported:  # more graphs: Graphviz renders each one
+                model.warnings.append((start, "text after the end of the graph"))
+                trailing_reported = True
+            continue
+
+        if kind == HEADER:
+            if root_open:
+                model.errors.append((start, "graph header inside the graph"))
+                continue
+            root_open = True
+            model.strict, model.directed, model.name = payload
+            continue
+        if kind == ERROR:
+            message, offset = payload
+            model.errors.append((start + offset, message))
+            continue
+        if not root_open:
+            model.errors.append((start, "expected 'graph' or 'digraph'"))
+            root_open = True
+
+        add_statement(kind, start, end, payload)
+
+    if not root_open:
+        model.errors.append((0, "expected 'graph' or 'digraph'"))
+    elif not root_closed:
+        offset = ends[-1] if len(ends) else 0
+        model.errors.append((offset, "expected '}' at end of file"))
+    model.errors.sort()
+    return model
+
+# ------------------------------------------------------------------------------
+# Incremental document
+# ------------------------------------------------------------------------------
+class _Items:
+    """Flat, array backed list of items."""
+    __slots__ = ("starts", "ends", "kinds", "payloads")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.kinds = array("b")
+        self.payloads = []
+
+    def append(self, item):
+        kind, start, end, payload = item
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.payloads.append(payload)
+
+    def __len__(self):
+        return len(self.kinds)
+
+
+def parse_items(text, pos=0, stop=None, memo=None):
+    """
+    Parses items from pos, the start of the text or the end of an item.
+    stop(item) is called for every item and parsing ends when it returns
+    True (the item is not included).
+    """
+    items = _Items()
+    parser = _Parser(text, pos, memo)
+    if pos:
+        parser.skip_separator()
+    while True:
+        item = parser.next_item()
+        if item is None or (stop is not None and stop(item)):
+            break
+        items.append(item)
+    return items
+
+
+def tokenize(text):
+    """(kind, value) of the tokens of text; kind is id, kw, edge, punct or bad (last)."""
+    parser = _Parser(text)
+    while parser.tok[0] != "eof":
+        yield parser.tok[0], parser.tok[1]
+        if parser.tok[0] == "bad":
+            return
+        parser.advance()
+
+
+def line_number(text, offset):
+    """1-based line of a character offset."""
+    return text.count("\n", 0, offset) + 1
+
+
+def parse(text):
+    """
+    Parses a DOT source and returns its GraphModel. The statements of a
+    subgraph used as an edge endpoint are part of the graph too:
+
+    >>> model = parse("digraph { a -> subgraph s { b -> c } }")
+    >>> [(model.node_names[t], model.node_names[h]) for t, h in zip(model.edge_tail, model.edge_head)]
+    [('a', 'b'), ('a', 'c'), ('b', 'c')]
+    >>> [(sub.name, sorted({model.node_names[n] for n in sub.nodes})) for sub in model.subgraphs]
+    [('s', ['b', 'c'])]
+    """
+    return build_model(parse_items(text))
+
+
+class DotDocument:
+    """
+    DOT source kept in sync with an editor.
+    apply_edit() re-parses only the items around the edited region and
+    stops as soon as the new items line up with the old ones again.
+    """
+    def __init__(self, text="", cancelled=None):
+        self.set_text(text, cancelled)
+
+    def set_text(self, text, cancelled=None):
+        """cancelled() is polled while parsing; the parse stops when it returns True."""
+        self.text = text
+        self.memo = {}
+        stop = (lambda item: cancelled()) if cancelled is not None else None
+        self.items = parse_items(text, stop=stop, memo=self.memo)
+        self._model = None
+
+    def apply_edit(self, position, removed, added):
+        """The text in [position, position+removed) was replaced by added."""
+        old_text = self.text
+        position = max(0, min(position, len(old_text)))
+        removed = max(0, min(removed, len(old_text) - position))
+        if old_text[position:position + removed] == added:
+            return  # format-only change
+        text = old_text[:position] + added + old_text[position + removed:]
+        self.text = text
+        self._model = None
+
+        items = self.items
+        delta = len(added) - removed
+        old_edit_end = position + removed
+        new_edit_end = position + len(added)
+
+        # First item touched by the edit; the two before it may have looked
+        # ahead into the edited text
+        first = bisect.bisect_left(items.ends, position)
+        first = max(0, first - 2)
+        # Statement boundary; the edit may be inside a comment between items
+        reparse_from = items.ends[first - 1] if first > 0 else 0
+
+        # Old items that start after the edit, in old coordinates
+        resync = bisect.bisect_left(items.starts, old_edit_end, lo=first)
+        resync_starts = items.starts
+
+        def stop(item):
+            start = item[1]
+            if start < new_edit_end:
+                return False
+            # An old item starting at the same place parses the same way
+            old_start = start - delta
+            j = bisect.bisect_left(resync_starts, old_start, lo=resync)
+            if j < len(resync_starts) and resync_starts[j] == old_start:
+                stop.index = j
+                return True
+            return False
+        stop.index = len(items)
+
+        new_items = parse_items(text, reparse_from, stop, self.memo)
+        last = stop.index
+
+        # Splice the new items and shift the ones after them
+        tail_starts = items.starts[last:]
+        tail_ends = items.ends[last:]
+        if delta:
+            tail_starts = array("q", [s + delta for s in tail_starts])
+            tail_ends = array("q", [e + delta for e in tail_ends])
+        items.starts[first:] = new_items.starts + tail_starts
+        items.ends[first:] = new_items.ends + tail_ends
+        items.kinds[first:last] = new_items.kinds
+        items.payloads[first:last] = new_items.payloads
+
+    def model(self):
+        """GraphModel of the current text, built on first use after an edit."""
+        if self._model is None:
+            self._model = build_model(self.items)
+        return self._model
+
+    def item_at(self, offset):
+        """Index of the item containing offset, or -1."""
+        i = bisect.bisect_right(self.items.starts, offset) - 1
+        if i >= 0 and offset <= self.items.ends[i]:
+            return i
+        return -1
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+import io
+import os
+import mmap
+import codecs
+import threading
+from array import array
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+def map_file(f):
+    """Read-only memory map of an open file, or None if it cannot be mapped."""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):  # empty file, pipe, no mmap support
+        return None
+
+
+def text_decoder():
+    """Incremental UTF-8 decoder that also turns \\r\\n into \\n across chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    return io.IncrementalNewlineDecoder(decoder, translate=True)
+
+# ------------------------------------------------------------------------------
+# Background loading in chunks
+# ------------------------------------------------------------------------------
+class FileLoadThread(QThread):
+    """
+    Reads a file in chunks and emits the decoded text of each one.
+    At most max_pending chunks wait for the GUI thread, which calls
+    chunk_done() after appending each chunk to the document.
+    """
+    chunk = pyqtSignal(int, str)   # (generation, text)
+    progress = pyqtSignal(int)
+    done = pyqtSignal(int, str)    # (generation, error message)
+
+    def __init__(self, path, generation=0, chunk_bytes=1024*1024, max_pending=4):
+        super().__init__()
+        self.path = path
+        self.generation = generation
+        self.chunk_bytes = chunk_bytes
+        self.slots = threading.Semaphore(max_pending)
+        self.cancelled = False
+
+    def chunk_done(self):
+        self.slots.release()
+
+    def cancel(self):
+        self.cancelled = True
+        self.slots.release()
+
+    def run(self):
+        try:
+            size = max(1, os.path.getsize(self.path))
+            with open(self.path, "rb") as f:
+                data = map_file(f)
+                decoder = text_decoder()
+                pos = 0
+                while not self.cancelled:
+                    if data is not None:
+                        block = data[pos:pos + self.chunk_bytes]
+                    else:
+                        block = f.read(self.chunk_bytes)
+                    pos += len(block)
+                    text = decoder.decode(block, final=not block)
+                    if text:
+                        self.slots.acquire()
+                        if self.cancelled:
+                            break
+                        self.chunk.emit(self.generation, text)
+                    self.progress.emit(min(100, pos * 100 // size))
+                    if not block:
+                        break
+                if data is not None:
+                    data.close()
+        except OSError as e:
+            self.done.emit(self.generation, str(e))
+            return
+        self.done.emit(self.generation, "")
+
+# ------------------------------------------------------------------------------
+# Read-only paged view
+# ------------------------------------------------------------------------------
+class PagedFile:
+    """
+    Large file shown one page at a time. Pages hold whole lines of about
+    page_bytes bytes; only the offsets of the pages are kept in memory.
+    """
+    def __init__(self, path, page_bytes=1024*1024):
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = map_file(self.file)
+        if self.data is None:
+            self.data = self.file.read()
+
+        size = len(self.data)
+        self.offsets = array("q", [0])
+        pos = 0
+        while True:
+            end = self.data.find(b"\n", pos + page_bytes)
+            if end == -1 or end + 1 >= size:
+                break
+            pos = end + 1
+            self.offsets.append(pos)
+        self.offsets.append(size)
+
+    def page_count(self):
+        return len(self.offsets) - 1
+
+    def page(self, index):
+        data = self.data[self.offsets[index]:self.offsets[index + 1]]
+        return text_decoder().decode(data, final=True)
+
+    def text(self):
+        """The whole file."""
+        return text_decoder().decode(self.data[:], final=True)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
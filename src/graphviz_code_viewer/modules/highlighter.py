@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+import re
+
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+
+# Block states carried from one line to the next
+STATE_NORMAL = -1   # default state of QSyntaxHighlighter
+STATE_STRING = 1
+STATE_COMMENT = 2
+STATE_HTML = 3      # STATE_HTML + n is an HTML label at nesting depth n
+
+# Rules that open a region instead of matching a single token
+STRING_KEY = "\""
+BLOCK_COMMENT_KEY = "/*"
+LINE_COMMENT_KEY = "//"
+HTML_KEY = "<"
+
+STRING_END = re.compile(r'(?:[^"\\]|\\.)*"')
+COMMENT_END = re.compile(r'\*/')
+HTML_BRACKET = re.compile(r'[<>]')
+
+def string_closed(token):
+    """True if a string token ends with its closing quote, not with an escaped one (\\")."""
+    if len(token) < 2 or token[-1] != "\"":
+        return False
+    body = token[:-1]
+    return (len(body) - len(body.rstrip("\\"))) % 2 == 0
+
+
+def make_format(data):
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(data["color"]))
+    if data["bold"]:
+        fmt.setFontWeight(QFont.Bold)
+    return fmt
+
+
+class GraphvizHighlighter(QSyntaxHighlighter):
+    """
+    Single pass DOT tokenizer driven by the syntax_rules of config_editor.json.
+    All rules are compiled into one regular expression that splits each line
+    into tokens in one call, and strings, HTML labels and /* */ comments are
+    tracked across lines with the block state.
+    """
+    def __init__(self, parent, rules_dict):
+        super().__init__(parent)
+
+        self.region_formats = {}
+        self.keyword_formats = {}
+        for key, data in rules_dict.items():
+            if key in (STRING_KEY, BLOCK_COMMENT_KEY, LINE_COMMENT_KEY, HTML_KEY):
+                self.region_formats[key] = make_format(data)
+            else:
+                self.keyword_formats[key] = make_format(data)
+
+        # Words only match whole identifiers; longest symbols first, so "->" wins over "-"
+        words = [key for key in self.keyword_formats if re.fullmatch(r"\w+", key)]
+        symbols = [key for key in self.keyword_formats if key not in words]
+        words.sort(key=len, reverse=True)
+        symbols.sort(key=len, reverse=True)
+
+        # Regions are always tokenized, even without a rule, so keywords
+        # inside strings and comments are not highlighted
+        alternatives = [
+            r'"(?:[^"\\]|\\.)*"?',
+            r'/\*(?:.*?\*/|.*)',
+            r'//.*',
+            re.escape(HTML_KEY)
+        ]
+        if words:
+            alternatives.append(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b")
+        alternatives += [re.escape(s) for s in symbols]
+
+        # The lookahead skips the positions where no token can start
+        first_chars = set("\"/<") | set(key[0] for key in self.keyword_formats)
+        charset = "".join(re.escape(c) for c in sorted(first_chars))
+        self.pattern = re.compile("(?=[" + charset + "])(" + "|".join(alternatives) + ")")
+
+    # --------------------------------------------------------------------------
+    def set_region_format(self, key, start, length):
+        fmt = self.region_formats.get(key)
+        if fmt is not None and length > 0:
+            self.setFormat(start, length, fmt)
+
+    def continue_string(self, text, pos):
+        """Returns the end of the string or -1 if it goes on in the next line."""
+        m = STRING_END.match(text, pos)
+        if m is None:
+            self.set_region_format(STRING_KEY, pos, len(text) - pos)
+            return -1
+        self.set_region_format(STRING_KEY, pos, m.end() - pos)
+        return m.end()
+
+    def continue_comment(self, text, pos):
+        m = COMMENT_END.search(text, pos)
+        if m is None:
+            self.set_region_format(BLOCK_COMMENT_KEY, pos, len(text) - pos)
+            return -1
+        self.set_region_format(BLOCK_COMMENT_KEY, pos, m.end() - pos)
+        return m.end()
+
+    def continue_html(self, text, pos, depth):
+        """Returns (end, depth); end is -1 if the label goes on in the next line."""
+        for m in HTML_BRACKET.finditer(text, pos):
+            depth += 1 if m.group() == "<" else -1
+            if depth == 0:
+                self.set_region_format(HTML_KEY, pos, m.end() - pos)
+                return m.end(), 0
+        self.set_region_format(HTML_KEY, pos, len(text) - pos)
+        return -1, depth
+
+    def highlight_tokens(self, text, pos):
+        """
+        Formats text[pos:] and returns the state of the next line.
+        split() returns the text between tokens and the tokens alternately.
+        """
+        setFormat = self.setFormat
+        get_format = self.keyword_formats.get
+        string_format = self.region_formats.get(STRING_KEY)
+        parts = self.pattern.split(text[pos:] if pos else text)
+        pos += len(parts[0])
+        for i in range(1, len(parts), 2):
+            token = parts[i]
+            n = len(token)
+            fmt = get_format(token)
+            if fmt is not None:
+                setFormat(pos, n, fmt)
+            elif token[0] == "\"":
+                # Most strings end with an unescaped quote; string_closed() counts the backslashes
+                if n > 1 and token[-1] == "\"" and (token[-2] != "\\" or string_closed(token)):
+                    if string_format is not None:
+                        setFormat(pos, n, string_format)
+                else:
+                    self.set_region_format(STRING_KEY, pos, len(text) - pos)
+                    return STATE_STRING
+            elif token[0] == "<":
+                end, depth = self.continue_html(text, pos, 0)
+                if end == -1:
+                    return STATE_HTML + depth
+                return self.highlight_tokens(text, end)
+            elif token[1] == "*":
+                self.set_region_format(BLOCK_COMMENT_KEY, pos, n)
+                if n < 4 or not token.endswith("*/"):
+                    return STATE_COMMENT
+            else:
+                self.set_region_format(LINE_COMMENT_KEY, pos, n)
+            pos += n + len(parts[i + 1])
+        return STATE_NORMAL
+
+    def highlightBlock(self, text):
+        state = self.previousBlockState()
+        pos = 0
+
+        # Region left open by the previous line
+        if state == STATE_STRING:
+            pos = self.continue_string(text, 0)
+        elif state == STATE_COMMENT:
+            pos = self.continue_comment(text, 0)
+        elif state >= STATE_HTML:
+            pos, depth = self.continue_html(text, 0, state - STATE_HTML)
+            if pos == -1:
+                self.setCurrentBlockState(STATE_HTML + depth)
+                return
+        elif text.startswith("#"):  # C preprocessor output
+            self.set_region_format(LINE_COMMENT_KEY, 0, len(text))
+            self.setCurrentBlockState(STATE_NORMAL)
+            return
+
+        if pos == -1:
+            self.setCurrentBlockState(state)
+            return
+
+        self.setCurrentBlockState(self.highlight_tokens(text, pos))
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+import os
+import zlib
+import struct
+
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt, QByteArray, QRectF, QThread, pyqtSignal
+
+# Graphviz SVG sizes are in points
+SVG_DPI = 72
+
+# Largest strip of rows rendered at once
+STRIP_BYTES = 16*1024*1024
+
+# ------------------------------------------------------------------------------
+# Streaming encoders: rows are written as they are rendered
+# ------------------------------------------------------------------------------
+class PngWriter:
+    """RGBA PNG written strip by strip with one zlib stream."""
+    IDAT_BYTES = 256*1024
+
+    def __init__(self, f, width, height, dpi=None, level=6):
+        self.f = f
+        self.width = width
+        self.compressor = zlib.compressobj(level)
+        self.pending = []
+        self.pending_bytes = 0
+        f.write(b"\x89PNG\r\n\x1a\n")
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            ppm = round(dpi / 0.0254)  # pixels per meter
+            self.chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def chunk(self, kind, data):
+        self.f.write(struct.pack(">I", len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def write_rows(self, data, rows):
+        """data holds rows rows of width*4 RGBA bytes."""
+        stride = self.width * 4
+        view = memoryview(data)
+        for row in range(rows):
+            self.add(self.compressor.compress(b"\x00"))  # filter type None
+            self.add(self.compressor.compress(view[row*stride:(row + 1)*stride]))
+
+    def add(self, compressed):
+        if compressed:
+            self.pending.append(compressed)
+            self.pending_bytes += len(compressed)
+            if self.pending_bytes >= self.IDAT_BYTES:
+                self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.chunk(b"IDAT", b"".join(self.pending))
+            self.pending = []
+            self.pending_bytes = 0
+
+    def close(self):
+        self.add(self.compressor.flush())
+        self.flush()
+        self.chunk(b"IEND", b"")
+
+
+class TiffWriter:
+    """RGBA TIFF with one deflate compressed strip per call of write_rows."""
+    SHORT, LONG, RATIONAL = 3, 4, 5
+
+    def __init__(self, f, width, height, rows_per_strip, dpi=None, level=6):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.rows_per_strip = rows_per_strip
+        self.dpi = dpi or SVG_DPI
+        self.level = level
+        self.offsets = []
+        self.counts = []
+        f.write(b"II*\x00\x00\x00\x00\x00")  # IFD offset written by close()
+
+    def write_rows(self, data, rows):
+        strip = zlib.compress(bytes(data[:rows * self.width * 4]), self.level)
+        self.offsets.append(self.f.tell())
+        self.counts.append(len(strip))
+        self.f.write(strip)
+
+    def write_array(self, fmt, values):
+        """Writes values that do not fit in an IFD entry; returns their offset."""
+        if self.f.tell() % 2:
+            self.f.write(b"\x00")  # offsets must be even
+        offset = self.f.tell()
+        self.f.write(struct.pack("<" + fmt * len(values), *values))
+        return offset
+
+    def close(self):
+        tags = [
+            (256, self.LONG, [self.width]),
+            (257, self.LONG, [self.height]),
+            (258, self.SHORT, [8, 8, 8, 8]),
+            (259, self.SHORT, [8]),              # Adobe deflate
+            (262, self.SHORT, [2]),              # RGB
+            (273, self.LONG, self.offsets),
+            (277, self.SHORT, [4]),
+            (278, self.LONG, [self.rows_per_strip]),
+            (279, self.LONG, self.counts),
+            (282, self.RATIONAL, [round(self.dpi * 1000), 1000]),
+            (283, self.RATIONAL, [round(self.dpi * 1000), 1000]),
+            (284, self.SHORT, [1]),              # chunky
+            (296, self.SHORT, [2]),              # inch
+            (338, self.SHORT, [2])               # unassociated alpha
+        ]
+        entries = []
+        for tag, kind, values in tags:
+            fmt = {self.SHORT: "H", self.LONG: "I", self.RATIONAL: "I"}[kind]
+            count = len(values) // 2 if kind == self.RATIONAL else len(values)
+            packed = struct.pack("<" + fmt * len(values), *values)
+            if len(packed) <= 4:
+                entries.append(struct.pack("<HHI", tag, kind, count) + packed.ljust(4, b"\x00"))
+            else:
+                offset = self.write_array(fmt, values)
+                entries.append(struct.pack("<HHII", tag, kind, count, offset))
+
+        if self.f.tell() % 2:
+            self.f.write(b"\x00")
+        ifd = self.f.tell()
+        self.f.write(struct.pack("<H", len(entries)) + b"".join(entries) + struct.pack("<I", 0))
+        self.f.seek(4)
+        self.f.write(struct.pack("<I", ifd))
+
+# ------------------------------------------------------------------------------
+# Worker thread
+# ------------------------------------------------------------------------------
+class ImageExportThread(QThread):
+    """
+    Renders an SVG to PNG or TIFF at dpi in strips of rows, so the memory
+    used does not depend on the height of the image. A cancelled or failed
+    export removes the partial file.
+    """
+    progress = pyqtSignal(int)
+    done = pyqtSignal(str, str)  # (path, error message)
+
+    def __init__(self, svg_data, path, dpi=SVG_DPI, strip_bytes=STRIP_BYTES):
+        super().__init__()
+        self.svg_data = svg_data
+        self.path = path
+        self.dpi = dpi
+        self.strip_bytes = strip_bytes
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            self.export()
+        except (OSError, ValueError, struct.error) as e:
+            self.remove()
+            self.done.emit(self.path, str(e))
+            return
+        if self.cancelled:
+            self.remove()
+            self.done.emit(self.path, "cancelled")
+            return
+        self.done.emit(self.path, "")
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def export(self):
+        from PyQt5.QtSvg import QSvgRenderer
+        renderer = QSvgRenderer(QByteArray(self.svg_data))
+        if not renderer.isValid():
+            raise ValueError("invalid SVG")
+        size = renderer.defaultSize()
+        scale = self.dpi / SVG_DPI
+        width = max(1, round(size.width() * scale))
+        height = max(1, round(size.height() * scale))
+        rows = max(1, min(height, self.strip_bytes // (width * 4)))
+
+        with open(self.path, "wb") as f:
+            if self.path.lower().endswith((".tif", ".tiff")):
+                writer = TiffWriter(f, width, height, rows, dpi=self.dpi)
+            else:
+                writer = PngWriter(f, width, height, dpi=self.dpi)
+
+            for y in range(0, height, rows):
+                if self.cancelled:
+                    return
+                strip_rows = min(rows, height - y)
+                image = QImage(width, strip_rows, QImage.Format_ARGB32_Premultiplied)
+                image.fill(Qt.transparent)
+                painter = QPainter(image)
+                renderer.render(painter, QRectF(0, -y, width, height))
+                painter.end()
+
+                image = image.convertToFormat(QImage.Format_RGBA8888)
+                bits = image.constBits()
+                bits.setsize(image.sizeInBytes())
+                writer.write_rows(bits, strip_rows)
+                self.progress.emit(min(99, (y + strip_rows) * 100 // height))
+            writer.close()
+        self.progress.emit(100)
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+import os
+import csv
+import math
+import json
+import time
+import hashlib
+from collections import deque
+
+# Timed stages of one compilation, in the order they happen
+STAGES = ("cache_s", "layout_s", "svg_parse_s", "raster_s", "scene_s", "total_s")
+
+# Columns of the exported records
+FIELDS = ("time", "graph", "source_bytes", "engine", "version", "from_cache") + STAGES + ("phases",)
+
+
+def graph_id(source):
+    """Short content hash, so the same graph can be compared across versions."""
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+class MetricsHistory:
+    """
+    Rolling history of the timings of the last max_records compilations.
+    A record is a dict with the keys of FIELDS; stages that did not run are
+    missing. The history is kept in a JSON file between sessions.
+    """
+    def __init__(self, path=None, max_records=500):
+        self.path = path
+        self.records = deque(maxlen=max_records)
+        if path is not None:
+            self.load()
+
+    def add(self, record):
+        record.setdefault("time", time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self.records.append(record)
+        return record
+
+    def clear(self):
+        self.records.clear()
+
+    def stats(self, stage):
+        """(last, p50, p95) of a stage, or None if it was never timed."""
+        values = [r[stage] for r in self.records if r.get(stage) is not None]
+        if not values:
+            return None
+        return values[-1], percentile(values, 0.5), percentile(values, 0.95)
+
+    # --------------------------------------------------------------------------
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.records.extend(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.export_json(self.path)
+
+    def export_json(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self.records), f, indent=1)
+        os.replace(tmp_path, path)
+
+    def export_csv(self, path):
+        """One row per compilation; the phases are written as phase=seconds pairs."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for record in self.records:
+                row = dict(record)
+                row["phases"] = " ".join(f"{phase}={seconds:.4f}" for phase, seconds in row.get("phases") or [])
+                writer.writerow(row)
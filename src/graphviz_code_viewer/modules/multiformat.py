@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from graphviz_code_viewer.modules.compiler import GraphvizProcess, GraphvizError
+from graphviz_code_viewer.modules.components import ComponentPipeline
+
+
+def layout_process(source, engine="dot", fmt="svg", split_components=False, jobs=0, timeout=None, memory_limit=None):
+    """GraphvizProcess or ComponentPipeline that renders source to fmt."""
+    if split_components:
+        return ComponentPipeline(source, engine=engine, fmt=fmt, jobs=jobs, timeout=timeout, memory_limit=memory_limit)
+    return GraphvizProcess(source, engine=engine, fmt=fmt, timeout=timeout, memory_limit=memory_limit)
+
+
+class MultiFormatRender:
+    """
+    Renders source to several formats with a single layout: the graph is laid
+    out once to -Tdot (node and edge positions), and each format is rendered
+    from it with `neato -n2` in parallel, which does not lay out again.
+    It has the run()/kill() interface of GraphvizProcess; run() returns
+    {fmt: bytes}.
+    """
+    def __init__(self, source, formats, engine="dot", split_components=False, jobs=0,
+                 timeout=None, memory_limit=None):
+        self.source = source
+        self.formats = list(dict.fromkeys(formats))
+        self.engine = engine
+        self.split_components = split_components
+        self.jobs = jobs
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+
+        self._lock = threading.Lock()
+        self._processes = []
+        self.killed = False
+
+    def _run(self, process):
+        with self._lock:
+            if self.killed:
+                raise GraphvizError("Graphviz process cancelled")
+            self._processes.append(process)
+        return process.run()
+
+    def run(self):
+        """Returns {fmt: output bytes} or raises GraphvizError."""
+        def layout(fmt):
+            return layout_process(self.source, self.engine, fmt, self.split_components, self.jobs,
+                                  self.timeout, self.memory_limit)
+
+        # A single format gains nothing from the positioned graph
+        if len(self.formats) == 1:
+            fmt = self.formats[0]
+            return {fmt: self._run(layout(fmt))}
+
+        positioned = self._run(layout("dot"))
+        source = positioned.decode("utf-8", errors="replace")
+
+        def render(fmt):
+            if fmt == "dot":
+                return positioned
+            return self._run(GraphvizProcess(source, engine="neato", fmt=fmt, extra_args=["-n2"],
+                                             timeout=self.timeout, memory_limit=self.memory_limit))
+
+        with ThreadPoolExecutor(max_workers=len(self.formats)) as pool:
+            return dict(zip(self.formats, pool.map(render, self.formats)))
+
+    def kill(self):
+        """Kills every running process."""
+        with self._lock:
+            self.killed = True
+            processes = list(self._processes)
+        for process in processes:
+            process.kill()
+
+
+def render_formats(source, formats, engine="dot", split_components=False, jobs=0, timeout=None, memory_limit=None):
+    """{fmt: bytes} of source in each format, with one layout."""
+    return MultiFormatRender(source, formats, engine=engine, split_components=split_components, jobs=jobs,
+                             timeout=timeout, memory_limit=memory_limit).run()
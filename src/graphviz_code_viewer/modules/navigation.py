@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+import bisect
+
+from graphviz_code_viewer.modules.dot_parser import NODE, EDGE, OPEN
+from graphviz_code_viewer.modules.spatial import element_key
+
+
+class SourceMap:
+    """
+    Links the elements of the drawing (keys of spatial.element_key) with the
+    statements of the DOT source they come from, in both directions.
+    A node is defined by its first node statement, or else its first mention.
+    """
+    def __init__(self, items, model):
+        self.items = items
+        self.model = model
+
+        self.nodes = {}
+        for i in range(len(items)):
+            if items.kinds[i] == NODE:
+                self.nodes.setdefault(items.payloads[i][0], (items.starts[i], items.ends[i]))
+
+        names = model.node_names
+        counts = {}
+        self.edge_keys = [element_key("edge", (names[model.edge_tail[j]], names[model.edge_head[j]]), counts)
+                          for j in range(model.edge_count())]
+        self.edges = {key: j for j, key in enumerate(self.edge_keys)}
+
+    def span(self, key):
+        """(start, end) of the statement of an element, or None."""
+        model = self.model
+        if key[0] == "node":
+            if key[1] in self.nodes:
+                return self.nodes[key[1]]
+            index = model.node_index.get(key[1])
+            if index is not None:
+                return model.node_start[index], model.node_end[index]
+        elif key[0] == "edge":
+            j = self.edges.get(key)
+            if j is not None:
+                return model.edge_start[j], model.edge_end[j]
+        elif key[0] == "cluster":
+            for sub in model.subgraphs:
+                if sub.name == key[1]:
+                    return sub.start, sub.body_start
+        return None
+
+    def keys_at(self, offset):
+        """Keys of the elements of the statement at offset."""
+        items = self.items
+        i = bisect.bisect_right(items.starts, offset) - 1
+        if i < 0 or offset > items.ends[i]:
+            return []
+        kind, start = items.kinds[i], items.starts[i]
+        if kind == NODE:
+            return [("node", items.payloads[i][0])]
+        if kind == EDGE:
+            first = bisect.bisect_left(self.model.edge_start, start)
+            last = bisect.bisect_right(self.model.edge_start, start)
+            return self.edge_keys[first:last]
+        if kind == OPEN:
+            for sub in self.model.subgraphs:
+                if sub.start == start and sub.name:
+                    return [("cluster", sub.name)]
+        return []
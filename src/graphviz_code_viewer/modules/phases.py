@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+import time
+
+# ------------------------------------------------------------------------------
+# Layout phases of dot
+# ------------------------------------------------------------------------------
+
+# Phases of a dot layout, in order, with the progress shown when each one starts
+PHASES = ("parse", "rank", "mincross", "position", "splines", "render")
+PHASE_PROGRESS = {"parse": 5, "rank": 15, "mincross": 30, "position": 60, "splines": 75, "render": 90}
+
+# dot runs up to three mincross passes
+MINCROSS_PASSES = 3
+
+
+class PhaseTracker:
+    """
+    Follows the layout phases of `dot -v` from its stderr lines and times them.
+    dot prints a line when rank and position start (network simplex), during
+    mincross and when the splines are routed; lines of other engines are ignored.
+    callback(phase, progress) is called from the thread that calls feed().
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.phase = "parse"
+        self.started = time.monotonic()
+        self.times = {}  # phase -> seconds
+
+    def enter(self, phase, progress=None):
+        now = time.monotonic()
+        if phase != self.phase:
+            self.times[self.phase] = self.times.get(self.phase, 0.0) + now - self.started
+            self.phase = phase
+            self.started = now
+        if self.callback is not None:
+            self.callback(phase, PHASE_PROGRESS[phase] if progress is None else progress)
+
+    def feed(self, line):
+        phase = self.phase
+        if line.startswith("network simplex"):
+            if phase == "parse":
+                self.enter("rank")
+            elif phase == "mincross":
+                self.enter("position")
+            elif phase == "position" and "iterations" in line:
+                self.enter("splines")  # x coordinates are done
+        elif line.startswith("mincross"):
+            if phase in ("parse", "rank", "mincross"):
+                self.enter("mincross", self.mincross_progress(line))
+        elif line.startswith("routesplines"):
+            if phase in ("position", "splines"):
+                self.enter("render")
+
+    @staticmethod
+    def mincross_progress(line):
+        """Progress inside mincross from 'mincross: pass N iter ...'."""
+        start = PHASE_PROGRESS["mincross"]
+        span = PHASE_PROGRESS["position"] - start
+        words = line.split()
+        if len(words) > 2 and words[1] == "pass" and words[2].isdigit():
+            return start + span * min(int(words[2]), MINCROSS_PASSES - 1) // MINCROSS_PASSES
+        return start + span * (MINCROSS_PASSES - 1) // MINCROSS_PASSES  # the summary line
+
+    def finish(self):
+        """Closes the current phase; returns [(phase, seconds)] in order."""
+        self.times[self.phase] = self.times.get(self.phase, 0.0) + time.monotonic() - self.started
+        self.started = time.monotonic()
+        return [(phase, self.times[phase]) for phase in PHASES if phase in self.times]
+
+
+def format_times(times):
+    """'rank 0.12 s, mincross 3.40 s, ...'"""
+    return ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in times)
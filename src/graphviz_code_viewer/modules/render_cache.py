@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+import os
+import hashlib
+import subprocess
+import threading
+from collections import OrderedDict
+
+import graphviz_code_viewer.about as about
+
+# Default directory of the on-disk tier
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", about.__package__)
+
+_GRAPHVIZ_VERSIONS = {}
+
+def graphviz_version(engine="dot"):
+    """
+    Returns the version line printed by `<engine> -V`.
+    The value is computed once per process and engine.
+    """
+    if engine not in _GRAPHVIZ_VERSIONS:
+        try:
+            result = subprocess.run(
+                [engine, "-V"],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            version = (result.stderr or result.stdout).strip()
+        except (OSError, subprocess.SubprocessError):
+            version = "unknown"
+        _GRAPHVIZ_VERSIONS[engine] = version
+    return _GRAPHVIZ_VERSIONS[engine]
+
+def make_key(source, engine="dot", fmt="svg", version=None):
+    """
+    Content address of one render: DOT source, layout engine,
+    output format and Graphviz version.
+    """
+    if version is None:
+        version = graphviz_version(engine)
+
+    h = hashlib.sha256()
+    for part in (version, engine, fmt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    h.update(source.encode("utf-8"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    Two tier cache of rendered outputs.
+    The memory tier is a LRU bounded in bytes, the disk tier keeps one file
+    per key and evicts the least recently used files above max_disk_bytes.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_memory_bytes=64*1024*1024, max_disk_bytes=512*1024*1024):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # computed on first disk access
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --------------------------------------------------------------------------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def _scan_disk(self):
+        if self._disk_bytes is not None:
+            return
+        self._disk_bytes = 0
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".bin"):
+                    self._disk_bytes += entry.stat().st_size
+
+    def _memory_put(self, key, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _disk_evict(self):
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".bin"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+        for _, size, path in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                self._disk_bytes -= size
+            except OSError:
+                pass
+
+    # --------------------------------------------------------------------------
+    def get(self, key):
+        """Returns the cached bytes of key or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)  # mtime is the LRU clock of the disk tier
+            except OSError:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._memory_put(key, data)
+            return data
+
+    def put(self, key, data):
+        """Stores data in both tiers."""
+        with self._lock:
+            self._memory_put(key, data)
+
+            if self.max_disk_bytes <= 0 or len(data) > self.max_disk_bytes:
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._scan_disk()
+                path = self._path(key)
+                if os.path.exists(path):
+                    self._disk_bytes -= os.path.getsize(path)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._disk_bytes += len(data)
+                self._disk_evict()
+            except OSError as e:
+                print(f"Error writing the render cache: {e}")
+
+    def clear(self):
+        """Removes all entries of both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".bin") or entry.name.endswith(".tmp"):
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+            self._disk_bytes = 0
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and the size of each tier."""
+        with self._lock:
+            self._scan_disk()
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes
+            }
@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+from graphviz_code_viewer.modules.dot_parser import (
+    parse_items, tokenize, EDGE, OPEN, CLOSE
+)
+
+# Attributes that change how the graph is drawn but not where things are
+STYLE_ATTRS = frozenset((
+    "color", "fillcolor", "fontcolor", "pencolor", "bgcolor", "labelfontcolor",
+    "penwidth", "style", "gradientangle", "colorscheme",
+    "tooltip", "edgetooltip", "headtooltip", "tailtooltip", "labeltooltip",
+    "URL", "href", "edgeURL", "edgehref", "headURL", "headhref", "tailURL", "tailhref",
+    "labelURL", "labelhref", "target", "edgetarget", "headtarget", "tailtarget",
+    "labeltarget", "id", "class", "comment"
+))
+
+
+def skeleton(text):
+    """
+    Tokens of text without attribute lists and style assignments (ID = ID);
+    two sources with the same skeleton have the same nodes, edges, ports
+    and subgraphs. None if text has a bad token.
+    """
+    tokens = []
+    depth = 0
+    skip_value = False
+    for kind, value in tokenize(text):
+        if kind == "bad":
+            return None
+        if kind == "punct" and value == "[":
+            depth += 1
+        elif kind == "punct" and value == "]":
+            depth -= 1
+        elif depth:
+            continue
+        elif skip_value:
+            skip_value = False
+        elif kind == "punct" and value == "=" and tokens and tokens[-1][0] == "id" and tokens[-1][1] in STYLE_ATTRS:
+            tokens.pop()
+            skip_value = True
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+def split_outputs(output):
+    """Splits the output of `-Tsvg -Tdot` into the SVG and the positioned DOT text."""
+    end = output.find(b"</svg>")
+    if end == -1:
+        return output, None
+    end += len(b"</svg>")
+    return output[:end] + b"\n", output[end:].decode("utf-8", errors="replace").lstrip()
+
+
+class LayoutBase:
+    """Positioned graph (-Tdot output) of a compiled source, with its skeleton and model."""
+    __slots__ = ("skeleton", "model", "positioned", "engine")
+
+    def __init__(self, skeleton, model, positioned, engine):
+        self.skeleton = skeleton
+        self.model = model
+        self.positioned = positioned
+        self.engine = engine
+
+# ------------------------------------------------------------------------------
+# Style-only differences
+# ------------------------------------------------------------------------------
+def changed_attrs(old, new):
+    """{key: value} that turn old into new, or None if a key is removed or is not a style."""
+    if old == new:
+        return {}
+    old = dict(old or ())
+    new = dict(new or ())
+    if not old.keys() <= new.keys():
+        return None
+    changes = {key: value for key, value in new.items() if old.get(key) != value}
+    if not changes.keys() <= STYLE_ATTRS:
+        return None
+    return changes
+
+
+def owner_name(model, offset):
+    """Name of the innermost subgraph around offset; "" for the root graph, None if anonymous."""
+    owner = ""
+    for sub in model.subgraphs:
+        if sub.start <= offset < sub.end:
+            owner = sub.name
+    return owner
+
+
+def style_diff(base, model, text):
+    """
+    Differences between the source of base and text (with its model) when
+    they only touch STYLE_ATTRS of nodes, edges, the root graph or clusters.
+    Returns (nodes, edges, graphs) as {node name: changes}, {edge index:
+    changes} and {subgraph name or "": changes}, or None.
+    """
+    old = base.model
+    if model.errors or model.warnings or model.strict or "concentrate" in model.attrs:
+        return None
+    if len(old.attr_stmts) != len(model.attr_stmts) or skeleton(text) != base.skeleton:
+        return None
+
+    nodes = {}
+    for i, (a, b) in enumerate(zip(old.node_attrs, model.node_attrs)):
+        changes = changed_attrs(a, b)
+        if changes is None:
+            return None
+        if changes:
+            nodes[model.node_names[i]] = changes
+
+    edges = {}
+    for j, (a, b) in enumerate(zip(old.edge_attrs, model.edge_attrs)):
+        changes = changed_attrs(a, b)
+        if changes is None:
+            return None
+        if changes:
+            edges[j] = changes
+
+    graphs = {}
+    for (kind, a, _, _), (_, b, start, _) in zip(old.attr_stmts, model.attr_stmts):
+        changes = changed_attrs(a, b)
+        if changes is None or (changes and kind != "graph"):
+            return None  # node and edge defaults reach elements we cannot see here
+        if changes:
+            owner = owner_name(model, start)
+            if owner is None:
+                return None
+            graphs.setdefault(owner, {}).update(changes)
+    return nodes, edges, graphs
+
+
+def quote(value):
+    return "\"" + value.replace("\"", "\\\"") + "\""
+
+
+def attr_text(changes):
+    return ", ".join(f"{quote(key)}={quote(value)}" for key, value in changes.items())
+
+
+def apply_style(base, model, diff):
+    """
+    Positioned DOT text of base with the changes of diff, or None if an edge
+    of the source cannot be found in it.
+    """
+    nodes, edges, graphs = diff
+    text = base.positioned
+    items = parse_items(text)
+
+    # Statements of the positioned graph: edges by (tail, head, n-th), subgraph ends
+    edge_spans = {}
+    closes = {}
+    stack = []
+    for i in range(len(items)):
+        kind, payload = items.kinds[i], items.payloads[i]
+        if kind == EDGE:
+            endpoints = payload[0]
+            if len(endpoints) != 2 or not all(isinstance(e, str) for e in endpoints):
+                return None
+            n = 0
+            while (endpoints[0], endpoints[1], n) in edge_spans:
+                n += 1
+            edge_spans[(endpoints[0], endpoints[1], n)] = (items.starts[i], items.ends[i])
+        elif kind == OPEN:
+            stack.append(payload)
+        elif kind == CLOSE:
+            closes[stack.pop() if stack else ""] = items.starts[i]
+    if "" not in closes:
+        return None
+
+    inserts = []  # (position, text)
+    seen = {}
+    for j in range(model.edge_count()):
+        key = (model.node_names[model.edge_tail[j]], model.node_names[model.edge_head[j]])
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        if j not in edges:
+            continue
+        span = edge_spans.get(key + (n,))
+        if span is None:
+            return None
+        bracket = text.rfind("]", span[0], span[1])
+        if bracket == -1:
+            inserts.append((span[1], " [" + attr_text(edges[j]) + "]"))
+        else:
+            inserts.append((bracket, ", " + attr_text(edges[j])))
+
+    # Nodes and graphs: later statements override the attributes
+    for owner, changes in graphs.items():
+        if owner not in closes:
+            return None
+        inserts.append((closes[owner], "".join(f"{quote(k)}={quote(v)};\n" for k, v in changes.items())))
+    for name, changes in nodes.items():
+        inserts.append((closes[""], f"{quote(name)} [{attr_text(changes)}];\n"))
+
+    parts = []
+    last = len(text)
+    for position, insert in sorted(inserts, key=lambda p: p[0], reverse=True):
+        parts.append(text[position:last])
+        parts.append(insert)
+        last = position
+    parts.append(text[:last])
+    return "".join(reversed(parts))
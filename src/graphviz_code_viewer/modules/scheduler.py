@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QThread
+
+
+class CompileScheduler(QObject):
+    """
+    Runs the CompileThreads of every document with at most max_jobs at a
+    time (0 uses the CPU count). Each owner (a document) has at most one
+    waiting job: a newer one replaces it in its place in the queue, so the
+    owners are served in turn and a document that compiles on every pause
+    in editing does not hold back the others.
+    """
+    def __init__(self, max_jobs=2, parent=None):
+        super().__init__(parent)
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.waiting = OrderedDict()  # owner -> thread not started yet
+        self.running = set()
+
+    def submit(self, owner, thread):
+        """Starts thread as soon as a slot is free; thread must emit finished at its end."""
+        self.waiting[owner] = thread  # a new owner goes to the end, a waiting one keeps its place
+        self.start_next()
+
+    def withdraw(self, owner):
+        """Drops the waiting job of owner; True if there was one."""
+        return self.waiting.pop(owner, None) is not None
+
+    def is_waiting(self, owner):
+        return owner in self.waiting
+
+    def queue_depth(self):
+        return len(self.waiting)
+
+    def start_next(self):
+        while self.waiting and len(self.running) < self.max_jobs:
+            _, thread = self.waiting.popitem(last=False)
+            thread.finished.connect(self.on_finished)
+            # The finished of QThread itself, which CompileThread hides, frees
+            # the slot even if run() ends without emitting its own
+            QThread.finished.__get__(thread, QThread).connect(self.on_finished)
+            self.running.add(thread)
+            thread.start()
+
+    def on_finished(self, *args):
+        thread = self.sender()
+        if thread not in self.running:  # already freed by the other signal
+            return
+        thread.wait()  # run() returns right after emitting
+        self.running.discard(thread)
+        self.start_next()
+
+    def shutdown(self):
+        """Kills the running jobs and drops the waiting ones."""
+        self.waiting.clear()
+        for thread in list(self.running):
+            thread.cancel()
+            thread.wait()
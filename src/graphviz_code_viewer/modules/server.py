@@ -0,0 +1,355 @@
+#!/usr/bin/python3
+import os
+import sys
+import stat
+import time
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlsplit, parse_qs
+
+import graphviz_code_viewer.about as about
+from graphviz_code_viewer.modules.compiler import ENGINES, GraphvizError, auto_engine, error_lines
+from graphviz_code_viewer.modules.render_cache import RenderCache, make_key, graphviz_version, CACHE_DIR
+from graphviz_code_viewer.modules.dot_parser import parse, line_number
+
+# Upper bounds (seconds) of the latency histograms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+METRIC_PREFIX = "graphviz_code_viewer_"
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus text format."""
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, description):
+        lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+def error_status(error):
+    """
+    HTTP status of a failed compilation: 400 for a DOT source that Graphviz
+    rejects, 504 for a timeout and 500 for any other failure (a crash, the
+    memory limit, a missing engine).
+    """
+    if isinstance(error, GraphvizError):
+        if error.timed_out:
+            return 504
+        if error.returncode is not None and error.returncode > 0 and error_lines(str(error)):
+            return 400
+    return 500
+
+
+class RenderService:
+    """
+    Renders DOT sources to SVG on a pool of jobs threads, each running a
+    CompileThread in place (its run(), as the benchmarks do), with the render
+    cache shared by every request. Identical requests that arrive while one
+    of them is being rendered wait for its result instead of starting
+    another layout. max_queue bounds the renders waiting for a thread
+    (0 for no limit).
+    """
+    def __init__(self, cache, jobs=0, timeout=None, memory_limit=None, check=True, max_queue=0):
+        self.cache = cache
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.check = check
+        self.max_queue = max_queue
+        self.pool = ThreadPoolExecutor(max_workers=self.jobs)
+
+        self.lock = threading.Lock()
+        self.inflight = {}  # key -> Future of the render
+        self.waiting = 0
+        self.running = 0
+        self.requests = {}  # HTTP status -> count
+        self.coalesced = 0
+        self.request_seconds = Histogram()
+        self.layout_seconds = Histogram()
+
+    def render(self, source, engine="dot", split_components=False):
+        """
+        Returns (status, body, how): the SVG with status 200, or an error
+        message; how is "cache", "layout" or "coalesced".
+        """
+        engine_key = engine + "/components" if split_components else engine
+        key = make_key(source, engine=engine_key, fmt="svg",
+                       version=graphviz_version("dot" if engine == "auto" else engine))
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                coalesced = True
+            elif self.max_queue and self.waiting >= self.max_queue:
+                return 503, b"Render queue is full\n", ""
+            else:
+                coalesced = False
+                self.waiting += 1
+                future = self.pool.submit(self.render_job, source, engine, split_components)
+                self.inflight[key] = future
+                future.add_done_callback(lambda _: self.forget(key))
+        status, body, how = future.result()
+        return status, body, "coalesced" if coalesced else how
+
+    def forget(self, key):
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    def render_job(self, source, engine, split_components):
+        """(status, body, how) of one render; an unexpected failure is a 500 with its message."""
+        with self.lock:
+            self.waiting -= 1
+            self.running += 1
+        try:
+            return self.layout(source, engine, split_components)
+        except Exception as e:
+            return 500, f"Render failed: {type(e).__name__}: {e}\n".encode("utf-8"), ""
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def layout(self, source, engine, split_components):
+        """Checks the source, then renders it with a CompileThread run in the calling thread."""
+        from graphviz_code_viewer.program import CompileThread
+        if self.check or engine == "auto":
+            model = parse(source)
+            if self.check and model.errors:  # reported without starting Graphviz
+                offset, message = model.errors[0]
+                return 400, f"Syntax error in line {line_number(source, offset)}: {message}\n".encode("utf-8"), ""
+            if engine == "auto":
+                engine = auto_engine(model.node_count(), model.edge_count())
+
+        result = {}
+        thread = CompileThread(source, cache=self.cache, engine=engine, split_components=split_components,
+                               timeout=self.timeout, memory_limit=self.memory_limit)
+        thread.finished.connect(lambda generation, data, error: result.update(data=data, error=error))
+        thread.run()
+        if "error" not in result:
+            raise RuntimeError("the compilation ended without a result")
+        if result["error"]:
+            return error_status(thread.error), result["error"].encode("utf-8"), ""
+        if thread.from_cache:
+            return 200, result["data"], "cache"
+        with self.lock:
+            self.layout_seconds.observe(thread.timings.get("layout_s", 0.0))
+        return 200, result["data"], "layout"
+
+    def record(self, status, seconds):
+        with self.lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.request_seconds.observe(seconds)
+
+    def metrics(self):
+        """Counters, gauges and histograms in the Prometheus text format."""
+        p = METRIC_PREFIX
+        stats = self.cache.stats()
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        with self.lock:
+            lines = [
+                f"# HELP {p}queue_depth Renders waiting for a worker thread",
+                f"# TYPE {p}queue_depth gauge",
+                f"{p}queue_depth {self.waiting}",
+                f"# HELP {p}renders_running Renders being laid out or read from the cache",
+                f"# TYPE {p}renders_running gauge",
+                f"{p}renders_running {self.running}",
+                f"# HELP {p}workers Size of the worker pool",
+                f"# TYPE {p}workers gauge",
+                f"{p}workers {self.jobs}",
+                f"# HELP {p}requests_total Render requests by HTTP status",
+                f"# TYPE {p}requests_total counter",
+            ]
+            for status, count in sorted(self.requests.items()):
+                lines.append(f'{p}requests_total{{status="{status}"}} {count}')
+            lines += [
+                f"# HELP {p}coalesced_requests_total Requests served by the render of an identical concurrent request",
+                f"# TYPE {p}coalesced_requests_total counter",
+                f"{p}coalesced_requests_total {self.coalesced}",
+                f"# HELP {p}cache_hits_total Render cache hits by tier",
+                f"# TYPE {p}cache_hits_total counter",
+                f'{p}cache_hits_total{{tier="memory"}} {stats["memory_hits"]}',
+                f'{p}cache_hits_total{{tier="disk"}} {stats["disk_hits"]}',
+                f"# HELP {p}cache_misses_total Render cache misses",
+                f"# TYPE {p}cache_misses_total counter",
+                f"{p}cache_misses_total {stats['misses']}",
+                f"# HELP {p}cache_hit_ratio Render cache hits over lookups",
+                f"# TYPE {p}cache_hit_ratio gauge",
+                f"{p}cache_hit_ratio {hits / lookups if lookups else 0.0:.6f}",
+            ]
+            lines += self.request_seconds.lines(p + "request_seconds", "Time from the request to the response")
+            lines += self.layout_seconds.lines(p + "layout_seconds", "Time spent in Graphviz by renders not found in the cache")
+        return "\n".join(lines) + "\n"
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+# ------------------------------------------------------------------------------
+# HTTP
+# ------------------------------------------------------------------------------
+class RenderHandler(BaseHTTPRequestHandler):
+    """
+    POST /render?engine=dot&components=1 with the DOT source as the body
+    returns the SVG; GET /metrics returns the metrics of the service.
+    """
+    server_version = about.__package__ + "/" + about.__version__
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def send_body(self, status, body, content_type="text/plain; charset=utf-8", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self.send_body(200, self.server.service.metrics().encode("utf-8"), "text/plain; version=0.0.4")
+        elif path == "/render":
+            self.send_body(405, b"Send the DOT source with POST\n", headers=[("Allow", "POST")])
+        else:
+            self.send_body(404, b"Not found\n")
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self.send_body(404, b"Not found\n")
+            return
+        query = parse_qs(url.query)
+        engine = query.get("engine", [self.server.engine])[0]
+        split_components = query.get("components", ["0"])[0] in ("1", "true", "yes")
+
+        # The status is recorded even if the render or the reply fails
+        status = 500
+        try:
+            length = self.headers.get("Content-Length")
+            if length is None or not length.isdigit():
+                status, body, how = 411, b"Content-Length is required\n", ""
+            elif int(length) > self.server.max_bytes:
+                status, body, how = 413, b"The DOT source is too large\n", ""
+            elif engine != "auto" and engine not in ENGINES:
+                status, body, how = 400, f"Unknown engine: {engine}\n".encode("utf-8"), ""
+            else:
+                source = self.rfile.read(int(length)).decode("utf-8", errors="replace")
+                try:
+                    status, body, how = self.server.service.render(source, engine, split_components)
+                except Exception as e:  # such as a render cancelled by the shutdown
+                    status, body, how = 500, f"Render failed: {type(e).__name__}: {e}\n".encode("utf-8"), ""
+
+            if status == 200:
+                self.send_body(status, body, "image/svg+xml", headers=[("X-Render", how)])
+            else:
+                self.send_body(status, body)
+        finally:
+            self.server.service.record(status, time.perf_counter() - t0)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=8765, socket_path="", engine="dot", max_bytes=64*1024*1024,
+                quiet=False):
+    """HTTP server of service on host:port, or on a Unix socket when socket_path is given."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            os.unlink(socket_path)  # left by a previous run
+        server = UnixHTTPServer(socket_path, RenderHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RenderHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.engine = engine
+    server.max_bytes = max_bytes
+    server.quiet = quiet
+    return server
+
+# ------------------------------------------------------------------------------
+# Command line
+# ------------------------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog=about.__program_name__ + " --serve",
+        description="Render DOT to SVG over HTTP on localhost or a Unix socket."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--socket", default="", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Graphviz processes at a time (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=256, help="Renders waiting for a worker before 503 replies (0 for no limit, default: 256)")
+    parser.add_argument("--engine", default="dot", help="Default layout engine, or auto for sfdp on large graphs (default: dot)")
+    parser.add_argument("--no-check", action="store_true", help="Do not check the syntax before running Graphviz")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per render (0 for no limit, default: 120)")
+    parser.add_argument("--memory-mb", type=int, default=0, help="Memory limit of each Graphviz process in MB (default: no limit)")
+    parser.add_argument("--max-mb", type=int, default=64, help="Largest DOT source accepted in MB (default: 64)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Disk tier of the render cache (default: the one of the window)")
+    parser.add_argument("--cache-memory-mb", type=int, default=64, help="Memory tier of the render cache in MB (default: 64)")
+    parser.add_argument("--cache-disk-mb", type=int, default=512, help="Disk tier of the render cache in MB (default: 512)")
+    parser.add_argument("--quiet", action="store_true", help="Do not log each request")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    signal.signal(signal.SIGINT, signal.default_int_handler)  # Ctrl+C closes the server
+    cache = RenderCache(cache_dir=args.cache_dir,
+                        max_memory_bytes=args.cache_memory_mb*1024*1024,
+                        max_disk_bytes=args.cache_disk_mb*1024*1024)
+    service = RenderService(cache, jobs=args.jobs, timeout=args.timeout or None,
+                            memory_limit=args.memory_mb*1024*1024 or None,
+                            check=not args.no_check, max_queue=args.max_queue)
+    try:
+        server = make_server(service, host=args.host, port=args.port, socket_path=args.socket, engine=args.engine,
+                             max_bytes=args.max_mb*1024*1024, quiet=args.quiet)
+    except OSError as e:  # address in use, or a --socket path that is not a socket
+        print(e, file=sys.stderr)
+        service.shutdown()
+        return 2
+    where = args.socket if args.socket else f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving on {where} ({service.jobs} jobs)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+import re
+import html
+import math
+
+# Elements of Graphviz SVG output: <g id="node1" class="node"><title>a</title>
+SVG_ELEMENT = re.compile(rb'<g id="([^"]*)" class="(node|edge|cluster)(?: [^"]*)?">\s*<title>([^<]*)</title>')
+
+# Order of the hits of a point: a node wins over the edges and clusters around it
+KIND_ORDER = {"node": 0, "edge": 1, "cluster": 2}
+
+
+def element_key(kind, name, counts):
+    """
+    Key of a drawn element, the same for the SVG and JSON outputs and the
+    DOT model: ("node", name), ("cluster", name) or ("edge", tail, head, n)
+    for the n-th edge between tail and head. counts holds the edges seen.
+    """
+    if kind == "edge":
+        n = counts.get(name, 0)
+        counts[name] = n + 1
+        return ("edge", name[0], name[1], n)
+    return (kind, name)
+
+
+def strip_port(end, nodes):
+    """Node name of an edge end written as name[:port[:compass]], or None."""
+    while end not in nodes:
+        if ":" not in end:
+            return None
+        end = end.rsplit(":", 1)[0]
+    return end
+
+
+def split_edge_title(title, nodes):
+    """(tail, head) of an SVG edge title such as a:p1->b, or None."""
+    for op in ("->", "--"):
+        i = title.find(op)
+        while i != -1:
+            tail = strip_port(title[:i], nodes)
+            head = strip_port(title[i + 2:], nodes)
+            if tail is not None and head is not None:
+                return tail, head
+            i = title.find(op, i + 1)
+    return None
+
+
+def svg_elements(data):
+    """[(element id, key)] of the nodes, edges and clusters of a Graphviz SVG."""
+    found = [(m.group(1).decode("utf-8", errors="replace"), m.group(2).decode(),
+              html.unescape(m.group(3).decode("utf-8", errors="replace")))
+             for m in SVG_ELEMENT.finditer(data)]
+    nodes = {title for _, kind, title in found if kind == "node"}
+    counts = {}
+    elements = []
+    for element_id, kind, title in found:
+        name = split_edge_title(title, nodes) if kind == "edge" else title
+        if name is not None:
+            elements.append((element_id, element_key(kind, name, counts)))
+    return elements
+
+# ------------------------------------------------------------------------------
+# Index
+# ------------------------------------------------------------------------------
+class GridIndex:
+    """
+    Uniform grid over the bounding boxes (QRectF) of the elements of a
+    drawing; a point query only tests the boxes of one cell. Boxes that
+    cover more than MAX_CELLS cells (long edges, clusters) are kept apart
+    and tested at each query.
+    """
+    MAX_CELLS = 64
+
+    def __init__(self, entries):
+        self.entries = list(entries)  # (key, rect)
+        self.rects = {}
+        for key, rect in self.entries:
+            self.rects.setdefault(key, rect)
+
+        width = max((rect.right() for _, rect in self.entries), default=1.0)
+        height = max((rect.bottom() for _, rect in self.entries), default=1.0)
+        self.cell = max(1.0, math.sqrt(width * height / max(1, len(self.entries))) * 2)
+        self.cells = {}
+        self.large = []
+        for i, (key, rect) in enumerate(self.entries):
+            c0, r0 = int(rect.left() // self.cell), int(rect.top() // self.cell)
+            c1, r1 = int(rect.right() // self.cell), int(rect.bottom() // self.cell)
+            if (c1 - c0 + 1) * (r1 - r0 + 1) > self.MAX_CELLS:
+                self.large.append(i)
+                continue
+            for column in range(c0, c1 + 1):
+                for row in range(r0, r1 + 1):
+                    self.cells.setdefault((column, row), []).append(i)
+
+    def at(self, x, y):
+        """Keys of the boxes that contain (x, y), nodes first, then the smallest."""
+        cell = self.cells.get((int(x // self.cell), int(y // self.cell)), [])
+        hits = []
+        for i in cell + self.large:
+            key, rect = self.entries[i]
+            if rect.left() <= x <= rect.right() and rect.top() <= y <= rect.bottom():
+                hits.append((KIND_ORDER[key[0]], rect.width() * rect.height(), key))
+        hits.sort(key=lambda hit: hit[:2])
+        return [key for _, _, key in hits]
+
+    def rect(self, key):
+        return self.rects.get(key)
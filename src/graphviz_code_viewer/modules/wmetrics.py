@@ -0,0 +1,78 @@
+from PyQt5.QtWidgets import (
+    QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QFileDialog, QHeaderView, QMessageBox
+)
+
+from graphviz_code_viewer.modules.metrics import STAGES
+
+# Key of the name of each stage in texts
+STAGE_NAMES = {
+    "cache_s": "metrics_cache",
+    "layout_s": "metrics_layout",
+    "svg_parse_s": "metrics_svg_parse",
+    "raster_s": "metrics_raster",
+    "scene_s": "metrics_scene",
+    "total_s": "metrics_total"
+}
+
+class MetricsWindow(QDialog):
+    """
+    Last, median and 95th percentile time of each stage of the compilations.
+    texts has the labels of the window (the metrics_* keys of CONFIG).
+    """
+    def __init__(self, history, texts, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.texts = texts
+        self.setWindowTitle(texts["action_metrics"])
+        self.setMinimumSize(420, 260)
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(len(STAGES), 3)
+        self.table.setHorizontalHeaderLabels([texts["metrics_last_ms"], texts["metrics_p50_ms"], texts["metrics_p95_ms"]])
+        self.table.setVerticalHeaderLabels([texts[STAGE_NAMES[stage]] for stage in STAGES])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+
+        buttons = QHBoxLayout()
+        for key, slot in (("metrics_export_json", self.export_json), ("metrics_export_csv", self.export_csv),
+                          ("metrics_clear", self.clear)):
+            button = QPushButton(texts[key])
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        for row, stage in enumerate(STAGES):
+            stats = self.history.stats(stage)
+            for column in range(3):
+                text = f"{stats[column]*1000:.1f}" if stats else "-"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.count_label.setText(f"{self.texts['metrics_compilations']} {len(self.history.records)}")
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, self.texts["metrics_export_title"], "metrics.json", "JSON (*.json)")
+        if path:
+            self.export(self.history.export_json, path)
+
+    def export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, self.texts["metrics_export_title"], "metrics.csv", "CSV (*.csv)")
+        if path:
+            self.export(self.history.export_csv, path)
+
+    def export(self, write, path):
+        try:
+            write(path)
+        except OSError as e:  # no permission, disk full, ...
+            QMessageBox.critical(self, self.texts["error"], self.texts["error_exporting_metrics"]+"\n"+path+"\n"+str(e))
+
+    def clear(self):
+        self.history.clear()
+        self.refresh()
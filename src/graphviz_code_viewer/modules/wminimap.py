@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QPixmap, QColor, QPen
+from PyQt5.QtCore import Qt, QRectF, pyqtSignal
+
+
+class Minimap(QWidget):
+    """
+    Thumbnail of the whole graph with the visible part outlined, shown over
+    a corner of a viewer. The thumbnail is scaled once per image, so moving
+    around costs no rendering. A click or drag emits jump with the point to
+    center, as fractions (0..1) of the width and height of the graph.
+    """
+    jump = pyqtSignal(float, float)
+
+    def __init__(self, parent, size=200, color="#ff8000"):
+        super().__init__(parent)
+        self.thumb_size = size  # not size, which would hide QWidget.size()
+        self.color = QColor(color)
+        self.pixmap = None
+        self.view = QRectF()  # visible part, in fractions of the graph
+        self.setCursor(Qt.PointingHandCursor)
+        self.hide()
+
+    def set_image(self, image):
+        """Thumbnail of a new image (QImage), or None to remove it."""
+        if image is None or image.isNull():
+            self.pixmap = None
+            self.hide()
+            return
+        self.pixmap = QPixmap.fromImage(image.scaled(self.thumb_size, self.thumb_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.resize(self.pixmap.width() + 2, self.pixmap.height() + 2)
+
+    def set_view(self, view):
+        """Outlines view; the minimap is only shown when the graph does not fit in it."""
+        self.view = view
+        cropped = view.left() > 0.001 or view.top() > 0.001 or view.right() < 0.999 or view.bottom() < 0.999
+        self.setVisible(self.pixmap is not None and cropped)
+        self.update()
+
+    def paintEvent(self, event):
+        if self.pixmap is None:
+            return
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        painter.drawPixmap(1, 1, self.pixmap)
+        painter.setPen(QPen(Qt.gray, 1))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        width, height = self.pixmap.width(), self.pixmap.height()
+        painter.setPen(QPen(self.color, 2))
+        painter.setBrush(QColor(self.color.red(), self.color.green(), self.color.blue(), 40))
+        painter.drawRect(QRectF(1 + self.view.x() * width, 1 + self.view.y() * height,
+                                self.view.width() * width, self.view.height() * height))
+        painter.end()
+
+    def jump_to(self, pos):
+        if self.pixmap is not None:
+            self.jump.emit(min(1.0, max(0.0, (pos.x() - 1) / self.pixmap.width())),
+                           min(1.0, max(0.0, (pos.y() - 1) / self.pixmap.height())))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.jump_to(event.pos())
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.jump_to(event.pos())
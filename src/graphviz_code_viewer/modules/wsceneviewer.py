@@ -0,0 +1,354 @@
+#!/usr/bin/python3
+import time
+
+from PyQt5.QtWidgets import (
+    QGraphicsView, QGraphicsScene, QGraphicsItem, QGraphicsPathItem, QStyleOptionGraphicsItem, QApplication
+)
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen, QPainterPath
+from PyQt5.QtCore import Qt, QRectF, QThread, pyqtSignal
+
+from graphviz_code_viewer.modules.xdot import build_objects, draw_object
+from graphviz_code_viewer.modules.spatial import GridIndex, element_key
+
+# Longest side of the image of the whole graph drawn instead of the items
+# when the graph is smaller than it on screen
+OVERVIEW_SIZE = 4096
+
+# ------------------------------------------------------------------------------
+# Worker thread that parses the JSON drawing
+# ------------------------------------------------------------------------------
+class SceneBuildThread(QThread):
+    """
+    Parses the -Tjson output into SceneObjects, then indexes them and paints
+    the overview image; all are delivered to the GUI thread, which creates
+    the items, at the end, so the Qt values of the objects (paths, pens and
+    fonts) are never used by both threads at once.
+    """
+    loaded = pyqtSignal(int, object, QRectF, float)  # (generation, objects, bounding box, parse seconds)
+    index_ready = pyqtSignal(int, object, object)    # (generation, keys of the objects, GridIndex)
+    overview_ready = pyqtSignal(int, QImage)
+    failed = pyqtSignal(int)
+
+    def __init__(self, generation, data, overview_size=OVERVIEW_SIZE):
+        super().__init__()
+        self.generation = generation
+        self.data = data
+        self.overview_size = overview_size
+        self.cancelled = False
+
+    def run(self):
+        t0 = time.perf_counter()
+        try:
+            objects, rect = build_objects(self.data)
+        except (ValueError, KeyError, IndexError, TypeError):
+            self.failed.emit(self.generation)
+            return
+        parse_s = time.perf_counter() - t0
+
+        counts = {}
+        keys = [element_key(obj.kind, obj.name, counts) if obj.kind != "graph" else None for obj in objects]
+        index = GridIndex((key, obj.bounds) for key, obj in zip(keys, objects) if key is not None)
+
+        scale = min(1.0, self.overview_size / max(1.0, rect.width(), rect.height()))
+        image = QImage(max(1, int(rect.width() * scale)), max(1, int(rect.height() * scale)),
+                       QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(scale, scale)
+        painter.translate(-rect.x(), -rect.y())
+        for obj in objects:
+            if self.cancelled:
+                painter.end()
+                return
+            draw_object(painter, obj, scale)
+        painter.end()
+        self.loaded.emit(self.generation, objects, rect, parse_s)
+        self.index_ready.emit(self.generation, keys, index)
+        self.overview_ready.emit(self.generation, image)
+
+# ------------------------------------------------------------------------------
+# Items
+# ------------------------------------------------------------------------------
+class SceneItem(QGraphicsItem):
+    """One graph, cluster, node or edge; only painted when it is in view."""
+    def __init__(self, obj, parent):
+        super().__init__(parent)
+        self.obj = obj
+        self.rect = QRectF(obj.bounds)
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        draw_object(painter, self.obj, QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()))
+
+
+class ItemLayer(QGraphicsItem):
+    """Parent of every item, so they are hidden at once for the overview."""
+    def __init__(self, rect):
+        super().__init__()
+        self.rect = rect
+        self.setFlag(QGraphicsItem.ItemHasNoContents)
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        pass
+
+# ------------------------------------------------------------------------------
+# Widget
+# ------------------------------------------------------------------------------
+class SceneViewer(QGraphicsView):
+    """
+    Graph viewer over a QGraphicsScene of the graph, clusters, nodes and
+    edges of the Graphviz JSON output. The BSP index of the scene limits
+    painting to the visible items; labels too small to read are dropped, and
+    when the whole graph fits in the overview image it is drawn instead.
+    It has the interface of SvgViewer: load_data(), has_image(), progress,
+    timings (here "scene_s": JSON parse plus scene build), element_clicked,
+    highlight(), release(), memory_bytes() and the minimap, which shows the
+    overview image.
+    """
+    progress = pyqtSignal(int)
+    timings = pyqtSignal(int, object)  # (generation, {"scene_s": ...})
+    element_clicked = pyqtSignal(object)
+
+    def __init__(self, overview_size=OVERVIEW_SIZE, error_message="Error loading the graph", highlight_color="#ff8000",
+                 minimap_size=200):
+        super().__init__()
+        self.overview_size = overview_size
+        self.error_message = error_message
+        self.setScene(QGraphicsScene(self))
+        self.scene().setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setOptimizationFlags(QGraphicsView.DontSavePainterState | QGraphicsView.DontAdjustForAntialiasing)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setBackgroundBrush(QColor(Qt.white))
+
+        self.generation = 0          # last loaded data
+        self.shown_generation = -1   # data on screen
+        self.objects = []
+        self.layer = None
+        self.overview = None
+        self.workers = set()
+        self.press_pos = None
+        self.data_bytes = 0
+
+        # Elements on screen, and the outline of the highlighted ones
+        self.index = None
+        self.by_key = {}
+        self.highlighted = []
+        self.highlight_item = None
+        self.highlight_color = QColor(highlight_color)
+
+        self.minimap = None  # created by make_minimap()
+        self.minimap_size = minimap_size
+        QApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def shutdown(self):
+        for worker in list(self.workers):
+            worker.cancelled = True
+            worker.wait()
+
+    def has_image(self):
+        return self.shown_generation >= 0
+
+    def load_data(self, data):
+        """Returns the generation of the data, as reported by timings."""
+        self.generation += 1
+        self.data_bytes = len(data)
+        for worker in self.workers:
+            worker.cancelled = True
+        worker = SceneBuildThread(self.generation, data, self.overview_size)
+        worker.loaded.connect(self.on_loaded)
+        worker.overview_ready.connect(self.on_overview_ready)
+        worker.index_ready.connect(self.on_index_ready)
+        worker.failed.connect(self.on_failed)
+        worker.finished.connect(lambda: self.workers.discard(worker))
+        self.workers.add(worker)
+        self.progress.emit(10)
+        worker.start()
+        return self.generation
+
+    def memory_bytes(self):
+        """Approximate memory of the graph: the overview, and the items as the size of the JSON."""
+        if not self.has_image():
+            return 0
+        return (self.overview.sizeInBytes() if self.overview is not None else 0) + self.data_bytes
+
+    def release(self):
+        """Frees the items and the overview; the viewer is empty until the next load_data()."""
+        self.generation += 1  # a graph still being built is dropped
+        for worker in self.workers:
+            worker.cancelled = True
+        self.scene().clear()
+        self.objects = []
+        self.layer = None
+        self.overview = None
+        self.index = None
+        self.by_key = {}
+        self.highlight_item = None
+        self.shown_generation = -1
+        self.data_bytes = 0
+        if self.minimap is not None:
+            self.minimap.set_image(None)
+
+    def on_loaded(self, generation, objects, rect, parse_s):
+        if generation != self.generation:
+            return
+        t0 = time.perf_counter()
+        self.progress.emit(50)
+        scene = self.scene()
+        scene.clear()
+        self.layer = ItemLayer(rect)
+        for z, obj in enumerate(objects):
+            item = SceneItem(obj, self.layer)
+            item.setZValue(z)  # drawing order of Graphviz
+        scene.addItem(self.layer)
+        scene.setSceneRect(rect)
+
+        self.objects = objects
+        self.overview = None
+        self.index = None
+        self.by_key = {}
+        self.highlight_item = None  # deleted by clear()
+        self.shown_generation = generation
+        self.resetTransform()
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().minimum())
+        self.verticalScrollBar().setValue(self.verticalScrollBar().minimum())
+        if self.minimap is not None:
+            self.minimap.set_image(None)  # until the overview is ready
+        self.progress.emit(0)
+        self.timings.emit(generation, {"scene_s": parse_s + time.perf_counter() - t0})
+
+    def on_overview_ready(self, generation, image):
+        if generation != self.shown_generation:
+            return
+        self.overview = image
+        if self.make_minimap() is not None:
+            self.minimap.set_image(image)
+        self.update_layer()
+
+    def on_index_ready(self, generation, keys, index):
+        if generation != self.shown_generation:
+            return
+        self.index = index
+        self.by_key = {key: obj for key, obj in zip(keys, self.objects) if key is not None}
+        self.highlight(self.highlighted)
+
+    def highlight(self, keys):
+        """Outlines the elements with these keys and scrolls the first one into view."""
+        self.highlighted = list(keys)
+        if self.highlight_item is not None:
+            self.scene().removeItem(self.highlight_item)
+            self.highlight_item = None
+        objects = [self.by_key[key] for key in self.highlighted if key in self.by_key]
+        if not objects:
+            return
+        path = QPainterPath()
+        for obj in objects:
+            for _, _, shape in obj.shapes:
+                path.addPath(shape)
+        pen = QPen(self.highlight_color, 3)
+        pen.setCosmetic(True)  # the same width at any zoom
+        self.highlight_item = QGraphicsPathItem(path)
+        self.highlight_item.setPen(pen)
+        self.highlight_item.setZValue(len(self.objects))  # above the items, outside the hidden layer
+        self.scene().addItem(self.highlight_item)
+        self.ensureVisible(objects[0].bounds)
+
+    def element_at(self, pos):
+        """Key of the element under a viewport position, or None."""
+        if self.index is None:
+            return None
+        point = self.mapToScene(pos)
+        keys = self.index.at(point.x(), point.y())
+        return keys[0] if keys else None
+
+    def on_failed(self, generation):
+        if generation != self.generation:  # a newer load is under way
+            return
+        print(self.error_message)
+        self.progress.emit(0)
+
+    # --------------------------------------------------------------------------
+    def zoom(self):
+        return self.transform().m11()
+
+    def overview_shown(self):
+        """True when the overview has more pixels than the graph on screen."""
+        if self.overview is None:
+            return False
+        rect = self.sceneRect()
+        return self.zoom() * max(rect.width(), rect.height()) < max(self.overview.width(), self.overview.height())
+
+    def update_layer(self):
+        if self.layer is not None:
+            self.layer.setVisible(not self.overview_shown())
+        self.update_minimap()
+        self.viewport().update()
+
+    def make_minimap(self):
+        """Minimap of the viewer (or None), created with the first image."""
+        if self.minimap is None and self.minimap_size:
+            from graphviz_code_viewer.modules.wminimap import Minimap
+            self.minimap = Minimap(self, self.minimap_size, self.highlight_color)
+            self.minimap.jump.connect(self.center_on)
+        return self.minimap
+
+    def update_minimap(self):
+        """Outlines the visible part of the graph in the minimap, at the bottom right corner."""
+        rect = self.sceneRect()
+        if self.minimap is None or not self.has_image() or rect.isEmpty():
+            return
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        view = QRectF((visible.x() - rect.x()) / rect.width(), (visible.y() - rect.y()) / rect.height(),
+                      visible.width() / rect.width(), visible.height() / rect.height())
+        self.minimap.set_view(view.intersected(QRectF(0, 0, 1, 1)))
+        corner = self.viewport().geometry().bottomRight()
+        self.minimap.move(corner.x() - self.minimap.width() - 8, corner.y() - self.minimap.height() - 8)
+        self.minimap.raise_()
+
+    def center_on(self, fx, fy):
+        """Centers the view on the point at fractions (fx, fy) of the graph."""
+        rect = self.sceneRect()
+        self.centerOn(rect.x() + fx * rect.width(), rect.y() + fy * rect.height())
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.update_minimap()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_minimap()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.overview_shown():
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(self.sceneRect(), self.overview, QRectF(self.overview.rect()))
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        if event.button() == Qt.LeftButton:
+            self.press_pos = event.pos()
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        # A click, not the end of a drag, selects an element
+        if self.press_pos is not None and (event.pos() - self.press_pos).manhattanLength() < QApplication.startDragDistance():
+            key = self.element_at(event.pos())
+            if key is not None:
+                self.element_clicked.emit(key)
+        self.press_pos = None
+
+    def wheelEvent(self, event):
+        if not self.has_image():
+            return
+        factor = 1.1 if event.angleDelta().y() > 0 else 0.9
+        self.scale(factor, factor)
+        self.update_layer()
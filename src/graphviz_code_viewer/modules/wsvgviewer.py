@@ -0,0 +1,494 @@
+#!/usr/bin/python3
+import math
+import time
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QByteArray, QRect, QRectF, QThread, pyqtSignal
+
+from graphviz_code_viewer.modules.spatial import GridIndex, svg_elements
+
+# Longest side of the low resolution preview drawn under missing tiles
+PREVIEW_SIZE = 1024
+
+# ------------------------------------------------------------------------------
+# Tile cache
+# ------------------------------------------------------------------------------
+class TileCache:
+    """LRU of rendered tiles keyed by (zoom, column, row)."""
+    def __init__(self, max_tiles=256):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+
+    def get(self, key):
+        image = self.tiles.get(key)
+        if image is not None:
+            self.tiles.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        self.tiles[key] = image
+        self.tiles.move_to_end(key)
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+    def clear(self):
+        self.tiles.clear()
+
+    def size_bytes(self):
+        return sum(image.sizeInBytes() for image in self.tiles.values())
+
+# ------------------------------------------------------------------------------
+# Worker thread that parses and rasterizes the SVG
+# ------------------------------------------------------------------------------
+def tile_range(width, height, x0, y0, rect_width, rect_height, tile_size):
+    """Columns and rows of the tiles that cover a rectangle of the viewport."""
+    col_first = max(0, -x0 // tile_size)
+    col_last = min(math.ceil(width / tile_size) - 1, (rect_width - 1 - x0) // tile_size)
+    row_first = max(0, -y0 // tile_size)
+    row_last = min(math.ceil(height / tile_size) - 1, (rect_height - 1 - y0) // tile_size)
+    return [(column, row) for row in range(row_first, row_last + 1)
+                          for column in range(col_first, col_last + 1)]
+
+class SvgRenderThread(QThread):
+    """
+    Owns the QSvgRenderer. Parsing and rasterization happen here and the
+    results are delivered to the GUI thread as QImage objects.
+    """
+    loaded = pyqtSignal(int, int, int, object, object, object)  # (generation, width, height, preview, tiles, timings)
+    failed = pyqtSignal(int)
+    index_ready = pyqtSignal(int, object)  # (generation, GridIndex of the elements at zoom 1)
+    tile_ready = pyqtSignal(int, object, QImage)  # (generation, (zoom, column, row), image)
+    progress = pyqtSignal(int)
+
+    def __init__(self, tile_size):
+        super().__init__()
+        self.tile_size = tile_size
+        self.condition = threading.Condition()
+        self.pending_load = None
+        self.pending_tiles = []
+        self.pending_release = False
+        self.running = True
+
+        self.renderer = None
+        self.generation = -1
+
+    def load(self, generation, data, viewport_width, viewport_height):
+        with self.condition:
+            self.pending_load = (generation, data, viewport_width, viewport_height)
+            self.condition.notify()
+
+    def request_tiles(self, generation, zoom, tiles):
+        """Replaces the queue of tiles; tiles that left the viewport are dropped."""
+        with self.condition:
+            self.pending_tiles = [(generation, zoom, column, row) for column, row in tiles]
+            self.condition.notify()
+
+    def release(self):
+        """Drops the renderer and the queued work."""
+        with self.condition:
+            self.pending_load = None
+            self.pending_tiles = []
+            self.pending_release = True
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.wait()
+
+    # --------------------------------------------------------------------------
+    def render_image(self, renderer, width, height, x, y, image_width, image_height):
+        image = QImage(image_width, image_height, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        renderer.render(painter, QRectF(-x, -y, width, height))
+        painter.end()
+        return image
+
+    def render_tile(self, renderer, zoom, column, row):
+        size = renderer.defaultSize()
+        width = max(1, int(size.width() * zoom))
+        height = max(1, int(size.height() * zoom))
+        ts = self.tile_size
+        return self.render_image(renderer, width, height, column * ts, row * ts, ts, ts)
+
+    def do_load(self, generation, data, viewport_width, viewport_height):
+        from PyQt5.QtSvg import QSvgRenderer  # loaded with the first image, not at startup
+        self.progress.emit(10)
+        t0 = time.perf_counter()
+        renderer = QSvgRenderer(QByteArray(data))
+        if not renderer.isValid():
+            self.failed.emit(generation)
+            return
+        t1 = time.perf_counter()
+        self.progress.emit(50)
+
+        size = renderer.defaultSize()
+        width, height = max(1, size.width()), max(1, size.height())
+        scale = min(1.0, PREVIEW_SIZE / max(width, height))
+        preview = self.render_image(renderer, width * scale, height * scale, 0, 0,
+                                    max(1, int(width * scale)), max(1, int(height * scale)))
+        self.progress.emit(70)
+
+        # Tiles of the first paint, so the new image replaces the old one at once
+        x0 = 0 if width > viewport_width else (viewport_width - width) // 2
+        y0 = 0 if height > viewport_height else (viewport_height - height) // 2
+        tiles = {}
+        for column, row in tile_range(width, height, x0, y0, viewport_width, viewport_height, self.tile_size):
+            tiles[(1.0, column, row)] = self.render_tile(renderer, 1.0, column, row)
+        self.progress.emit(100)
+        timings = {"svg_parse_s": t1 - t0, "raster_s": time.perf_counter() - t1}
+
+        self.renderer = renderer
+        self.generation = generation
+        self.loaded.emit(generation, width, height, preview, tiles, timings)
+        self.progress.emit(0)
+        self.index_ready.emit(generation, self.element_index(renderer, data))
+
+    def element_index(self, renderer, data):
+        """GridIndex of the bounding boxes of the nodes, edges and clusters, in pixels at zoom 1."""
+        view_box = renderer.viewBoxF()
+        size = renderer.defaultSize()
+        sx = size.width() / view_box.width() if view_box.width() else 1.0
+        sy = size.height() / view_box.height() if view_box.height() else 1.0
+        entries = []
+        for element_id, key in svg_elements(data):
+            rect = renderer.transformForElement(element_id).mapRect(renderer.boundsOnElement(element_id))
+            entries.append((key, QRectF((rect.x() - view_box.x()) * sx, (rect.y() - view_box.y()) * sy,
+                                        rect.width() * sx, rect.height() * sy)))
+        return GridIndex(entries)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending_load is None and not self.pending_tiles and not self.pending_release:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                if self.pending_release:
+                    self.pending_release = False
+                    self.renderer = None
+                    self.generation = -1
+                    continue
+                if self.pending_load is not None:
+                    job, self.pending_load = ("load", self.pending_load), None
+                else:
+                    job = ("tile", self.pending_tiles.pop(0))
+
+            if job[0] == "load":
+                self.do_load(*job[1])
+            else:
+                generation, zoom, column, row = job[1]
+                if generation == self.generation and self.renderer is not None:
+                    image = self.render_tile(self.renderer, zoom, column, row)
+                    self.tile_ready.emit(generation, (zoom, column, row), image)
+
+# ------------------------------------------------------------------------------
+# Widget da imagem com zoom/move
+# ------------------------------------------------------------------------------
+class SvgViewer(QAbstractScrollArea):
+    """
+    SVG viewer that only rasterizes the tiles inside the viewport.
+    Parsing and rasterization run in SvgRenderThread; the previous image is
+    shown until the new one is ready.
+    timings reports how long the SVG parse and the first rasterization took.
+    A click on a node, edge or cluster emits element_clicked with its key
+    (see spatial.element_key), and highlight() outlines elements by key.
+    The minimap shows the preview of the image when it does not fit.
+    release() frees the image; memory_bytes() estimates what it holds.
+    """
+    progress = pyqtSignal(int)
+    timings = pyqtSignal(int, object)  # (generation, {"svg_parse_s": ..., "raster_s": ...})
+    element_clicked = pyqtSignal(object)
+
+    def __init__(self, tile_size=256, max_tiles=256, error_message="Error loading SVG file", highlight_color="#ff8000",
+                 minimap_size=200):
+        super().__init__()
+        self.tile_size = tile_size
+        self.tiles = TileCache(max_tiles)
+        self.error_message = error_message
+        self.zoom = 1.0
+        self.offset = None
+        self.press_pos = None
+
+        # Elements of the image on screen, and the highlighted ones
+        self.index = None
+        self.highlighted = []
+        self.highlight_color = QColor(highlight_color)
+
+        self.minimap = None  # created by make_minimap()
+        self.minimap_size = minimap_size
+
+        self.generation = 0          # last loaded data
+        self.shown_generation = -1   # data on screen
+        self.image_width = 0
+        self.image_height = 0
+        self.preview = None
+        self.requested = None
+        self.data_bytes = 0
+
+        self.worker = SvgRenderThread(tile_size)
+        self.worker.loaded.connect(self.on_loaded)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.tile_ready.connect(self.on_tile_ready)
+        self.worker.index_ready.connect(self.on_index_ready)
+        self.worker.progress.connect(self.progress)
+        self.worker.start()
+        QApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def shutdown(self):
+        if self.worker.isRunning():
+            self.worker.stop()
+
+    def has_image(self):
+        return self.shown_generation >= 0
+
+    def load_data(self, data):
+        """Returns the generation of the data, as reported by timings."""
+        self.generation += 1
+        self.data_bytes = len(data)
+        vp = self.viewport()
+        self.worker.load(self.generation, data, vp.width(), vp.height())
+        return self.generation
+
+    def memory_bytes(self):
+        """Approximate memory of the image: tiles, preview, and the renderer as the size of the SVG."""
+        if not self.has_image():
+            return 0
+        return self.tiles.size_bytes() + self.preview.sizeInBytes() + self.data_bytes
+
+    def release(self):
+        """Frees the renderer, tiles and preview; the viewer is empty until the next load_data()."""
+        self.generation += 1  # an image still loading is dropped
+        self.worker.release()
+        self.shown_generation = -1
+        self.tiles.clear()
+        self.preview = None
+        self.requested = None
+        self.index = None
+        self.data_bytes = 0
+        if self.minimap is not None:
+            self.minimap.set_image(None)
+        self.viewport().update()
+
+    def on_loaded(self, generation, width, height, preview, tiles, timings):
+        if generation != self.generation:
+            return
+        self.shown_generation = generation
+        self.image_width = width
+        self.image_height = height
+        self.preview = preview
+        self.zoom = 1.0
+        self.requested = None
+        self.index = None
+        self.tiles.clear()
+        for key, image in tiles.items():
+            self.tiles.put(key, image)
+        if self.make_minimap() is not None:
+            self.minimap.set_image(preview)
+        self.horizontalScrollBar().setValue(0)
+        self.verticalScrollBar().setValue(0)
+        self.update_display()
+        self.timings.emit(generation, timings)
+
+    def on_index_ready(self, generation, index):
+        if generation != self.shown_generation:
+            return
+        self.index = index
+        self.highlight(self.highlighted)
+
+    def highlight(self, keys):
+        """Outlines the elements with these keys and scrolls the first one into view."""
+        self.highlighted = list(keys)
+        rects = self.highlight_rects()
+        if rects:
+            self.ensure_visible(rects[0])
+        self.viewport().update()
+
+    def highlight_rects(self):
+        if self.index is None:
+            return []
+        rects = (self.index.rect(key) for key in self.highlighted)
+        return [rect for rect in rects if rect is not None]
+
+    def ensure_visible(self, rect):
+        """Scrolls so that rect (in pixels at zoom 1) is inside the viewport."""
+        vp = self.viewport()
+        x0, y0 = self.content_origin()
+        left, top = x0 + rect.left() * self.zoom, y0 + rect.top() * self.zoom
+        right, bottom = x0 + rect.right() * self.zoom, y0 + rect.bottom() * self.zoom
+        if left < 0 or right > vp.width():
+            self.horizontalScrollBar().setValue(int(self.horizontalScrollBar().value() + (left + right - vp.width()) / 2))
+        if top < 0 or bottom > vp.height():
+            self.verticalScrollBar().setValue(int(self.verticalScrollBar().value() + (top + bottom - vp.height()) / 2))
+
+    def element_at(self, pos):
+        """Key of the element under a viewport position, or None."""
+        if self.index is None:
+            return None
+        x0, y0 = self.content_origin()
+        keys = self.index.at((pos.x() - x0) / self.zoom, (pos.y() - y0) / self.zoom)
+        return keys[0] if keys else None
+
+    def on_failed(self, generation):
+        if generation != self.generation:  # a newer load is under way
+            return
+        print(self.error_message)
+        self.progress.emit(0)
+
+    def on_tile_ready(self, generation, key, image):
+        if generation != self.shown_generation:
+            return
+        self.tiles.put(key, image)
+        if key[0] == round(self.zoom, 6):
+            x0, y0 = self.content_origin()
+            ts = self.tile_size
+            self.viewport().update(QRect(x0 + key[1] * ts, y0 + key[2] * ts, ts, ts))
+
+    # --------------------------------------------------------------------------
+    def content_size(self):
+        return (max(1, int(self.image_width * self.zoom)), max(1, int(self.image_height * self.zoom)))
+
+    def content_origin(self):
+        """Top-left corner of the image in viewport coordinates."""
+        width, height = self.content_size()
+        vp = self.viewport()
+        x = -self.horizontalScrollBar().value() if width > vp.width() else (vp.width() - width) // 2
+        y = -self.verticalScrollBar().value() if height > vp.height() else (vp.height() - height) // 2
+        return x, y
+
+    def update_scrollbars(self):
+        width, height = self.content_size()
+        vp = self.viewport()
+        self.horizontalScrollBar().setPageStep(vp.width())
+        self.verticalScrollBar().setPageStep(vp.height())
+        self.horizontalScrollBar().setRange(0, max(0, width - vp.width()))
+        self.verticalScrollBar().setRange(0, max(0, height - vp.height()))
+
+    def update_display(self):
+        if self.has_image():
+            self.update_scrollbars()
+            self.update_minimap()
+        self.viewport().update()
+
+    def make_minimap(self):
+        """Minimap of the viewer (or None), created with the first image."""
+        if self.minimap is None and self.minimap_size:
+            from graphviz_code_viewer.modules.wminimap import Minimap
+            self.minimap = Minimap(self, self.minimap_size, self.highlight_color)
+            self.minimap.jump.connect(self.center_on)
+        return self.minimap
+
+    def update_minimap(self):
+        """Outlines the visible part of the image in the minimap, at the bottom right corner."""
+        if self.minimap is None:
+            return
+        width, height = self.content_size()
+        x0, y0 = self.content_origin()
+        vp = self.viewport()
+        view = QRectF(-x0 / width, -y0 / height, vp.width() / width, vp.height() / height)
+        self.minimap.set_view(view.intersected(QRectF(0, 0, 1, 1)))
+        corner = vp.geometry().bottomRight()
+        self.minimap.move(corner.x() - self.minimap.width() - 8, corner.y() - self.minimap.height() - 8)
+        self.minimap.raise_()
+
+    def center_on(self, fx, fy):
+        """Scrolls so that the point at fractions (fx, fy) of the image is in the center."""
+        width, height = self.content_size()
+        vp = self.viewport()
+        self.horizontalScrollBar().setValue(int(fx * width - vp.width() / 2))
+        self.verticalScrollBar().setValue(int(fy * height - vp.height() / 2))
+
+    # --------------------------------------------------------------------------
+    def paintEvent(self, event):
+        if not self.has_image():
+            return
+
+        painter = QPainter(self.viewport())
+        width, height = self.content_size()
+        x0, y0 = self.content_origin()
+        vp = self.viewport()
+        ts = self.tile_size
+        zoom_key = round(self.zoom, 6)
+
+        missing = []
+        for column, row in tile_range(width, height, x0, y0, vp.width(), vp.height(), ts):
+            image = self.tiles.get((zoom_key, column, row))
+            if image is None:
+                missing.append((column, row))
+            else:
+                painter.drawImage(x0 + column * ts, y0 + row * ts, image)
+
+        # Low resolution preview in place of the tiles that are not ready yet
+        # only, so it does not show through the transparent parts of the others
+        sx, sy = self.preview.width() / width, self.preview.height() / height
+        for column, row in missing:
+            tile = QRectF(column * ts, row * ts, ts, ts).intersected(QRectF(0, 0, width, height))
+            painter.drawImage(tile.translated(x0, y0), self.preview,
+                              QRectF(tile.x() * sx, tile.y() * sy, tile.width() * sx, tile.height() * sy))
+
+        pen = QPen(self.highlight_color, 3)
+        painter.setPen(pen)
+        for rect in self.highlight_rects():
+            painter.drawRect(QRectF(x0 + rect.x() * self.zoom, y0 + rect.y() * self.zoom,
+                                    rect.width() * self.zoom, rect.height() * self.zoom).adjusted(-3, -3, 3, 3))
+        painter.end()
+
+        request = (self.shown_generation, zoom_key, tuple(missing))
+        if missing and request != self.requested:
+            self.requested = request
+            self.worker.request_tiles(self.shown_generation, zoom_key, missing)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.has_image():
+            self.update_scrollbars()
+            self.update_minimap()
+
+    def scrollContentsBy(self, dx, dy):
+        if self.has_image():
+            self.update_minimap()
+        self.viewport().update()
+
+    # --------------------------------------------------------------------------
+    def wheelEvent(self, event):
+        if not self.has_image():
+            return
+        angle = event.angleDelta().y()
+        factor = 1.1 if angle > 0 else 0.9
+
+        # Keep the point under the cursor fixed; the event comes from the viewport
+        pos = event.pos()
+        x0, y0 = self.content_origin()
+        fx = (pos.x() - x0) / self.zoom
+        fy = (pos.y() - y0) / self.zoom
+
+        self.zoom *= factor
+        self.update_display()
+        self.horizontalScrollBar().setValue(int(fx * self.zoom - pos.x()))
+        self.verticalScrollBar().setValue(int(fy * self.zoom - pos.y()))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.offset = event.pos()
+            self.press_pos = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.offset:
+            delta = event.pos() - self.offset
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+            self.offset = event.pos()
+
+    def mouseReleaseEvent(self, event):
+        self.offset = None
+        # A click, not the end of a drag, selects an element
+        if self.press_pos is not None and (event.pos() - self.press_pos).manhattanLength() < QApplication.startDragDistance():
+            key = self.element_at(event.pos())
+            if key is not None:
+                self.element_clicked.emit(key)
+        self.press_pos = None
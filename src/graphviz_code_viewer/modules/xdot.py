@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+import json
+
+from PyQt5.QtGui import QColor, QPen, QBrush, QFont, QPainterPath, QLinearGradient, QRadialGradient
+from PyQt5.QtCore import Qt, QPointF, QRectF
+
+# Drawing attributes of the -Tjson output, in the order Graphviz draws them
+DRAW_KEYS = ("_draw_", "_ldraw_", "_hdraw_", "_tdraw_", "_hldraw_", "_tldraw_")
+
+# Labels smaller than this on screen are not drawn
+LABEL_MIN_PIXELS = 4.0
+
+# Objects smaller than this on screen are drawn as a filled box
+DETAIL_MIN_PIXELS = 3.0
+
+PEN_STYLES = {"solid": Qt.SolidLine, "dashed": Qt.DashLine, "dotted": Qt.DotLine}
+
+
+def split_json(text):
+    """Splits text that starts with a JSON object; returns (object text, rest)."""
+    text = text.lstrip()
+    _, end = json.JSONDecoder().raw_decode(text)
+    return text[:end], text[end:].lstrip()
+
+
+class Styles:
+    """
+    Colors, pens and fonts of one build, shared by its objects; a graph uses
+    few distinct ones. Each build has its own, so the worker threads and the
+    GUI thread never use the same cache.
+    """
+    def __init__(self):
+        self.colors = {}
+        self.pens = {}
+        self.fonts = {}
+
+    def color(self, color):
+        """QColor of an xdot color: a name, #rrggbb or #rrggbbaa."""
+        value = self.colors.get(color)
+        if value is None:
+            if color.startswith("#") and len(color) == 9:
+                value = QColor(color[:7])
+                value.setAlpha(int(color[7:], 16))
+            else:
+                value = QColor(color)
+                if not value.isValid():
+                    value = QColor(Qt.black)
+            self.colors[color] = value
+        return value
+
+    def pen(self, color, width, style):
+        key = (color, width, style)
+        pen = self.pens.get(key)
+        if pen is None:
+            pen = QPen(self.color(color), width, style)
+            self.pens[key] = pen
+        return pen
+
+    def brush(self, op, flip):
+        """QColor or QBrush of a C (fill color) operation, with linear and radial gradients."""
+        if op.get("grad", "none") == "none":
+            return self.color(op["color"])
+        p0, p1 = op["p0"], op["p1"]
+        if op["grad"] == "linear":
+            gradient = QLinearGradient(QPointF(p0[0], flip - p0[1]), QPointF(p1[0], flip - p1[1]))
+        else:
+            gradient = QRadialGradient(QPointF(p1[0], flip - p1[1]), p1[2], QPointF(p0[0], flip - p0[1]))
+        for stop in op["stops"]:
+            gradient.setColorAt(stop["frac"], self.color(stop["color"]))
+        return QBrush(gradient)
+
+    def font(self, family, size, flags):
+        key = (family, size, flags)
+        font = self.fonts.get(key)
+        if font is None:
+            font = QFont(family)
+            font.setPixelSize(max(1, round(size)))
+            font.setBold(bool(flags & 1))
+            font.setItalic(bool(flags & 2))
+            font.setUnderline(bool(flags & 4))
+            self.fonts[key] = font
+        return font
+
+
+def font_family(face):
+    """Family of a PostScript font name: Times-Roman -> Times."""
+    return face.split(",")[0].split("-")[0].strip() or "Times"
+
+# ------------------------------------------------------------------------------
+# Objects of the drawing
+# ------------------------------------------------------------------------------
+class SceneObject:
+    """
+    Drawing of one graph, cluster, node or edge: shapes are (pen, brush or
+    None, path) and labels are (color, font, size, x, y, text), in scene
+    coordinates (y down). name is the node or subgraph name, or
+    (tail, head) for an edge; index is the position among objects of kind.
+    """
+    __slots__ = ("kind", "name", "index", "shapes", "labels", "bounds")
+
+    def __init__(self, kind, name, index):
+        self.kind = kind
+        self.name = name
+        self.index = index
+        self.shapes = []
+        self.labels = []
+        self.bounds = QRectF()
+
+    def add_ops(self, ops, flip, styles):
+        """Appends the shapes and labels of a list of xdot operations."""
+        color, width, line = "black", 1.0, Qt.SolidLine
+        brush = styles.color("black")
+        family, size, flags = "Times", 14.0, 0
+        invisible = False
+        for op in ops:
+            kind = op["op"]
+            if kind == "c":
+                color = op["color"]
+            elif kind == "C":
+                brush = styles.brush(op, flip)
+            elif kind == "S":
+                style = op["style"]
+                if style.startswith("setlinewidth("):
+                    width = float(style[len("setlinewidth("):-1])
+                elif style == "bold":
+                    width = 2.0
+                elif style == "invis":
+                    invisible = True
+                elif style in PEN_STYLES:
+                    line = PEN_STYLES[style]
+            elif kind == "F":
+                family, size = font_family(op["face"]), op["size"]
+            elif kind == "t":
+                flags = op["fontchar"]
+            elif invisible:
+                continue
+            elif kind == "T":
+                x, y = op["pt"][0], flip - op["pt"][1]
+                text_width = op["width"]  # width stays the pen width of the shapes that follow
+                x -= {"c": text_width / 2, "r": text_width}.get(op["align"], 0)
+                self.labels.append((styles.color(color), styles.font(family, size, flags), size, x, y, op["text"]))
+                self.bounds |= QRectF(x, y - size, text_width, size * 1.3)
+            elif kind in "eEpPLbB":
+                path = self.path(op, flip)
+                filled = kind in "EPb"
+                self.shapes.append((styles.pen(color, width, line), brush if filled else None, path))
+                margin = width / 2
+                self.bounds |= path.controlPointRect().adjusted(-margin, -margin, margin, margin)
+
+    def path(self, op, flip):
+        path = QPainterPath()
+        kind = op["op"]
+        if kind in "eE":
+            x, y, rx, ry = op["rect"]
+            path.addEllipse(QPointF(x, flip - y), rx, ry)
+            return path
+        points = op["points"]
+        path.moveTo(points[0][0], flip - points[0][1])
+        if kind in "bB":
+            for i in range(1, len(points) - 2, 3):
+                (x1, y1), (x2, y2), (x3, y3) = points[i:i + 3]
+                path.cubicTo(x1, flip - y1, x2, flip - y2, x3, flip - y3)
+        else:
+            for x, y in points[1:]:
+                path.lineTo(x, flip - y)
+            if kind in "pP":
+                path.closeSubpath()
+        return path
+
+
+def build_objects(data):
+    """
+    SceneObjects of the -Tjson output of Graphviz, in drawing order, and the
+    bounding box of the graph. Raises ValueError if data is not such an output.
+    The objects hold Qt values that are not thread-safe: a worker thread
+    that builds them must hand them over once it no longer uses them.
+    """
+    graph = json.loads(data)
+    try:
+        x0, y0, x1, y1 = (float(v) for v in graph["bb"].split(","))
+    except (KeyError, ValueError):
+        raise ValueError("no bounding box in the JSON output")
+    flip = y1 + y0
+    items = graph.get("objects", [])
+    subgraphs = graph.get("_subgraph_cnt", 0)
+    styles = Styles()
+
+    def make(kind, name, index, source):
+        obj = SceneObject(kind, name, index)
+        for key in DRAW_KEYS:
+            if key in source:
+                obj.add_ops(source[key], flip, styles)
+        return obj
+
+    objects = [make("graph", graph.get("name", ""), 0, graph)]
+    for i, item in enumerate(items[:subgraphs]):
+        if any(key in item for key in DRAW_KEYS):  # clusters only: other subgraphs draw nothing
+            objects.append(make("cluster", item.get("name", ""), i, item))
+    for i, item in enumerate(items[subgraphs:]):
+        objects.append(make("node", item.get("name", ""), i, item))
+    for i, item in enumerate(graph.get("edges", [])):
+        tail, head = items[item["tail"]].get("name", ""), items[item["head"]].get("name", "")
+        objects.append(make("edge", (tail, head), i, item))
+    return objects, QRectF(x0, y0, x1 - x0, y1 - y0)
+
+# ------------------------------------------------------------------------------
+# Painting
+# ------------------------------------------------------------------------------
+def draw_object(painter, obj, lod):
+    """
+    Paints obj at lod (screen pixels per scene unit): labels below
+    LABEL_MIN_PIXELS are dropped and tiny objects become a filled box.
+    """
+    bounds = obj.bounds
+    if max(bounds.width(), bounds.height()) * lod < DETAIL_MIN_PIXELS:
+        if obj.shapes:
+            painter.fillRect(bounds, obj.shapes[0][0].color())
+        return
+    for pen, brush, path in obj.shapes:
+        painter.setPen(pen)
+        painter.setBrush(brush if brush is not None else Qt.NoBrush)
+        painter.drawPath(path)
+    for color, font, size, x, y, text in obj.labels:
+        if size * lod < LABEL_MIN_PIXELS:
+            continue
+        painter.setPen(color)
+        painter.setFont(font)
+        painter.drawText(QPointF(x, y), text)
@@ -2,29 +2,39 @@
 
 import sys
 import subprocess
-import tempfile
 import os
+import time
 import signal
 import shutil
+import threading
 
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QPlainTextEdit, QLabel, QSplitter, QToolBar,
-    QAction, QVBoxLayout, QWidget, QProgressBar, QFileDialog, QScrollArea, QMessageBox, QSizePolicy, QLineEdit
+    QApplication, QMainWindow, QPlainTextEdit, QTextEdit, QLabel, QSplitter, QToolBar,
+    QAction, QVBoxLayout, QWidget, QProgressBar, QFileDialog, QMessageBox, QSizePolicy, QLineEdit,
+    QHBoxLayout, QPushButton, QComboBox, QInputDialog, QStackedWidget, QTabWidget
 )
-from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont, QPixmap, QIcon, QDesktopServices
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QUrl
+from PyQt5.QtGui import QTextCharFormat, QColor, QFont, QPixmap, QIcon, QDesktopServices
+from PyQt5.QtCore import Qt, QThread, QObject, pyqtSignal, QUrl, QTimer
 
-from PyQt5.QtSvg import QSvgRenderer
 from PyQt5.QtGui import QPainter
-from PyQt5.QtCore import QSize
+from PyQt5.QtCore import QByteArray
 from PyQt5.QtWidgets import QShortcut
-from PyQt5.QtGui import QKeySequence, QTextDocument
+from PyQt5.QtGui import QKeySequence, QTextDocument, QTextCursor
 
 
 import graphviz_code_viewer.about as about
 import graphviz_code_viewer.modules.configure as configure 
-from graphviz_code_viewer.desktop import create_desktop_file, create_desktop_directory, create_desktop_menu
-from graphviz_code_viewer.modules.wabout import show_about_window
+from graphviz_code_viewer.modules.render_cache import RenderCache, make_key, graphviz_version, CACHE_DIR
+from graphviz_code_viewer.modules.compiler import GraphvizProcess, GraphvizError, error_lines, ENGINES, auto_engine
+from graphviz_code_viewer.modules.phases import PhaseTracker, format_times
+from graphviz_code_viewer.modules.metrics import MetricsHistory, graph_id
+from graphviz_code_viewer.modules.restyle import LayoutBase, skeleton, split_outputs, style_diff, apply_style
+from graphviz_code_viewer.modules.wsvgviewer import SvgViewer
+from graphviz_code_viewer.modules.highlighter import GraphvizHighlighter
+from graphviz_code_viewer.modules.dot_parser import DotDocument
+from graphviz_code_viewer.modules.navigation import SourceMap
+from graphviz_code_viewer.modules.file_loader import FileLoadThread, PagedFile
+from graphviz_code_viewer.modules.scheduler import CompileScheduler
 
 # ------------------------------------------------------------------------------
 # Path to config file
@@ -64,11 +74,90 @@ DEFAULT_CONTENT={   "error_loading_svg": "Error loading SVG file",
                     "saved_file":"Saved file:",
                     "error":"Error",
                     "error_saving_file":"It was not possible to save the file:",
-                    "error_compilation":"Error in graphviz compilation."
+                    "error_compilation":"Error in graphviz compilation.",
+                    "cache_memory_mb": 64,
+                    "cache_disk_mb": 512,
+                    "action_clear_cache": "Clear cache",
+                    "action_clear_cache_tooltip": "Clear the cache of compiled images",
+                    "cache_cleared": "Render cache cleared.",
+                    "loaded_from_cache": "Image loaded from the render cache.",
+                    "live_compile": False,
+                    "live_compile_delay_ms": 700,
+                    "action_live": "Live",
+                    "action_live_tooltip": "Compile automatically after a pause in editing",
+                    "split_components": False,
+                    "component_jobs": 0,
+                    "action_components": "Components",
+                    "action_components_tooltip": "Lay out each connected component in parallel and pack the results",
+                    "tile_size": 256,
+                    "tile_cache_tiles": 256,
+                    "preflight_check": True,
+                    "syntax_error_in_line": "Syntax error in line",
+                    "syntax_warning_in_line": "Warning in line",
+                    "chunked_load_mb": 8,
+                    "load_chunk_kb": 256,
+                    "highlight_max_mb": 4,
+                    "paged_view_mb": 128,
+                    "page_kb": 1024,
+                    "loading_file": "Loading file:",
+                    "page_of": "Page {page} of {pages} (read-only)",
+                    "action_previous_page": "Previous",
+                    "action_next_page": "Next",
+                    "engine": "auto",
+                    "engine_tooltip": "Layout engine; auto uses sfdp for large graphs",
+                    "auto_engine_nodes": 5000,
+                    "auto_engine_edges": 20000,
+                    "compile_timeout_s": 120,
+                    "compile_memory_mb": 0,
+                    "action_stop": "Stop",
+                    "action_stop_tooltip": "Stop the running compilation",
+                    "compilation_stopped": "Compilation stopped.",
+                    "large_graph_engine": "Large graph, laid out with",
+                    "layout_progress": True,
+                    "layout_phases": "Layout phases:",
+                    "metrics_history": 500,
+                    "action_metrics": "Metrics",
+                    "action_metrics_tooltip": "Time spent in Graphviz and in the image viewer",
+                    "metrics_last_ms": "Last (ms)",
+                    "metrics_p50_ms": "p50 (ms)",
+                    "metrics_p95_ms": "p95 (ms)",
+                    "metrics_cache": "Cache lookup",
+                    "metrics_layout": "Graphviz",
+                    "metrics_svg_parse": "SVG parse",
+                    "metrics_raster": "Rasterization",
+                    "metrics_scene": "Scene build",
+                    "metrics_total": "Total",
+                    "metrics_compilations": "Compilations:",
+                    "metrics_export_json": "Export JSON",
+                    "metrics_export_csv": "Export CSV",
+                    "metrics_clear": "Clear",
+                    "metrics_export_title": "Export metrics",
+                    "error_exporting_metrics": "It was not possible to export the metrics:",
+                    "export_dpi": 72,
+                    "export_max_dpi": 2400,
+                    "export_dpi_label": "Resolution in dots per inch (72 is the size of the graph):",
+                    "saving_image": "Saving image:",
+                    "error_saving_image": "It was not possible to save the image:",
+                    "action_export": "Export",
+                    "action_export_tooltip": "Save the graph in several formats with a single layout",
+                    "export_formats": "svg,png,pdf",
+                    "export_formats_label": "Comma separated formats:",
+                    "exporting": "Exporting:",
+                    "restyle": True,
+                    "restyled": "Style change: the previous layout was reused.",
+                    "viewer_backend": "svg",
+                    "scene_overview_size": 4096,
+                    "highlight_color": "#ff8000",
+                    "minimap_size": 200,
+                    "action_scene": "Scene",
+                    "action_scene_tooltip": "Draw the graph as a scene of items instead of an SVG image (smoother on large graphs)",
+                    "compile_jobs": 2,
+                    "inactive_tabs_mb": 256,
+                    "untitled": "Untitled",
+                    "action_new": "New",
+                    "action_new_tooltip": "Open an empty document in a new tab"
                 }
 
-configure.verify_default_config(CONFIG_PATH,default_content=DEFAULT_CONTENT)
-CONFIG=configure.load_config(CONFIG_PATH,default_content=DEFAULT_CONTENT)
 
 # ------------------------------------------------------------------------------
 
@@ -78,8 +167,19 @@ DEFAULT_EDITOR_CONTENT= {   "font_size": 11,
                             "font_name": "Monospace",
                             "save_file": "Ctrl+S",
                             "find_text": "Ctrl+F",
+                            "search_margin_lines": 50,
+                            "search_matches": "matches",
+                            "parse_delay_ms": 150,
+                            "parse_max_mb": 64,
+                            "error_color": "red",
+                            "error_gutter_width": 8,
                             "syntax_rules": {
                                 "digraph": {"color": "blue", "bold": True},
+                                "graph": {"color": "blue", "bold": True},
+                                "subgraph": {"color": "blue", "bold": True},
+                                "node": {"color": "blue", "bold": True},
+                                "edge": {"color": "blue", "bold": True},
+                                "strict": {"color": "blue", "bold": True},
                                 "->": {"color": "darkRed", "bold": True},
                                 "=": {"color": "darkGreen", "bold": True},
                                 "\"": {"color": "darkMagenta", "bold": True},
@@ -87,137 +187,429 @@ DEFAULT_EDITOR_CONTENT= {   "font_size": 11,
                                 "]": {"color": "black", "bold": True},
                                 "{": {"color": "darkGreen", "bold": True},
                                 "}": {"color": "darkGreen", "bold": True},
-                                ";": {"color": "darkGray", "bold": True}
+                                ";": {"color": "darkGray", "bold": True},
+                                "<": {"color": "darkCyan", "bold": False},
+                                "//": {"color": "gray", "bold": False},
+                                "/*": {"color": "gray", "bold": False}
                             }
                         }
 
-configure.verify_default_config(CONFIG_EDITOR_PATH,default_content=DEFAULT_EDITOR_CONTENT)
-CONFIG_EDITOR=configure.load_config(CONFIG_EDITOR_PATH,default_content=DEFAULT_EDITOR_CONTENT)
+# Filled by load_configs()
+CONFIG = {}
+CONFIG_EDITOR = {}
 
-# ------------------------------------------------------------------------------
-# Syntax Highlighter
-# ------------------------------------------------------------------------------
-class GraphvizHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent, rules_dict):
-        super().__init__(parent)
-        self.rules = []
-        for key, data in rules_dict.items():
-            fmt = QTextCharFormat()
-            fmt.setForeground(QColor(data["color"]))
-            if data["bold"]:
-                fmt.setFontWeight(QFont.Bold)
-            self.rules.append((key, fmt))
-
-    def highlightBlock(self, text):
-        for keyword, fmt in self.rules:
-            index = text.find(keyword)
-            while index != -1:
-                length = len(keyword)
-                self.setFormat(index, length, fmt)
-                index = text.find(keyword, index + length)
+def load_configs():
+    """Reads both JSON configs once; they are created with the defaults on first use."""
+    if CONFIG:
+        return
+    configure.verify_default_config(CONFIG_PATH,default_content=DEFAULT_CONTENT)
+    CONFIG.update(configure.load_config(CONFIG_PATH,default_content=DEFAULT_CONTENT))
+    configure.verify_default_config(CONFIG_EDITOR_PATH,default_content=DEFAULT_EDITOR_CONTENT)
+    CONFIG_EDITOR.update(configure.load_config(CONFIG_EDITOR_PATH,default_content=DEFAULT_EDITOR_CONTENT))
 
 # ------------------------------------------------------------------------------
 # Worker thread para compilar Graphviz
 # ------------------------------------------------------------------------------
 class CompileThread(QThread):
     progress = pyqtSignal(int)
-    finished = pyqtSignal(str, str)  # (output_file, error_message)
+    phase = pyqtSignal(str)                 # layout phase reported by dot -v
+    finished = pyqtSignal(int, bytes, str)  # (generation, svg_data, error_message)
 
-    def __init__(self, dot_code, output_file):
+    def __init__(self, dot_code, generation=0, cache=None, engine="dot", split_components=False, jobs=0,
+                 timeout=None, memory_limit=None, track_phases=False, model=None, base=None, scene=False):
         super().__init__()
         self.dot_code = dot_code
-        self.output_file = output_file
+        self.split_components = split_components
+        self.generation = generation
+        self.cache = cache
+        self.engine = engine
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.from_cache = False
+        self.cancelled = False
+        self.error = None      # exception of a failed run
+        self.tracker = None
+        self.phase_times = []  # [(phase, seconds)] of the last run
+        self.timings = {}      # seconds of the cache lookup and of Graphviz
+        self.graph = ""        # content hash of dot_code for the metrics
+
+        # Drawing for the scene viewer: -Tjson after the SVG, in the same process
+        self.scene = scene
+        self.scene_data = None
+        self.fmt = "svg+json" if scene else "svg"
+        outputs = ["-Tjson"] if scene else []
+
+        # Style-only edits: with the model of dot_code, the positioned graph of
+        # this run is kept, and a base of a previous run may replace the layout
+        self.model = model if not split_components else None
+        self.base = base if self.model is not None else None
+        self.layout_base = None  # LayoutBase of this run
+        self.restyled = False
+        if split_components:
+            from graphviz_code_viewer.modules.components import ComponentPipeline
+            self.cache_engine = engine + "/components"
+            self.process = ComponentPipeline(dot_code, engine=engine, fmt="svg", jobs=jobs,
+                                             timeout=timeout, memory_limit=memory_limit, extra_args=outputs)
+        else:
+            self.cache_engine = engine
+            if track_phases and engine == "dot":
+                self.tracker = PhaseTracker(self.on_phase)
+            self.process = GraphvizProcess(dot_code, engine=engine, fmt="svg",
+                                           extra_args=outputs + (["-Tdot"] if self.model is not None else []),
+                                           timeout=timeout, memory_limit=memory_limit,
+                                           on_stderr=self.tracker.feed if self.tracker else None)
+
+    def on_phase(self, phase, progress):
+        self.phase.emit(phase)
+        self.progress.emit(progress)
+
+    def cancel(self):
+        """Kills the running dot process; the result is emitted as stale."""
+        self.cancelled = True
+        self.process.kill()
+
+    def restyle(self):
+        """
+        Replaces the layout with neato -n2 on the positioned graph of base
+        when dot_code only differs from its source in style attributes.
+        """
+        if self.base is None or self.base.engine != self.cache_engine:
+            return
+        diff = style_diff(self.base, self.model, self.dot_code)
+        positioned = apply_style(self.base, self.model, diff) if diff is not None else None
+        if positioned is None:
+            return
+        self.restyled = True
+        self.tracker = None
+        self.process = GraphvizProcess(positioned, engine="neato", fmt="svg",
+                                       extra_args=["-n2"] + (["-Tjson"] if self.scene else []),
+                                       timeout=self.timeout, memory_limit=self.memory_limit)
+        if self.cancelled:
+            self.process.kill()
+
+    def split(self, data):
+        """SVG, JSON drawing and positioned graph in the output of Graphviz."""
+        if not self.scene and self.model is None:
+            return data, None, None
+        data, rest = split_outputs(data)
+        scene_data = None
+        if self.scene and rest:
+            from graphviz_code_viewer.modules.xdot import split_json
+            try:
+                scene_data, rest = split_json(rest)
+            except ValueError:
+                rest = ""
+        return data, scene_data, rest or None
 
     def run(self):
-        self.progress.emit(10)
-        
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".dot")
-        tmp_dot = temp_file.name
-        temp_file.close()
-        
-        with open(tmp_dot, "w") as f:
-            f.write(self.dot_code)
-        self.progress.emit(50)
-
+        """Always emits finished, so the scheduler and the tab are never left waiting."""
+        data, error_msg = b"", ""
         try:
-            result = subprocess.run(
-                ["dot", "-Tsvg", tmp_dot, "-o", self.output_file],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            self.progress.emit(100)
-            self.finished.emit(self.output_file, "")  # sucesso, sem erro
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr if e.stderr else "Erro desconhecido ao rodar o Graphviz"
-            self.finished.emit("", error_msg)
+            data = self.compile()
+        except GraphvizError as e:
+            self.error = e
+            error_msg = str(e)
+        except Exception as e:  # an unexpected output must not abort the process
+            self.error = e
+            error_msg = f"{type(e).__name__}: {e}"
         finally:
-            if os.path.exists(tmp_dot):
-                os.remove(tmp_dot)
+            self.finished.emit(self.generation, data, error_msg)
 
+    def compile(self):
+        """SVG of dot_code, from the render cache or Graphviz; raises GraphvizError."""
+        self.progress.emit(10)
+        self.graph = graph_id(self.dot_code)
+
+        key = None
+        if self.cache is not None:
+            t0 = time.perf_counter()
+            key = make_key(self.dot_code, engine=self.cache_engine, fmt=self.fmt, version=graphviz_version(self.engine))
+            data = self.cache.get(key)
+            self.timings["cache_s"] = time.perf_counter() - t0
+            if data is not None:
+                self.from_cache = True
+                data, self.scene_data, _ = self.split(data)
+                self.progress.emit(100)
+                return data
+        self.restyle()
+        if self.tracker is not None:
+            self.tracker.enter("parse")
+        else:
+            self.progress.emit(50)
 
+        t0 = time.perf_counter()
+        data = self.process.run()
+        self.timings["layout_s"] = time.perf_counter() - t0
+        if self.tracker is not None:
+            self.phase_times = self.tracker.finish()
+        data, self.scene_data, positioned = self.split(data)
+        if positioned and not self.restyled:
+            self.layout_base = LayoutBase(skeleton(self.dot_code), self.model, positioned, self.cache_engine)
 
-# ------------------------------------------------------------------------------
-# Widget da imagem com zoom/move
-# ------------------------------------------------------------------------------
+        if key is not None:
+            self.cache.put(key, data + self.scene_data.encode("utf-8") if self.scene_data else data)
+        self.progress.emit(100)
+        return data
 
-class SvgViewer(QScrollArea):
-    def __init__(self):
+
+
+class ExportFormatsThread(QThread):
+    """Writes base.fmt for each format, with one layout for all of them."""
+    finished = pyqtSignal(str, str)  # (files written, error_message)
+
+    def __init__(self, dot_code, base_path, formats, engine="dot", split_components=False, jobs=0,
+                 timeout=None, memory_limit=None):
         super().__init__()
-        self.label = QLabel()
-        self.label.setAlignment(Qt.AlignCenter)
-        self.setWidget(self.label)
-        self.setWidgetResizable(True)
-        self.renderer = None
-        self.zoom = 1.0
-        self.offset = None
-
-    def load_image(self, path):
-        self.renderer = QSvgRenderer(path)
-        if not self.renderer.isValid():
-            print(CONFIG["error_loading_svg"])
+        from graphviz_code_viewer.modules.multiformat import MultiFormatRender
+        self.base_path = base_path
+        self.process = MultiFormatRender(dot_code, formats, engine=engine, split_components=split_components,
+                                         jobs=jobs, timeout=timeout, memory_limit=memory_limit)
+
+    def cancel(self):
+        self.process.kill()
+
+    def run(self):
+        try:
+            results = self.process.run()
+            paths = []
+            for fmt, data in results.items():
+                path = self.base_path + "." + fmt
+                with open(path, "wb") as f:
+                    f.write(data)
+                paths.append(path)
+        except (GraphvizError, OSError) as e:
+            self.finished.emit("", str(e))
             return
-        self.zoom = 1.0
-        self.update_display()
-
-    def update_display(self):
-        if self.renderer:
-            # calcular o tamanho do SVG considerando o zoom
-            size = self.renderer.defaultSize() * self.zoom
-            size = QSize(max(1, size.width()), max(1, size.height()))
-            
-            # criar um pixmap transparente do tamanho desejado
-            pixmap = QPixmap(size)
-            pixmap.fill(Qt.transparent)
-            
-            # renderizar o SVG diretamente no pixmap
-            painter = QPainter(pixmap)
-            self.renderer.render(painter)
-            painter.end()
-            
-            self.label.setPixmap(pixmap)
-            self.label.resize(pixmap.size())
+        self.finished.emit(", ".join(paths), "")
 
-    def wheelEvent(self, event):
-        angle = event.angleDelta().y()
-        factor = 1.1 if angle > 0 else 0.9
-        self.zoom *= factor
-        self.update_display()
 
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.offset = event.pos()
 
-    def mouseMoveEvent(self, event):
-        if self.offset:
-            delta = event.pos() - self.offset
-            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
-            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
-            self.offset = event.pos()
+# ---------------------------
+# Contador de ocorrências em segundo plano
+# ---------------------------
+class SearchCounter(QObject):
+    """
+    Counts the matches of a text in time slices of the event loop.
+    A new start() cancels the count in progress.
+    """
+    counted = pyqtSignal(int, bool)  # (count, finished)
+
+    def __init__(self, document, slice_ms=8):
+        super().__init__()
+        self.document = document
+        self.slice_s = slice_ms / 1000.0
+        self.text = ""
+        self.block = None
+        self.count = 0
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.step)
+
+    def start(self, text):
+        self.cancel()
+        self.text = text
+        self.count = 0
+        if not text:
+            self.counted.emit(0, True)
+            return
+        self.block = self.document.begin()
+        self.timer.start()
+
+    def cancel(self):
+        self.timer.stop()
+        self.block = None
+
+    def step(self):
+        deadline = time.perf_counter() + self.slice_s
+        block = self.block
+        text = self.text
+        while block.isValid():
+            self.count += block.text().count(text)
+            block = block.next()
+            if time.perf_counter() > deadline:
+                break
+        self.block = block
+
+        if block.isValid():
+            self.counted.emit(self.count, False)
+        else:
+            self.timer.stop()
+            self.counted.emit(self.count, True)
+
+
+# ---------------------------
+# Modelo DOT do editor
+# ---------------------------
+class DocumentModel(QObject):
+    """
+    DotDocument kept in sync with a QTextDocument through contentsChange.
+    Edits are queued and parsed after a short pause. A whole new text is
+    parsed in a background thread and the edits made meanwhile are applied
+    after it. Documents larger than max_chars are not parsed.
+    """
+    changed = pyqtSignal()
+    parsed = pyqtSignal(int, object)  # (generation, DotDocument)
+
+    # Texts up to this size are parsed at once in the GUI thread
+    INLINE_CHARS = 256*1024
+
+    def __init__(self, document, delay_ms=150, max_chars=64*1024*1024):
+        super().__init__()
+        self.document = document
+        self.max_chars = max_chars
+        self.dot = DotDocument()
+        self.pending = []       # (position, removed, added)
+        self.reset = False      # parse the whole text instead of the edits
+        self.suspended = False
+        self.parsing = False
+        self.generation = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.flush)
+        self.parsed.connect(self.on_parsed)
+        document.contentsChange.connect(self.on_contents_change)
+
+    def on_contents_change(self, position, removed, added):
+        if not self.reset:
+            if added > self.max_chars // 16 or (position == 0 and added >= self.document.characterCount() - 1):
+                # a new text, not an edit
+                self.reset = True
+                self.pending = []
+            else:
+                # The last block separator of the document is not part of the text
+                end = min(position + added, self.document.characterCount() - 1)
+                cursor = QTextCursor(self.document)
+                cursor.setPosition(position)
+                cursor.setPosition(max(position, end), QTextCursor.KeepAnchor)
+                self.pending.append((position, removed, cursor.selection().toPlainText()))
+        if not self.suspended:
+            self.timer.start()
+
+    def suspend(self):
+        """Ignores the edits until resume(), which parses the whole text."""
+        self.suspended = True
+        self.timer.stop()
+        self.pending = []
+        self.reset = True
+
+    def resume(self):
+        self.suspended = False
+        self.timer.start()
+
+    def too_large(self):
+        return self.document.characterCount() - 1 > self.max_chars
+
+    def flush(self):
+        self.timer.stop()
+        if self.suspended or (not self.reset and not self.pending):
+            return
+        if self.parsing and not self.reset:  # the edits wait for the parse
+            return
+        if self.too_large():
+            self.dot.set_text("")
+            self.pending = []
+            self.reset = False
+            self.changed.emit()
+        elif self.reset:
+            self.reset = False
+            self.pending = []
+            self.generation += 1  # a parse in progress is abandoned
+            text = self.document.toPlainText()
+            if len(text) <= self.INLINE_CHARS:
+                self.parsing = False
+                self.dot = DotDocument(text)
+                self.changed.emit()
+            else:
+                self.parsing = True
+                threading.Thread(target=self.parse, args=(self.generation, text), daemon=True).start()
+        else:
+            self.apply_pending()
+            self.changed.emit()
+
+    def parse(self, generation, text):
+        """Runs in a worker thread."""
+        document = DotDocument(text, cancelled=lambda: generation != self.generation)
+        if generation == self.generation:
+            document.model()
+            self.parsed.emit(generation, document)
+
+    def on_parsed(self, generation, document):
+        if generation != self.generation:
+            return
+        self.parsing = False
+        if self.reset:  # replaced by a newer text meanwhile
+            self.flush()
+            return
+        self.dot = document
+        self.apply_pending()
+        self.changed.emit()
+
+    def apply_pending(self):
+        for position, removed, added in self.pending:
+            self.dot.apply_edit(position, removed, added)
+        self.pending = []
+        if len(self.dot.text) != self.document.characterCount() - 1:
+            self.reset = True
+            self.timer.start()
+
+    def model(self):
+        """GraphModel of the current text, or None while it is not known."""
+        self.flush()
+        if self.suspended or self.parsing or self.reset or self.too_large():
+            return None
+        return self.dot.model()
 
-    def mouseReleaseEvent(self, event):
-        self.offset = None
 
+# ---------------------------
+# Marcadores de erro na margem
+# ---------------------------
+class ErrorGutter(QWidget):
+    """Left margin of the editor with a marker on each line that has an error."""
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.color = QColor(CONFIG_EDITOR["error_color"])
+        self.setMouseTracking(True)
+
+    def block_at(self, y):
+        block = self.editor.firstVisibleBlock()
+        offset = self.editor.contentOffset()
+        while block.isValid():
+            geometry = self.editor.blockBoundingGeometry(block).translated(offset)
+            if geometry.top() > y:
+                break
+            if geometry.bottom() >= y:
+                return block
+            block = block.next()
+        return None
+
+    def paintEvent(self, event):
+        errors = self.editor.error_lines
+        if not errors:
+            return
+        painter = QPainter(self)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.color)
+        block = self.editor.firstVisibleBlock()
+        offset = self.editor.contentOffset()
+        size = self.width() - 2
+        while block.isValid():
+            geometry = self.editor.blockBoundingGeometry(block).translated(offset)
+            if geometry.top() > event.rect().bottom():
+                break
+            if block.blockNumber() in errors:
+                y = int(geometry.top() + (geometry.height() - size) / 2)
+                painter.drawEllipse(1, y, size, size)
+            block = block.next()
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        block = self.block_at(event.pos().y())
+        message = self.editor.error_lines.get(block.blockNumber(), "") if block else ""
+        self.setToolTip(message)
 
 
 # ---------------------------
@@ -244,6 +636,86 @@ class TextEditor(QPlainTextEdit):
         self.search_format = QTextCharFormat()
         self.search_format.setBackground(QColor("yellow"))
 
+        # Search highlights are ExtraSelections, so the document is never modified
+        self.search_text = ""
+        self.extra_selection_groups = {}
+        self.search_count = QLabel(self)
+        self.search_count.hide()
+        self.search_counter = SearchCounter(self.document())
+        self.search_counter.counted.connect(self.on_search_count)
+
+        # Refresh the highlights of the visible lines once per event loop pass
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(0)
+        self.search_timer.timeout.connect(self.update_search_selections)
+        self.verticalScrollBar().valueChanged.connect(self.refresh_search)
+        self.textChanged.connect(self.on_search_text_changed)
+
+        # Syntax errors: wavy underline plus a marker in the left margin
+        self.error_lines = {}  # block number -> message
+        self.error_format = QTextCharFormat()
+        self.error_format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+        self.error_format.setUnderlineColor(QColor(CONFIG_EDITOR["error_color"]))
+        self.error_gutter = ErrorGutter(self)
+        self.setViewportMargins(CONFIG_EDITOR["error_gutter_width"], 0, 0, 0)
+        self.updateRequest.connect(self.update_gutter)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rect = self.contentsRect()
+        self.error_gutter.setGeometry(rect.left(), rect.top(), CONFIG_EDITOR["error_gutter_width"], rect.height())
+        self.refresh_search()
+
+    def update_gutter(self, rect, dy):
+        if dy:
+            self.error_gutter.scroll(0, dy)
+        else:
+            self.error_gutter.update(0, rect.y(), self.error_gutter.width(), rect.height())
+
+    def set_errors(self, errors):
+        """
+        errors is a list of (position, message); each one is underlined
+        from its position to the end of the line.
+        """
+        document = self.document()
+        self.error_lines = {}
+        selections = []
+        for position, message in errors:
+            position = max(0, min(position, document.characterCount() - 1))
+            block = document.findBlock(position)
+            if not block.isValid():
+                continue
+            self.error_lines.setdefault(block.blockNumber(), message)
+
+            end = block.position() + len(block.text())
+            start = min(position, end)
+            if start == end:  # error at the end of the line: mark its last character
+                start = max(block.position(), end - 1)
+            cursor = QTextCursor(document)
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.format = self.error_format
+            selection.cursor = cursor
+            selections.append(selection)
+        self.set_extra_selections("errors", selections)
+        self.error_gutter.update()
+
+    def line_position(self, line):
+        """Position of the start of a 1-based line."""
+        block = self.document().findBlockByNumber(max(0, line - 1))
+        return block.position() if block.isValid() else 0
+
+    def refresh_search(self):
+        if self.search_text:
+            self.search_timer.start()
+
+    def on_search_text_changed(self):
+        if self.search_text:
+            self.search_timer.start()
+            self.search_counter.start(self.search_text)
+
     def wheelEvent(self, event):
         if event.modifiers() & Qt.ControlModifier:
             angle = event.angleDelta().y()
@@ -271,28 +743,89 @@ class TextEditor(QPlainTextEdit):
     def toggle_search_bar(self):
         if self.search_bar.isVisible():
             self.search_bar.hide()
+            self.search_count.hide()
             self.setFocus()
             self.highlight_search("")  # remove highlights
         else:
             self.search_bar.show()
+            self.search_count.move(self.search_bar.geometry().right() + 4, 0)
+            self.search_count.show()
             self.search_bar.setFocus()
 
+    def set_extra_selections(self, name, selections):
+        """Each feature owns a named group of ExtraSelections."""
+        self.extra_selection_groups[name] = selections
+        merged = []
+        for group in self.extra_selection_groups.values():
+            merged.extend(group)
+        self.setExtraSelections(merged)
+
     def highlight_search(self, text):
-        # Remove highlights anteriores
-        cursor = self.textCursor()
-        fmt_clear = QTextCharFormat()
-        cursor.select(cursor.Document)
-        cursor.setCharFormat(fmt_clear)
-        cursor.clearSelection()
+        self.search_text = text
+        self.update_search_selections()
+        self.search_counter.start(text)
 
+    def update_search_selections(self):
+        """Highlights the matches in the visible lines plus a margin."""
+        text = self.search_text
         if not text:
+            self.set_extra_selections("search", [])
             return
 
-        # Aplicar destaque
-        cursor = self.document().find(text, 0, QTextDocument.FindCaseSensitively)
-        while not cursor.isNull():
-            cursor.mergeCharFormat(self.search_format)
-            cursor = self.document().find(text, cursor.position(), QTextDocument.FindCaseSensitively)
+        margin = CONFIG_EDITOR["search_margin_lines"]
+        document = self.document()
+        first = self.firstVisibleBlock()
+        visible_lines = self.viewport().height() // max(1, self.fontMetrics().height()) + 1
+
+        start_block = document.findBlockByNumber(max(0, first.blockNumber() - margin))
+        end_block = document.findBlockByNumber(min(document.blockCount() - 1, first.blockNumber() + visible_lines + margin))
+
+        # Only the text of these blocks is searched, however far the next match is
+        selections = []
+        for position in self.find_in_blocks(text, start_block, end_block):
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + len(text), QTextCursor.KeepAnchor)
+            selection = QTextEdit.ExtraSelection()
+            selection.format = self.search_format
+            selection.cursor = cursor
+            selections.append(selection)
+        self.set_extra_selections("search", selections)
+
+    @staticmethod
+    def find_in_blocks(text, block, end_block, start=0):
+        """Yields the document positions of text in block..end_block, from offset start of the first block."""
+        last = end_block.blockNumber()
+        while block.isValid() and block.blockNumber() <= last:
+            line = block.text()
+            index = line.find(text, start)
+            while index >= 0:
+                yield block.position() + index
+                index = line.find(text, index + len(text))
+            block = block.next()
+            start = 0
+
+    def find_next(self, text):
+        """Selects the next match after the cursor, from the start of the document after the last one."""
+        document = self.document()
+        position = self.textCursor().position()
+        block = document.findBlock(position)
+        found = next(self.find_in_blocks(text, block, document.lastBlock(), position - block.position()), None)
+        if found is None:  # wraps around, up to the block of the cursor
+            found = next(self.find_in_blocks(text, document.firstBlock(), block), None)
+        if found is not None:
+            cursor = QTextCursor(document)
+            cursor.setPosition(found)
+            cursor.setPosition(found + len(text), QTextCursor.KeepAnchor)
+            self.setTextCursor(cursor)
+
+    def on_search_count(self, count, finished):
+        if not self.search_text:
+            self.search_count.setText("")
+            return
+        suffix = "" if finished else "+"
+        self.search_count.setText(f"{count}{suffix} {CONFIG_EDITOR['search_matches']}")
+        self.search_count.adjustSize()
 
     def eventFilter(self, obj, event):
         if hasattr(self, "search_bar") and obj == self.search_bar:
@@ -304,60 +837,662 @@ class TextEditor(QPlainTextEdit):
                     # Seleciona próxima ocorrência
                     text = self.search_bar.text()
                     if text:
-                        cursor = self.textCursor()
-                        pos = cursor.position()
-                        next_cursor = self.document().find(text, pos, QTextDocument.FindCaseSensitively)
-                        if not next_cursor.isNull():
-                            self.setTextCursor(next_cursor)
+                        self.find_next(text)
                     return True
         return super().eventFilter(obj, event)
 
 
+# ---------------------------
+# Document tab
+# ---------------------------
+class DocumentTab(QWidget):
+    """
+    One open DOT document: its editor, DOT model and viewers, with the state
+    of its loads and compilations. The toolbar, status bar and progress bar
+    belong to the MainWindow, which forwards its actions to the current tab;
+    compilations go through the CompileScheduler shared by every tab.
+    """
+    title_changed = pyqtSignal()
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.input_filepath = ""
+
+        # SVG of the last compilation, kept in memory
+        self.svg_data = b""
+
+        # Editor
+        self.editor = TextEditor()
+
+        # Large files: loaded in chunks in the background or shown in pages
+        self.loader = None
+        self.load_generation = 0
+        self.paged = None
+        self.page = 0
+
+        # Compilation state: only the result of the last generation is shown
+        self.thread = None
+        self.compiling = False
+        self.compile_generation = 0
+        self.compile_started = 0.0
+        self.layout_base = None  # positioned graph of the last layout, for style-only edits
+        self.progress_value = 0
+        self.progress_format = "%p%"
+
+        # Compilation settings of the document, shown in the toolbar while its
+        # tab is active; a new tab starts with those of the toolbar
+        self.engine = window.engine_combo.currentText()
+        self.live = window.live_action.isChecked()
+        self.split_components = window.components_action.isChecked()
+        self.scene = window.scene_action.isChecked()
+
+        # (dot_code, engine, split_components) of the graph on screen, to draw
+        # it again from the render cache after the viewers were freed
+        self.shown_source = None
+        self.evicted = False
+        self.last_active = 0
+
+        # A record of the timings waits for the viewer to finish
+        self.pending_metrics = None  # (viewer generation, record)
+
+        # Live compilation after a pause in editing
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(CONFIG["live_compile_delay_ms"])
+        self.live_timer.timeout.connect(self.compile_dot)
+        self.editor.textChanged.connect(self.on_text_changed)
+
+        self.highlighter = GraphvizHighlighter(self.editor.document(), CONFIG_EDITOR["syntax_rules"])
+        self.document_model = DocumentModel(
+            self.editor.document(),
+            delay_ms=CONFIG_EDITOR["parse_delay_ms"],
+            max_chars=CONFIG_EDITOR["parse_max_mb"]*1024*1024
+        )
+        self.document_model.changed.connect(self.refresh_errors)
+        self.viewer = SvgViewer(
+            tile_size=CONFIG["tile_size"],
+            max_tiles=CONFIG["tile_cache_tiles"],
+            error_message=CONFIG["error_loading_svg"],
+            highlight_color=CONFIG["highlight_color"],
+            minimap_size=CONFIG["minimap_size"]
+        )
+        self.scene_viewer = None  # created by make_scene_viewer()
+        self.viewer_stack = QStackedWidget()
+        self.viewer_stack.addWidget(self.viewer)
+        self.connect_viewer(self.viewer)
+
+        # Navigation between the drawing and the source
+        self.source_map = None
+        self.cursor_timer = QTimer(self)
+        self.cursor_timer.setSingleShot(True)
+        self.cursor_timer.setInterval(CONFIG_EDITOR["parse_delay_ms"])
+        self.cursor_timer.timeout.connect(self.highlight_cursor)
+        self.editor.cursorPositionChanged.connect(self.cursor_timer.start)
+
+        # Page navigation of the read-only paged view
+        self.page_bar = QWidget()
+        page_layout = QHBoxLayout()
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        self.previous_page_button = QPushButton(CONFIG["action_previous_page"])
+        self.previous_page_button.clicked.connect(lambda: self.show_page(self.page - 1))
+        self.next_page_button = QPushButton(CONFIG["action_next_page"])
+        self.next_page_button.clicked.connect(lambda: self.show_page(self.page + 1))
+        self.page_label = QLabel()
+        page_layout.addWidget(self.previous_page_button)
+        page_layout.addWidget(self.page_label, 1, Qt.AlignCenter)
+        page_layout.addWidget(self.next_page_button)
+        self.page_bar.setLayout(page_layout)
+        self.page_bar.hide()
+
+        editor_panel = QWidget()
+        editor_layout = QVBoxLayout()
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        editor_layout.addWidget(self.page_bar)
+        editor_layout.addWidget(self.editor)
+        editor_panel.setLayout(editor_layout)
+
+        splitter = QSplitter(Qt.Horizontal)
+        splitter.addWidget(editor_panel)
+        splitter.addWidget(self.viewer_stack)
+        splitter.setSizes([int(CONFIG["window_width"]/2), int(CONFIG["window_width"]-CONFIG["window_width"]/2)])
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    def is_current(self):
+        return self.window.current() is self
+
+    def title(self):
+        return os.path.basename(self.input_filepath) if self.input_filepath else CONFIG["untitled"]
+
+    def is_empty(self):
+        """True for a new tab that can take an opened file."""
+        return not self.input_filepath and not self.is_loading() and self.paged is None \
+            and self.editor.document().isEmpty()
+
+    def dot_code(self):
+        return self.paged.text() if self.paged is not None else self.editor.toPlainText()
+
+    def show_message(self, text, timeout=0):
+        """Status bar message, only shown while the tab is the current one."""
+        if self.is_current():
+            self.window.status.showMessage(text, timeout)
+
+    def set_progress(self, value):
+        self.progress_value = value
+        if self.is_current():
+            self.window.progress.setValue(value)
+
+    def show_phase(self, phase):
+        """Names the running layout phase in the progress bar."""
+        self.progress_format = "%p% " + phase
+        if self.is_current():
+            self.window.progress.setFormat(self.progress_format)
+
+    def reset_progress(self):
+        self.set_progress(0)
+        self.progress_format = "%p%"
+        if self.is_current():
+            self.window.progress.setFormat(self.progress_format)
+
+    def set_compiling(self, compiling):
+        self.compiling = compiling
+        self.window.update_actions()
+
+    # --------------------------------------------------------------------------
+    def activate(self, counter):
+        """Called when the tab becomes the current one."""
+        self.last_active = counter
+        self.window.progress.setValue(self.progress_value)
+        self.window.progress.setFormat(self.progress_format)
+        self.sync_viewer()
+
+    def connect_viewer(self, viewer):
+        viewer.timings.connect(self.record_metrics)
+        viewer.timings.connect(self.check_budget)
+        viewer.progress.connect(self.set_progress)
+        viewer.element_clicked.connect(self.show_source)
+
+    def make_scene_viewer(self):
+        """SceneViewer of the document, created when the Scene button first needs it."""
+        if self.scene_viewer is None:
+            from graphviz_code_viewer.modules.wsceneviewer import SceneViewer
+            self.scene_viewer = SceneViewer(
+                overview_size=CONFIG["scene_overview_size"],
+                error_message=CONFIG["error_loading_svg"],
+                highlight_color=CONFIG["highlight_color"],
+                minimap_size=CONFIG["minimap_size"]
+            )
+            self.viewer_stack.addWidget(self.scene_viewer)
+            self.connect_viewer(self.scene_viewer)
+        return self.scene_viewer
+
+    def viewers(self):
+        """The viewers created so far."""
+        return [viewer for viewer in (self.viewer, self.scene_viewer) if viewer is not None]
+
+    def memory_bytes(self):
+        """Approximate memory of the drawn graph (images, renderer, items and SVG)."""
+        return sum(viewer.memory_bytes() for viewer in self.viewers()) + len(self.svg_data)
+
+    def evict(self):
+        """Frees the images of the viewers; sync_viewer() draws the graph again."""
+        if self.shown_source is None or self.evicted:
+            return
+        for viewer in self.viewers():
+            viewer.release()
+        self.svg_data = b""
+        self.pending_metrics = None
+        self.evicted = True
+
+    def sync_viewer(self):
+        """Shows the viewer of the Scene button, and draws the graph again if it was evicted or drawn by the other."""
+        changed = self.viewer_stack.currentWidget() is not self.active_viewer()
+        self.viewer_stack.setCurrentWidget(self.active_viewer())
+        if self.evicted:
+            self.evicted = False
+            self.rebuild()
+        elif changed and self.svg_data:
+            self.compile_dot()
+
+    def rebuild(self):
+        """Compiles the source of the evicted graph again, usually a hit of the render cache."""
+        dot_code, engine, split_components = self.shown_source
+        self.start_compilation(dot_code, engine, split_components)
+
+    def check_budget(self, *args):
+        """A graph drawn in the background counts against the budget of the inactive tabs."""
+        if not self.is_current():
+            self.window.enforce_memory_budget()
+
+    def close_document(self):
+        """Stops the work of the document before its tab is removed."""
+        self.live_timer.stop()
+        self.cursor_timer.stop()
+        self.stop_compilation()
+        self.cancel_load()
+        self.close_paged()
+        for viewer in self.viewers():
+            viewer.shutdown()
+
+    # --------------------------------------------------------------------------
+    def record_metrics(self, generation, timings):
+        """Completes the record of a compilation when the viewer has drawn it."""
+        if self.pending_metrics is None or self.pending_metrics[0] != generation:
+            return
+        record = self.pending_metrics[1]
+        self.pending_metrics = None
+        record.update(timings)
+        record["total_s"] = time.perf_counter() - self.compile_started
+        self.window.add_metrics(record)
+
+    def active_viewer(self):
+        """SceneViewer or SvgViewer, as selected by the Scene button."""
+        return self.make_scene_viewer() if self.scene else self.viewer
+
+    def current_source_map(self):
+        """SourceMap of the current model, or None in the paged view or while parsing."""
+        model = self.document_model.model() if self.paged is None else None
+        if model is None:
+            return None
+        if self.source_map is None or self.source_map.model is not model:
+            self.source_map = SourceMap(self.document_model.dot.items, model)
+        return self.source_map
+
+    def show_source(self, key):
+        """Selects the statement of a clicked element in the editor."""
+        source_map = self.current_source_map()
+        span = source_map.span(key) if source_map is not None else None
+        if span is None:
+            return
+        cursor = self.editor.textCursor()
+        cursor.setPosition(span[0])
+        cursor.setPosition(span[1], QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+
+    def highlight_cursor(self):
+        """Highlights the elements of the statement under the cursor in the viewer."""
+        source_map = self.current_source_map()
+        if source_map is not None:
+            self.active_viewer().highlight(source_map.keys_at(self.editor.textCursor().position()))
+
+    # --------------------------------------------------------------------------
+    def load_dot(self, filepath):
+        self.cancel_load()
+        self.close_paged()
+        try:
+            size = os.path.getsize(filepath)
+            if CONFIG["paged_view_mb"] and size > CONFIG["paged_view_mb"]*1024*1024:
+                self.open_paged(filepath)
+            elif size > CONFIG["chunked_load_mb"]*1024*1024:
+                self.start_chunked_load(filepath)
+                return
+            else:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    content = f.read()
+                    self.editor.setPlainText(content)  # carrega o conteúdo no QPlainTextEdit
+                    self.attach_highlighter()
+            self.input_filepath=str(filepath)
+            self.title_changed.emit()
+            self.show_message(CONFIG["loaded_file"]+" "+self.input_filepath, 5000)
+        except Exception as e:
+            print(CONFIG["error_opening_dot_file"]+f"{e}")
+
+    def attach_highlighter(self):
+        """Highlights the document unless it is too large."""
+        document = self.editor.document()
+        if document.characterCount() > CONFIG["highlight_max_mb"]*1024*1024:
+            self.highlighter.setDocument(None)
+        elif self.highlighter.document() is None:
+            self.highlighter.setDocument(document)
+
+    def start_chunked_load(self, filepath):
+        """
+        Appends the file to the editor in chunks read by a FileLoadThread.
+        Highlighting, parsing and undo history wait for the end of the load.
+        """
+        self.load_generation += 1
+        self.editor.setReadOnly(True)
+        self.highlighter.setDocument(None)
+        self.document_model.suspend()
+        self.editor.document().setUndoRedoEnabled(False)
+        self.editor.clear()
+        self.input_filepath = str(filepath)
+        self.title_changed.emit()
+        self.show_message(CONFIG["loading_file"]+" "+self.input_filepath)
+
+        self.loader = FileLoadThread(filepath, self.load_generation, chunk_bytes=CONFIG["load_chunk_kb"]*1024)
+        self.loader.chunk.connect(self.append_chunk)
+        self.loader.progress.connect(self.set_progress)
+        self.loader.done.connect(self.on_load_done)
+        self.loader.start()
+
+    def append_chunk(self, generation, text):
+        loader = self.sender()
+        if generation == self.load_generation:
+            cursor = QTextCursor(self.editor.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(text)
+        loader.chunk_done()
+
+    def on_load_done(self, generation, error_msg):
+        loader = self.sender()
+        loader.wait()
+        if generation != self.load_generation:
+            return
+        self.loader = None
+        self.editor.setReadOnly(False)
+        self.editor.document().setUndoRedoEnabled(True)
+        self.attach_highlighter()
+        self.document_model.resume()
+        self.set_progress(0)
+        if error_msg:
+            print(CONFIG["error_opening_dot_file"]+error_msg)
+            self.show_message(CONFIG["error_opening_dot_file"]+" "+error_msg, 5000)
+        else:
+            self.show_message(CONFIG["loaded_file"]+" "+self.input_filepath, 5000)
+
+    def cancel_load(self):
+        if self.loader is not None:
+            self.load_generation += 1
+            self.loader.progress.disconnect()
+            self.loader.cancel()
+            self.loader.wait()
+            self.loader = None
+            self.editor.setReadOnly(False)
+            self.editor.document().setUndoRedoEnabled(True)
+            self.document_model.resume()
+            self.set_progress(0)
+
+    def is_loading(self):
+        return self.loader is not None
+
+    # --------------------------------------------------------------------------
+    def open_paged(self, filepath):
+        """Read-only view of one page at a time; compilation uses the whole file."""
+        self.paged = PagedFile(filepath, page_bytes=CONFIG["page_kb"]*1024)
+        self.document_model.suspend()
+        self.editor.setReadOnly(True)
+        self.page_bar.show()
+        self.show_page(0)
+
+    def show_page(self, index):
+        if self.paged is None:
+            return
+        self.page = max(0, min(index, self.paged.page_count() - 1))
+        self.editor.setPlainText(self.paged.page(self.page))
+        self.attach_highlighter()
+        self.page_label.setText(CONFIG["page_of"].format(page=self.page + 1, pages=self.paged.page_count()))
+        self.previous_page_button.setEnabled(self.page > 0)
+        self.next_page_button.setEnabled(self.page < self.paged.page_count() - 1)
+
+    def close_paged(self):
+        if self.paged is not None:
+            self.paged.close()
+            self.paged = None
+            self.page_bar.hide()
+            self.editor.setReadOnly(False)
+            self.document_model.resume()
+
+    def save_dot(self, from_input=True, exist_ok=True):
+        path=None
+        if from_input:
+            path = self.input_filepath
+
+        # Se o path foi fornecido e já existe, não sobrescreve
+        if path and os.path.exists(path) and exist_ok==False:
+            QMessageBox.warning(self.window, CONFIG["warning"], CONFIG["exist_dot_file"] + "\n" + path)
+            return
+
+        # Se path não foi fornecido ou não existe, abre diálogo para salvar
+        if not path or len(path)==0:
+            path, _ = QFileDialog.getSaveFileName(
+                self.window,
+                CONFIG["save_dot_file"],
+                "",
+                CONFIG["dot_file_dot"]
+            )
+
+            if not path:  # usuário cancelou
+                return
+
+        # Garantir que o arquivo termine com .dot
+        if not path.lower().endswith(".dot"):
+            path += ".dot"
+
+        try:
+            if self.paged is not None:  # the editor only holds one page
+                if os.path.abspath(path) != os.path.abspath(self.paged.path):
+                    shutil.copyfile(self.paged.path, path)
+                self.show_message(CONFIG["saved_file"]+" "+path, 5000)
+                return
+            with open(path, "w", encoding="utf-8") as f:
+                content = self.editor.toPlainText()
+                f.write(content)
+                self.show_message(CONFIG["saved_file"]+" "+path, 5000)
+        except Exception as e:
+            QMessageBox.critical(self.window, CONFIG["erro"], CONFIG["error_saving_file"]+"\n"+ e)
+
+        self.input_filepath = str(path)
+        self.title_changed.emit()
+
+    # --------------------------------------------------------------------------
+    def layout_engine(self, dot_code):
+        """Engine of the document; in auto mode, dot or sfdp by the size of the graph."""
+        engine = self.engine
+        if engine != "auto":
+            return engine
+        model = self.document_model.model() if self.paged is None else None
+        if model is not None:
+            nodes, edges = model.node_count(), model.edge_count()
+        else:  # no model yet: every edge operator is an edge
+            edges = dot_code.count("->") + dot_code.count("--")
+            nodes = edges
+        return auto_engine(nodes, edges, CONFIG["auto_engine_nodes"], CONFIG["auto_engine_edges"])
+
+    def drop_compilation(self, keep_place=False):
+        """
+        Makes the queued or running compilation stale; True if there was one.
+        With keep_place, a queued one stays in the queue to be replaced.
+        """
+        if self.thread is None:
+            return False
+        waiting = self.window.scheduler.is_waiting(self) if keep_place else self.window.scheduler.withdraw(self)
+        running = self.thread.isRunning()
+        if running:
+            self.thread.progress.disconnect()
+            self.thread.phase.disconnect()
+            self.thread.cancel()
+        self.thread = None
+        self.compile_generation += 1
+        return waiting or running
+
+    def stop_compilation(self):
+        """Kills the running compilation; its result is dropped as stale."""
+        if self.drop_compilation():
+            self.show_message(CONFIG["compilation_stopped"], 5000)
+        self.set_compiling(False)
+        self.reset_progress()
+
+    def on_text_changed(self):
+        if self.is_loading() or self.paged is not None:
+            return
+        if self.live:
+            self.live_timer.start()  # restart the idle delay
+
+    def show_syntax_errors(self, errors):
+        """errors is a list of (position, message); the first one goes to the status bar."""
+        self.editor.set_errors(errors)
+        if errors:
+            position, message = errors[0]
+            line = self.editor.document().findBlock(position).blockNumber() + 1
+            self.show_message(f"{CONFIG['syntax_error_in_line']} {line}: {message}", 10000)
+
+    def refresh_errors(self):
+        """Moves or removes the error markers after an edit."""
+        if self.editor.error_lines:
+            model = self.document_model.model()
+            if model is not None:
+                self.editor.set_errors(model.errors)
+
+    def compile_dot(self):
+        self.live_timer.stop()
+        if self.is_loading():
+            return
+        dot_code = self.dot_code()
+        self.reset_progress()
+
+        # A syntax error found in process costs no dot process; the model is
+        # also used by restyle, so preflight_check only decides whether it blocks
+        model = self.document_model.model()
+        if model is not None and CONFIG["preflight_check"]:
+            self.show_syntax_errors(model.errors)
+            if model.errors:
+                return
+            if model.warnings:  # accepted by Graphviz, so it is only reported
+                position, message = model.warnings[0]
+                line = self.editor.document().findBlock(position).blockNumber() + 1
+                self.show_message(f"{CONFIG['syntax_warning_in_line']} {line}: {message}", 10000)
+        else:
+            self.editor.set_errors([])
+
+        engine = self.layout_engine(dot_code)
+        if engine == "sfdp" and self.engine == "auto":
+            self.show_message(CONFIG["large_graph_engine"]+" sfdp", 5000)
+
+        if not CONFIG["restyle"] or self.paged is not None or (model is not None and model.errors):
+            model = None  # no positioned graph kept for a model that does not match the code
+        self.start_compilation(dot_code, engine, self.split_components, model=model)
+
+    def start_compilation(self, dot_code, engine, split_components, model=None):
+        """Queues a CompileThread in the shared scheduler; a newer revision makes the previous one stale."""
+        self.drop_compilation(keep_place=True)
+        self.compile_generation += 1
+        self.compile_started = time.perf_counter()
+        self.thread = CompileThread(
+            dot_code,
+            generation=self.compile_generation,
+            cache=self.window.render_cache,
+            engine=engine,
+            split_components=split_components,
+            jobs=CONFIG["component_jobs"],
+            timeout=CONFIG["compile_timeout_s"] or None,
+            memory_limit=CONFIG["compile_memory_mb"]*1024*1024 or None,
+            track_phases=CONFIG["layout_progress"],
+            model=model,
+            base=self.layout_base,
+            scene=self.scene
+        )
+        self.thread.progress.connect(self.set_progress)
+        self.thread.phase.connect(self.show_phase)
+        self.thread.finished.connect(self.show_image)
+        self.set_compiling(True)
+        self.window.scheduler.submit(self, self.thread)
+
+    def show_image(self, generation, data, error_msg):
+        thread = self.sender()
+        if generation != self.compile_generation:  # stale result
+            return
+        self.set_compiling(False)
+
+        if error_msg:  # deu erro
+            lines = error_lines(error_msg)
+            if lines:  # shown in the editor instead of a dialog
+                self.editor.set_errors([(self.editor.line_position(line), text) for line, text in lines])
+                self.show_message(CONFIG["error_compilation"]+" "+lines[0][1], 10000)
+            elif self.live:
+                self.show_message(CONFIG["error_compilation"]+" "+error_msg.strip(), 5000)
+            else:
+                QMessageBox.critical(None, CONFIG["error_compilation"], error_msg)
+        else:
+            if data:
+                self.svg_data = data
+                self.evicted = False
+                self.shown_source = (thread.dot_code, thread.engine, thread.split_components)
+                if thread.scene_data is not None:
+                    generation = self.make_scene_viewer().load_data(thread.scene_data)
+                else:
+                    generation = self.viewer.load_data(data)
+                record = {
+                    "graph": thread.graph,
+                    "source_bytes": len(thread.dot_code),
+                    "engine": thread.cache_engine,
+                    "version": graphviz_version(thread.engine),
+                    "from_cache": thread.from_cache,
+                    "phases": thread.phase_times
+                }
+                record.update(thread.timings)
+                self.pending_metrics = (generation, record)
+                if thread.layout_base is not None:
+                    self.layout_base = thread.layout_base
+                if thread.from_cache:
+                    self.show_message(CONFIG["loaded_from_cache"], 5000)
+                elif thread.restyled:
+                    self.show_message(CONFIG["restyled"], 5000)
+                elif thread.phase_times:  # where the layout time went
+                    self.show_message(CONFIG["layout_phases"]+" "+format_times(thread.phase_times), 10000)
+        self.reset_progress()
+
+
 # ---------------------------
 # Main Window
 # ---------------------------
 class MainWindow(QMainWindow):
     def __init__(self, filepath):
         super().__init__()
+        load_configs()
         self.setWindowTitle(about.__program_name__)
         self.resize(CONFIG["window_width"], CONFIG["window_height"])
-        
-        # input file path
-        if os.path.exists(filepath):
-            self.input_filepath=str(filepath)
-        else:
-            self.input_filepath=""
 
-        # Criar um arquivo temporário único para o SVG
-        temp_svg = tempfile.NamedTemporaryFile(delete=False, suffix=".svg")
-        self.temp_svg_path = temp_svg.name
-        temp_svg.close()  # fecha o arquivo, vamos escrever nele depois
+        # Files to open, one tab each
+        filepaths = [filepath] if isinstance(filepath, str) else list(filepath)
+
+        self.export_thread = None
+        self.formats_thread = None
+
+        # Cache of compiled images, shared by the tabs
+        self.render_cache = RenderCache(
+            max_memory_bytes=CONFIG["cache_memory_mb"]*1024*1024,
+            max_disk_bytes=CONFIG["cache_disk_mb"]*1024*1024
+        )
+
+        # Compilations of every tab, with at most compile_jobs Graphviz runs at a time
+        self.scheduler = CompileScheduler(CONFIG["compile_jobs"], self)
+        self.activations = 0
 
 
         ## Icon
         # Get base directory for icons
         base_dir_path = os.path.dirname(os.path.abspath(__file__))
         self.icon_path = os.path.join(base_dir_path, 'icons', 'logo.png')
-        self.setWindowIcon(QIcon(self.icon_path)) 
-        
+        self.setWindowIcon(QIcon(self.icon_path))
+
 
         # Toolbar
         self.func_toolbar()
 
 
-        # Criar status bar 
+        # Criar status bar
         self.status = self.statusBar()
-        
-        # Editor e visualizador
-        self.editor = TextEditor()
 
-        self.highlighter = GraphvizHighlighter(self.editor.document(), CONFIG_EDITOR["syntax_rules"])
-        self.viewer = SvgViewer()
-
-        splitter = QSplitter(Qt.Horizontal)
-        splitter.addWidget(self.editor)
-        splitter.addWidget(self.viewer)
-        splitter.setSizes([int(CONFIG["window_width"]/2), int(CONFIG["window_width"]-CONFIG["window_width"]/2)])
+        # Timings of the compilations of every tab
+        self.metrics = MetricsHistory(os.path.join(CACHE_DIR, "metrics.json"), max_records=CONFIG["metrics_history"])
+        self.metrics_window = None
+        QApplication.instance().aboutToQuit.connect(self.metrics.save)
+        QApplication.instance().aboutToQuit.connect(self.cancel_exports)
+        QApplication.instance().aboutToQuit.connect(self.scheduler.shutdown)
+
+        # Documents
+        self.tabs = QTabWidget()
+        self.tabs.setDocumentMode(True)
+        self.tabs.setMovable(True)
+        self.tabs.setTabsClosable(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         # Barra de progresso
         self.progress = QProgressBar()
@@ -366,14 +1501,17 @@ class MainWindow(QMainWindow):
         # Layout central
         central = QWidget()
         layout = QVBoxLayout()
-        layout.addWidget(splitter)
+        layout.addWidget(self.tabs)
         layout.addWidget(self.progress)
         central.setLayout(layout)
         self.setCentralWidget(central)
-        
-        if os.path.exists(self.input_filepath):
-            self.load_dot(filepath=self.input_filepath)
-            
+
+        for path in filepaths:
+            if os.path.exists(path):
+                self.open_tab(path)
+        if self.tabs.count() == 0:
+            self.new_tab()
+
         save_shortcut = QShortcut(QKeySequence(CONFIG_EDITOR["save_file"]), self)
         save_shortcut.activated.connect(lambda: self.save_dot(from_input=True, exist_ok=True))
 
@@ -381,20 +1519,66 @@ class MainWindow(QMainWindow):
         toolbar = QToolBar()
         self.addToolBar(toolbar)
         toolbar.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextUnderIcon)
-        
-        
+
+
         # Compile
         compile_action = QAction(QIcon.fromTheme("media-playback-start"),CONFIG["action_compile"], self)
         compile_action.setToolTip(CONFIG["action_compile_tooltip"])
         compile_action.triggered.connect(self.compile_dot)
         toolbar.addAction(compile_action)
-        
+
+        # Live compile
+        self.live_action = QAction(QIcon.fromTheme("view-refresh"), CONFIG["action_live"], self)
+        self.live_action.setToolTip(CONFIG["action_live_tooltip"])
+        self.live_action.setCheckable(True)
+        self.live_action.setChecked(CONFIG["live_compile"])
+        self.live_action.toggled.connect(self.on_live_toggled)
+        toolbar.addAction(self.live_action)
+
+        # Parallel layout of connected components
+        self.components_action = QAction(QIcon.fromTheme("view-grid"), CONFIG["action_components"], self)
+        self.components_action.setToolTip(CONFIG["action_components_tooltip"])
+        self.components_action.setCheckable(True)
+        self.components_action.setChecked(CONFIG["split_components"])
+        self.components_action.toggled.connect(self.on_components_toggled)
+        toolbar.addAction(self.components_action)
+
+        # Viewer backend
+        self.scene_action = QAction(QIcon.fromTheme("applications-graphics"), CONFIG["action_scene"], self)
+        self.scene_action.setToolTip(CONFIG["action_scene_tooltip"])
+        self.scene_action.setCheckable(True)
+        self.scene_action.setChecked(CONFIG["viewer_backend"] == "scene")
+        self.scene_action.toggled.connect(self.on_scene_toggled)
+        toolbar.addAction(self.scene_action)
+
+        # Layout engine
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(("auto",) + ENGINES)
+        self.engine_combo.setToolTip(CONFIG["engine_tooltip"])
+        if self.engine_combo.findText(CONFIG["engine"]) >= 0:
+            self.engine_combo.setCurrentText(CONFIG["engine"])
+        self.engine_combo.currentTextChanged.connect(self.on_engine_changed)
+        toolbar.addWidget(self.engine_combo)
+
+        # Stop
+        self.stop_action = QAction(QIcon.fromTheme("process-stop"), CONFIG["action_stop"], self)
+        self.stop_action.setToolTip(CONFIG["action_stop_tooltip"])
+        self.stop_action.triggered.connect(self.stop_compilation)
+        self.stop_action.setEnabled(False)
+        toolbar.addAction(self.stop_action)
+
+        # New
+        new_action = QAction(QIcon.fromTheme("document-new"), CONFIG["action_new"], self)
+        new_action.setToolTip(CONFIG["action_new_tooltip"])
+        new_action.triggered.connect(self.new_tab)
+        toolbar.addAction(new_action)
+
         # Load
         load_action = QAction(QIcon.fromTheme("document-open"),CONFIG["action_open"], self)
         load_action.setToolTip(CONFIG["action_open_tooltip"])
         load_action.triggered.connect(lambda: self.load_dot(filepath=""))
         toolbar.addAction(load_action)
-        
+
         # Save
         save_action = QAction(QIcon.fromTheme("document-save"),CONFIG["action_save"], self)
         save_action.setToolTip(CONFIG["action_save_tooltip"])
@@ -412,7 +1596,24 @@ class MainWindow(QMainWindow):
         save_image_action.setToolTip(CONFIG["action_saveimg_tooltip"])
         save_image_action.triggered.connect(self.save_image)
         toolbar.addAction(save_image_action)
+
+        # Export to several formats
+        export_action = QAction(QIcon.fromTheme("document-export"), CONFIG["action_export"], self)
+        export_action.setToolTip(CONFIG["action_export_tooltip"])
+        export_action.triggered.connect(self.export_formats)
+        toolbar.addAction(export_action)
         
+        # Clear cache
+        clear_cache_action = QAction(QIcon.fromTheme("edit-clear"), CONFIG["action_clear_cache"], self)
+        clear_cache_action.setToolTip(CONFIG["action_clear_cache_tooltip"])
+        clear_cache_action.triggered.connect(self.clear_render_cache)
+        toolbar.addAction(clear_cache_action)
+
+        # Metrics
+        metrics_action = QAction(QIcon.fromTheme("utilities-system-monitor"), CONFIG["action_metrics"], self)
+        metrics_action.setToolTip(CONFIG["action_metrics_tooltip"])
+        metrics_action.triggered.connect(self.open_metrics)
+        toolbar.addAction(metrics_action)
 
         # Adicionar o espaçador
         spacer = QWidget()
@@ -459,6 +1660,7 @@ class MainWindow(QMainWindow):
             subprocess.run(['xdg-open', CONFIG_PATH])
 
     def open_about(self):
+        from graphviz_code_viewer.modules.wabout import show_about_window
         data={
             "version": about.__version__,
             "package": about.__package__,
@@ -473,45 +1675,143 @@ class MainWindow(QMainWindow):
         }
         show_about_window(data,self.icon_path)
 
-    def save_image(self):
-        # Verifica se existe uma imagem carregada
-        if not self.viewer.renderer or not self.viewer.renderer.isValid():
-            QMessageBox.warning(self, CONFIG["warning"], CONFIG["no_image_available"])
+    def open_metrics(self):
+        from graphviz_code_viewer.modules.wmetrics import MetricsWindow
+        if self.metrics_window is None:
+            self.metrics_window = MetricsWindow(self.metrics, CONFIG, self)
+        self.metrics_window.refresh()
+        self.metrics_window.show()
+        self.metrics_window.raise_()
+
+    def add_metrics(self, record):
+        self.metrics.add(record)
+        if self.metrics_window is not None and self.metrics_window.isVisible():
+            self.metrics_window.refresh()
+
+    def clear_render_cache(self):
+        stats = self.render_cache.stats()
+        self.render_cache.clear()
+        self.status.showMessage(
+            CONFIG["cache_cleared"]+" "+
+            f"(hits: {stats['memory_hits']+stats['disk_hits']}, misses: {stats['misses']})",
+            5000
+        )
+
+    # --------------------------------------------------------------------------
+    def current(self):
+        """DocumentTab on screen."""
+        return self.tabs.currentWidget()
+
+    def document_tabs(self):
+        return [self.tabs.widget(i) for i in range(self.tabs.count())]
+
+    def new_tab(self):
+        tab = DocumentTab(self)
+        tab.title_changed.connect(lambda: self.update_tab_title(tab))
+        self.tabs.setCurrentIndex(self.tabs.addTab(tab, tab.title()))
+        return tab
+
+    def open_tab(self, filepath):
+        """Shows the tab of filepath, loading it in the current tab if that one is empty, or in a new one."""
+        for tab in self.document_tabs():
+            if tab.input_filepath and os.path.abspath(tab.input_filepath) == os.path.abspath(filepath):
+                self.tabs.setCurrentWidget(tab)
+                return
+        tab = self.current()
+        if tab is None or not tab.is_empty():
+            tab = self.new_tab()
+        tab.load_dot(filepath)
+
+    def close_tab(self, index):
+        tab = self.tabs.widget(index)
+        tab.close_document()
+        self.tabs.removeTab(index)
+        tab.deleteLater()
+        if self.tabs.count() == 0:
+            self.new_tab()
+
+    def update_tab_title(self, tab):
+        index = self.tabs.indexOf(tab)
+        if index >= 0:
+            self.tabs.setTabText(index, tab.title())
+            self.tabs.setTabToolTip(index, tab.input_filepath)
+
+    def on_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        if tab is None:
             return
+        self.activations += 1
+        self.status.clearMessage()
+        self.sync_toolbar(tab)
+        tab.activate(self.activations)
+        self.update_actions()
+        self.enforce_memory_budget()
+
+    def sync_toolbar(self, tab):
+        """Shows the compilation settings of tab, without the effects of changing them."""
+        widgets = (self.engine_combo, self.live_action, self.components_action, self.scene_action)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.engine_combo.setCurrentText(tab.engine)
+        self.live_action.setChecked(tab.live)
+        self.components_action.setChecked(tab.split_components)
+        self.scene_action.setChecked(tab.scene)
+        for widget in widgets:
+            widget.blockSignals(False)
+
+    def update_actions(self):
+        tab = self.current()
+        self.stop_action.setEnabled(tab is not None and tab.compiling)
+
+    def enforce_memory_budget(self):
+        """
+        Frees the drawn graphs of the least recently used inactive tabs until
+        the others fit in inactive_tabs_mb; they are drawn again from the
+        render cache when their tab is shown.
+        """
+        budget = CONFIG["inactive_tabs_mb"]*1024*1024
+        current = self.current()
+        inactive = sorted((tab for tab in self.document_tabs() if tab is not current), key=lambda tab: tab.last_active)
+        sizes = [tab.memory_bytes() for tab in inactive]
+        total = sum(sizes)
+        for tab, size in zip(inactive, sizes):
+            if total <= budget:
+                break
+            if size:
+                tab.evict()
+                total -= size
+
+    # --------------------------------------------------------------------------
+    def compile_dot(self):
+        self.current().compile_dot()
 
-        # Pergunta onde salvar
-        path, _ = QFileDialog.getSaveFileName(
-            self,
-            CONFIG["save_image"],
-            "",
-            "SVG File (*.svg);;PNG File (*.png)"
-        )
+    def stop_compilation(self):
+        self.current().stop_compilation()
 
-        if not path:
-            return  # cancelado
+    # The toolbar settings belong to the current tab
+    def on_live_toggled(self, checked):
+        tab = self.current()
+        tab.live = checked
+        if checked:
+            tab.compile_dot()
+        else:
+            tab.live_timer.stop()
 
-        # Se for PNG, renderizar e salvar
-        if path.lower().endswith(".png"):
-            size = self.viewer.renderer.defaultSize()
-            pixmap = QPixmap(size)
-            pixmap.fill(Qt.transparent)
-            painter = QPainter(pixmap)
-            self.viewer.renderer.render(painter)
-            painter.end()
-            pixmap.save(path, "PNG")
-        else:  # SVG
-            # Copia o arquivo temporário para o destino
+    def on_engine_changed(self, engine):
+        tab = self.current()
+        tab.engine = engine
+        if tab.live:
+            tab.compile_dot()
 
-            
-            if not path.lower().endswith(".svg"):
-                path = path + ".svg"
-            shutil.copyfile(self.temp_svg_path, path)
+    def on_components_toggled(self, checked):
+        self.current().split_components = checked
 
-        self.status.showMessage(CONFIG["image_save_in"]+" "+path, 5000)
+    def on_scene_toggled(self, checked):
+        tab = self.current()
+        tab.scene = checked
+        tab.sync_viewer()
 
-        
     def load_dot(self, filepath=""):
-        
         if not os.path.exists(filepath):
             # Abre uma caixa de diálogo para selecionar arquivos .dot
             filepath, _ = QFileDialog.getOpenFileName(
@@ -522,106 +1822,158 @@ class MainWindow(QMainWindow):
             )
 
         if filepath:
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    self.editor.setPlainText(content)  # carrega o conteúdo no QPlainTextEdit
-                    self.input_filepath=str(filepath)
-                    self.status.showMessage(CONFIG["loaded_file"]+" "+self.input_filepath, 5000)
-            except Exception as e:
-                print(CONFIG["error_opening_dot_file"]+f"{e}")
+            self.open_tab(filepath)
 
     def save_dot(self, from_input=True, exist_ok=True):
-        path=None
-        if from_input:
-            path = self.input_filepath
-        
-        # Se o path foi fornecido e já existe, não sobrescreve
-        if path and os.path.exists(path) and exist_ok==False:
-            QMessageBox.warning(self, CONFIG["warning"], CONFIG["exist_dot_file"] + "\n" + path)
+        self.current().save_dot(from_input=from_input, exist_ok=exist_ok)
+
+    def save_image(self):
+        tab = self.current()
+        # Verifica se existe uma imagem carregada
+        if not tab.active_viewer().has_image() or not tab.svg_data:
+            QMessageBox.warning(self, CONFIG["warning"], CONFIG["no_image_available"])
             return
 
-        # Se path não foi fornecido ou não existe, abre diálogo para salvar
-        if not path or len(path)==0:
-            path, _ = QFileDialog.getSaveFileName(
-                self,
-                CONFIG["save_dot_file"],
-                "",
-                CONFIG["dot_file_dot"]
-            )
+        # Pergunta onde salvar
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            CONFIG["save_image"],
+            "",
+            "SVG File (*.svg);;PNG File (*.png);;TIFF File (*.tif *.tiff)"
+        )
 
-            if not path:  # usuário cancelou
-                return
+        if not path:
+            return  # cancelado
 
-        # Garantir que o arquivo termine com .dot
-        if not path.lower().endswith(".dot"):
-            path += ".dot"
+        # PNG and TIFF are rendered in strips in the background
+        if path.lower().endswith((".png", ".tif", ".tiff")):
+            dpi, ok = QInputDialog.getInt(self, CONFIG["save_image"], CONFIG["export_dpi_label"],
+                                          CONFIG["export_dpi"], 1, CONFIG["export_max_dpi"])
+            if ok:
+                self.export_image(tab.svg_data, path, dpi)
+            return
 
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                content = self.editor.toPlainText()
-                f.write(content)
-                self.status.showMessage(CONFIG["saved_file"]+" "+path, 5000)
-        except Exception as e:
-            QMessageBox.critical(self, CONFIG["erro"], CONFIG["error_saving_file"]+"\n"+ e)
-        
-        self.input_filepath = str(path)
-            
-    def compile_dot(self):
-        dot_code = self.editor.toPlainText()
-        self.progress.setValue(0)
+        if not path.lower().endswith(".svg"):
+            path = path + ".svg"
+        with open(path, "wb") as f:
+            f.write(tab.svg_data)
 
-        self.thread = CompileThread(dot_code, self.temp_svg_path)
-        self.thread.progress.connect(self.progress.setValue)
-        self.thread.finished.connect(self.show_image)
-        self.thread.start()
+        self.status.showMessage(CONFIG["image_save_in"]+" "+path, 5000)
 
-    def show_image(self, path, error_msg):
-        if error_msg:  # deu erro
-            QMessageBox.critical(None, CONFIG["error_compilation"], error_msg)
+    def export_formats(self):
+        tab = self.current()
+        if self.formats_thread is not None and self.formats_thread.isRunning():
+            return
+        if tab.is_loading():
+            return
+        path, _ = QFileDialog.getSaveFileName(self, CONFIG["action_export"], os.path.splitext(tab.input_filepath)[0])
+        if not path:
+            return
+        text, ok = QInputDialog.getText(self, CONFIG["action_export"], CONFIG["export_formats_label"],
+                                        text=CONFIG["export_formats"])
+        formats = [fmt.strip().lower() for fmt in text.split(",") if fmt.strip()]
+        if not ok or not formats:
+            return
+
+        dot_code = tab.dot_code()
+        self.formats_thread = ExportFormatsThread(
+            dot_code,
+            os.path.splitext(path)[0],
+            formats,
+            engine=tab.layout_engine(dot_code),
+            split_components=tab.split_components,
+            jobs=CONFIG["component_jobs"],
+            timeout=CONFIG["compile_timeout_s"] or None,
+            memory_limit=CONFIG["compile_memory_mb"]*1024*1024 or None
+        )
+        self.formats_thread.finished.connect(self.on_formats_exported)
+        self.status.showMessage(CONFIG["exporting"]+" "+", ".join(formats))
+        self.formats_thread.start()
+
+    def on_formats_exported(self, paths, error_msg):
+        self.formats_thread.wait()
+        self.formats_thread = None
+        if error_msg:
+            QMessageBox.critical(self, CONFIG["error_compilation"], error_msg)
         else:
-            if path:
-                self.viewer.load_image(path)
+            self.status.showMessage(CONFIG["image_save_in"]+" "+paths, 10000)
+
+    def cancel_image_export(self):
+        """Stops a running image export; its partial file is removed."""
+        if self.export_thread is not None and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_thread.wait()
+
+    def cancel_exports(self):
+        self.cancel_image_export()
+        if self.formats_thread is not None and self.formats_thread.isRunning():
+            self.formats_thread.finished.disconnect()
+            self.formats_thread.cancel()
+            self.formats_thread.wait()
+            self.formats_thread = None
+
+    def export_image(self, svg_data, path, dpi):
+        from graphviz_code_viewer.modules.image_export import ImageExportThread
+        self.cancel_image_export()
+        self.export_thread = ImageExportThread(svg_data, path, dpi=dpi)
+        self.export_thread.progress.connect(self.progress.setValue)
+        self.export_thread.done.connect(self.on_image_exported)
+        self.status.showMessage(CONFIG["saving_image"]+" "+path)
+        self.export_thread.start()
+
+    def on_image_exported(self, path, error_msg):
+        thread = self.sender()
+        if thread is not self.export_thread:  # replaced by a newer export
+            return
+        thread.wait()
+        self.export_thread = None
         self.progress.setValue(0)
+        if thread.cancelled:
+            self.status.clearMessage()
+        elif error_msg:
+            QMessageBox.critical(self, CONFIG["error"], CONFIG["error_saving_image"]+"\n"+path+"\n"+error_msg)
+        else:
+            self.status.showMessage(CONFIG["image_save_in"]+" "+path, 5000)
+
 # ---------------------------
 # Run
 # ---------------------------
+def install_desktop_files(desktop_path, overwrite=False):
+    from graphviz_code_viewer.desktop import create_desktop_file, create_desktop_directory, create_desktop_menu
+    create_desktop_directory(overwrite=overwrite)
+    create_desktop_menu(overwrite=overwrite)
+    create_desktop_file(desktop_path, overwrite=overwrite)
+
 def main():
     signal.signal(signal.SIGINT, signal.SIG_DFL)
-    
-    create_desktop_directory()    
-    create_desktop_menu()
-    create_desktop_file('~/.local/share/applications')
-    
-    filepath = ""
-    if(len(sys.argv)==2):
-        if sys.argv[1] == "--autostart":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file('~/.config/autostart', overwrite=True)
-            return
-            
-        if sys.argv[1] == "--applications":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file('~/.local/share/applications', overwrite=True)
-            return
-
-        if os.path.exists(sys.argv[1]):
-            filepath = sys.argv[1]
-    else:
-        for n in range(len(sys.argv)):
-            if sys.argv[n] == "--autostart":
-                create_desktop_directory(overwrite = True)
-                create_desktop_menu(overwrite = True)
-                create_desktop_file('~/.config/autostart', overwrite=True)
-                return
-            if sys.argv[n] == "--applications":
-                create_desktop_directory(overwrite = True)
-                create_desktop_menu(overwrite = True)
-                create_desktop_file('~/.local/share/applications', overwrite=True)
-                return
 
+    # Headless batch mode: graphviz-code-viewer render <dir|files> ...
+    if len(sys.argv) >= 2 and sys.argv[1] == "render":
+        import graphviz_code_viewer.modules.batch as batch
+        sys.exit(batch.main(sys.argv[2:]))
+
+    # Render server: graphviz-code-viewer --serve [--port N | --socket PATH] ...
+    if "--serve" in sys.argv[1:]:
+        import graphviz_code_viewer.modules.server as server
+        sys.exit(server.main([arg for arg in sys.argv[1:] if arg != "--serve"]))
+
+    # Desktop integration on request
+    if "--autostart" in sys.argv[1:]:
+        install_desktop_files('~/.config/autostart', overwrite=True)
+        return
+    if "--applications" in sys.argv[1:]:
+        install_desktop_files('~/.local/share/applications', overwrite=True)
+        return
+
+    # and once after install, when the menu entry does not exist yet
+    desktop_file = os.path.expanduser(os.path.join('~/.local/share/applications', about.__program_name__ + ".desktop"))
+    if not os.path.exists(desktop_file):
+        install_desktop_files('~/.local/share/applications')
+
+    # Each file of the command line opens in its own tab
+    filepath = [path for path in sys.argv[1:] if os.path.exists(path)]
+
+    load_configs()
     app = QApplication(sys.argv)
     app.setApplicationName(about.__package__) 
     
@@ -0,0 +1,16 @@
+import os
+import sys
+import pathlib
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.resolve() / "src"))
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """The QApplication of the tests that paint or run Qt threads."""
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from graphviz_code_viewer.modules.dot_parser import DotDocument, parse, parse_items
+
+SOURCE = """digraph G {
+    rankdir=LR;
+    node [shape=box, color="red"];
+    a -> b [label="a \\"quoted\\" label"];
+    /* block
+       comment */
+    subgraph cluster_x {
+        label=<<b>HTML</b> label>;
+        c; d -> e;
+    }
+    a -> subgraph s { f -> g }
+    // line comment
+    h [label="multi
+line"];
+}
+"""
+
+EDITS = [
+    (SOURCE.index("a -> b"), 0, "x -> y;\n"),          # new statement
+    (SOURCE.index("box"), 3, "ellipse"),               # attribute value
+    (SOURCE.index("/* block"), 0, "/*"),               # opens a comment over the rest
+    (SOURCE.index("cluster_x {") + 10, 1, ""),         # drops a brace
+    (SOURCE.index("multi"), 0, "\""),                  # closes the string early
+    (SOURCE.index("<b>"), 1, ""),                      # unbalanced HTML label
+    (len(SOURCE) - 2, 1, ""),                          # drops the last brace
+    (0, len(SOURCE), "graph { a -- b }"),              # whole text
+]
+
+
+def items_of(items):
+    return list(zip(items.starts, items.ends, items.kinds, items.payloads))
+
+
+def model_of(model):
+    edges = [(model.node_names[t], model.node_names[h]) for t, h in zip(model.edge_tail, model.edge_head)]
+    return model.node_names, edges, model.edge_attrs, model.node_attrs, model.errors, model.warnings
+
+
+def assert_fresh(document):
+    assert items_of(document.items) == items_of(parse_items(document.text))
+    assert model_of(document.model()) == model_of(parse(document.text))
+
+
+@pytest.mark.parametrize("position, removed, added", EDITS)
+def test_edit_equals_fresh_parse(position, removed, added):
+    document = DotDocument(SOURCE)
+    document.model()
+    document.apply_edit(position, removed, added)
+    assert document.text == SOURCE[:position] + added + SOURCE[position + removed:]
+    assert_fresh(document)
+
+
+def test_edit_and_undo():
+    document = DotDocument(SOURCE)
+    position = SOURCE.index("c; d")
+    document.apply_edit(position, 0, "{")
+    assert_fresh(document)
+    document.apply_edit(position, 1, "")
+    assert document.text == SOURCE
+    assert_fresh(document)
+
+
+def test_random_edits():
+    rng = random.Random(1)
+    pieces = ["a", " -> ", ";", "\n", "[", "]", "{", "}", "\"", "=", "<", ">", "/*", "*/", "//", "color=red"]
+    document = DotDocument(SOURCE)
+    for _ in range(300):
+        position = rng.randrange(len(document.text) + 1)
+        removed = rng.randrange(4)
+        added = "".join(rng.choice(pieces) for _ in range(rng.randrange(3)))
+        document.apply_edit(position, removed, added)
+        assert_fresh(document)
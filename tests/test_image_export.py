@@ -0,0 +1,109 @@
+import struct
+import zlib
+
+import pytest
+
+pytest.importorskip("PyQt5.QtSvg")
+
+from PyQt5.QtGui import QImage, QColor
+
+from graphviz_code_viewer.modules.image_export import ImageExportThread
+
+# Red top half and blue bottom half, 40x30 points
+SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" width="40pt" height="30pt" viewBox="0 0 40 30">
+<rect x="0" y="0" width="40" height="15" fill="#ff0000"/>
+<rect x="0" y="15" width="40" height="15" fill="#0000ff"/>
+</svg>"""
+
+RED = (255, 0, 0, 255)
+BLUE = (0, 0, 255, 255)
+
+
+def export(qapp, path, dpi):
+    errors = []
+    thread = ImageExportThread(SVG, str(path), dpi=dpi, strip_bytes=80*4*7)  # several strips
+    thread.done.connect(lambda _, error: errors.append(error))
+    thread.run()
+    assert errors == [""]
+
+
+def read_png(path):
+    """(width, height, rows of RGBA bytes) of a PNG written by PngWriter."""
+    data = path.read_bytes()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos = 8
+    chunks = []
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        crc, = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(body, zlib.crc32(kind))
+        chunks.append((kind, body))
+        pos += 12 + length
+    assert chunks[0][0] == b"IHDR" and chunks[-1][0] == b"IEND"
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[0][1][:10])
+    assert (depth, color_type) == (8, 6)
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    stride = width * 4 + 1
+    assert len(raw) == height * stride
+    assert all(raw[row * stride] == 0 for row in range(height))
+    return width, height, [raw[row * stride + 1:(row + 1) * stride] for row in range(height)]
+
+
+def read_tiff(path):
+    """(width, height, rows of RGBA bytes) of a TIFF written by TiffWriter."""
+    data = path.read_bytes()
+    assert data[:4] == b"II*\x00"
+    ifd, = struct.unpack("<I", data[4:8])
+    count, = struct.unpack("<H", data[ifd:ifd + 2])
+    tags = {}
+    for i in range(count):
+        tag, kind, n, value = struct.unpack("<HHII", data[ifd + 2 + 12*i:ifd + 14 + 12*i])
+        size = {3: 2, 4: 4, 5: 8}[kind] * n
+        fmt = {3: "H", 4: "I", 5: "II"}[kind] * n
+        raw = data[ifd + 10 + 12*i:ifd + 10 + 12*i + size] if size <= 4 else data[value:value + size]
+        tags[tag] = struct.unpack("<" + fmt, raw)
+    width, height = tags[256][0], tags[257][0]
+    assert tags[258] == (8, 8, 8, 8) and tags[259] == (8,) and tags[277] == (4,)
+    pixels = b"".join(zlib.decompress(data[offset:offset + size]) for offset, size in zip(tags[273], tags[279]))
+    assert len(pixels) == width * height * 4
+    rows = [pixels[row * width * 4:(row + 1) * width * 4] for row in range(height)]
+    return width, height, rows, tags
+
+
+def pixel(rows, x, y):
+    return tuple(rows[y][x * 4:x * 4 + 4])
+
+
+def test_png(qapp, tmp_path):
+    path = tmp_path / "graph.png"
+    export(qapp, path, dpi=144)
+    width, height, rows = read_png(path)
+    assert (width, height) == (80, 60)
+    assert pixel(rows, 10, 5) == RED and pixel(rows, 70, 25) == RED
+    assert pixel(rows, 10, 35) == BLUE and pixel(rows, 70, 55) == BLUE
+
+    image = QImage(str(path))
+    assert image.size().width() == 80 and image.size().height() == 60
+    assert image.pixelColor(40, 50) == QColor(0, 0, 255)
+
+
+def test_tiff(qapp, tmp_path):
+    path = tmp_path / "graph.tiff"
+    export(qapp, path, dpi=144)
+    width, height, rows, tags = read_tiff(path)
+    assert (width, height) == (80, 60)
+    assert len(tags[273]) > 1  # written in strips
+    assert tags[282] == (144000, 1000)
+    assert pixel(rows, 10, 5) == RED and pixel(rows, 70, 25) == RED
+    assert pixel(rows, 10, 35) == BLUE and pixel(rows, 70, 55) == BLUE
+
+
+def test_invalid_svg_removes_the_file(qapp, tmp_path):
+    path = tmp_path / "graph.png"
+    errors = []
+    thread = ImageExportThread(b"not svg", str(path))
+    thread.done.connect(lambda _, error: errors.append(error))
+    thread.run()
+    assert errors == ["invalid SVG"]
+    assert not path.exists()
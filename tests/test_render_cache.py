@@ -0,0 +1,66 @@
+import os
+
+from graphviz_code_viewer.modules.render_cache import RenderCache, make_key
+
+
+def test_key_depends_on_every_part():
+    key = make_key("digraph { a }", "dot", "svg", version="1")
+    assert key == make_key("digraph { a }", "dot", "svg", version="1")
+    assert key != make_key("digraph { b }", "dot", "svg", version="1")
+    assert key != make_key("digraph { a }", "neato", "svg", version="1")
+    assert key != make_key("digraph { a }", "dot", "png", version="1")
+    assert key != make_key("digraph { a }", "dot", "svg", version="2")
+
+
+def test_memory_lru(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_bytes=30, max_disk_bytes=0)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    cache.put("c", b"c" * 10)
+    assert cache.get("a") == b"a" * 10  # a is now the most recently used
+    cache.put("d", b"d" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None and cache.get("d") is not None
+    stats = cache.stats()
+    assert stats["memory_bytes"] == 30 and stats["memory_entries"] == 3
+    assert stats["misses"] == 1 and stats["memory_hits"] == 4
+
+
+def test_memory_skips_large_entries(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_bytes=10, max_disk_bytes=0)
+    cache.put("a", b"a" * 5)
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("a") == b"a" * 5
+
+
+def test_disk_tier(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_bytes=100, max_disk_bytes=100)
+    cache.put("a", b"a" * 10)
+    other = RenderCache(str(tmp_path), max_memory_bytes=100, max_disk_bytes=100)
+    assert other.get("a") == b"a" * 10
+    assert other.get("a") == b"a" * 10
+    stats = other.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["disk_bytes"] == 10
+
+
+def test_disk_eviction(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=30)
+    for i, key in enumerate("abc"):
+        cache.put(key, key.encode() * 10)
+        os.utime(tmp_path / (key + ".bin"), (1000 + i, 1000 + i))
+    assert cache.get("a") == b"a" * 10  # touches a: b is the least recently used file
+    cache.put("d", b"d" * 10)
+    assert sorted(os.listdir(tmp_path)) == ["a.bin", "c.bin", "d.bin"]
+    assert cache.stats()["disk_bytes"] == 30
+
+
+def test_clear(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    cache.put("a", b"a")
+    cache.get("a")
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+    assert cache.get("a") is None
+    assert cache.stats() == {"memory_hits": 0, "disk_hits": 0, "misses": 1,
+                             "memory_entries": 0, "memory_bytes": 0, "disk_bytes": 0}
@@ -0,0 +1,93 @@
+from graphviz_code_viewer.modules.dot_parser import parse
+from graphviz_code_viewer.modules.restyle import (
+    LayoutBase, apply_style, changed_attrs, skeleton, split_outputs, style_diff
+)
+
+SOURCE = """digraph G {
+    a [color=red];
+    a -> b;
+    a -> b [color=blue];
+    subgraph cluster_x { label=X; color=red; c }
+}
+"""
+
+# -Tdot output of SOURCE (shortened)
+POSITIONED = """digraph G {
+	graph [bb="0,0,100,100"];
+	node [label="\\N"];
+	subgraph cluster_x {
+		graph [bb="60,8,92,84", color=red, label=X];
+		c [pos="76,34"];
+	}
+	a [color=red, pos="27,90"];
+	b [pos="27,18"];
+	a -> b [pos="e,21,36 21,72 21,64 21,55 21,46"];
+	a -> b [color=blue, pos="e,33,36 33,72 33,64 33,55 33,46"];
+}
+"""
+
+
+def base():
+    return LayoutBase(skeleton(SOURCE), parse(SOURCE), POSITIONED, "dot")
+
+
+def restyle(text):
+    model = parse(text)
+    diff = style_diff(base(), model, text)
+    return diff, diff and apply_style(base(), model, diff)
+
+
+def test_changed_attrs():
+    assert changed_attrs((("color", "red"),), (("color", "red"),)) == {}
+    assert changed_attrs(None, (("color", "red"),)) == {"color": "red"}
+    assert changed_attrs((("color", "red"),), None) is None           # removed
+    assert changed_attrs(None, (("shape", "box"),)) is None           # not a style
+
+
+def test_skeleton_ignores_styles():
+    assert skeleton("digraph { a -> b [color=red] }") == skeleton("digraph { a -> b }")
+    assert skeleton("digraph { bgcolor=red; a }") == skeleton("digraph { bgcolor=blue; a }")
+    assert skeleton("digraph { rankdir=LR; a }") != skeleton("digraph { rankdir=TB; a }")
+    assert skeleton("digraph { a \"b }") is None
+
+
+def test_node_and_edge_colors():
+    text = SOURCE.replace("a [color=red]", "a [color=green]").replace("a -> b;", "a -> b [penwidth=2];")
+    diff, positioned = restyle(text)
+    assert diff == ({"a": {"color": "green"}}, {0: {"penwidth": "2"}}, {})
+    model = parse(positioned)
+    a = model.node_index["a"]
+    assert dict(model.node_attrs[a])["color"] == "green"
+    assert dict(model.edge_attrs[0])["penwidth"] == "2"
+    assert dict(model.edge_attrs[1])["color"] == "blue"
+    assert "pos" in dict(model.edge_attrs[0])
+
+
+def test_second_parallel_edge():
+    diff, positioned = restyle(SOURCE.replace("color=blue", "color=gray"))
+    assert diff == ({}, {1: {"color": "gray"}}, {})
+    model = parse(positioned)
+    assert dict(model.edge_attrs[0]).get("color") is None
+    assert dict(model.edge_attrs[1])["color"] == "gray"
+
+
+def test_cluster_attribute():
+    diff, positioned = restyle(SOURCE.replace("color=red; c", "color=green; c"))
+    assert diff == ({}, {}, {"cluster_x": {"color": "green"}})
+    cluster = positioned[positioned.index("subgraph cluster_x"):]
+    cluster = cluster[:cluster.index("}")]
+    assert cluster.rstrip().endswith('"color"="green";')
+
+
+def test_layout_changes_are_rejected():
+    assert restyle(SOURCE.replace("a -> b;", "a -> c;"))[0] is None
+    assert restyle(SOURCE.replace("a [color=red]", "a [color=red, shape=box]"))[0] is None
+    assert restyle(SOURCE.replace("a [color=red]", "a"))[0] is None
+    assert restyle(SOURCE.replace("{\n", "{\n    node [color=red];\n", 1))[0] is None
+
+
+def test_split_outputs():
+    svg, positioned = split_outputs(b"<svg>\n</svg>\ndigraph { a }\n")
+    assert svg == b"<svg>\n</svg>\n"
+    assert positioned == "digraph { a }\n"
+    assert split_outputs(b"no svg") == (b"no svg", None)
@@ -0,0 +1,148 @@
+import time
+import threading
+import http.client
+
+import pytest
+
+from graphviz_code_viewer.modules import server
+from graphviz_code_viewer.modules.compiler import GraphvizError
+from graphviz_code_viewer.modules.render_cache import RenderCache
+
+
+class StubLayout:
+    """Stands for RenderService.layout: counts the renders and blocks until released."""
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, source, engine, split_components):
+        self.calls.append(source)
+        self.started.set()
+        assert self.release.wait(10)
+        return 200, b"<svg>" + source.encode("utf-8") + b"</svg>", "layout"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "graphviz_version", lambda engine: "test")
+    service = server.RenderService(RenderCache(str(tmp_path)), jobs=2)
+    service.layout = StubLayout()
+    yield service
+    service.layout.release.set()
+    service.shutdown()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def render_in_threads(service, sources):
+    results = [None] * len(sources)
+
+    def render(i):
+        results[i] = service.render(sources[i])
+    threads = [threading.Thread(target=render, args=(i,)) for i in range(len(sources))]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_identical_requests_are_coalesced(service):
+    source = "digraph { a -> b }"
+    threads, results = render_in_threads(service, [source] * 5)
+    wait_for(lambda: service.coalesced == 4)
+    service.layout.release.set()
+    for thread in threads:
+        thread.join(10)
+    assert service.layout.calls == [source]
+    assert sorted(how for _, _, how in results) == ["coalesced"] * 4 + ["layout"]
+    assert {(status, body) for status, body, _ in results} == {(200, b"<svg>" + source.encode() + b"</svg>")}
+    wait_for(lambda: not service.inflight)
+
+    # Once done, the same source is a new render (the cache is the job of layout)
+    service.render(source)
+    assert len(service.layout.calls) == 2
+
+
+def test_different_requests_are_not_coalesced(service):
+    threads, results = render_in_threads(service, ["digraph { a }", "digraph { b }", "digraph { a }"])
+    wait_for(lambda: len(service.layout.calls) == 2 and service.coalesced == 1)
+    service.layout.release.set()
+    for thread in threads:
+        thread.join(10)
+    assert sorted(service.layout.calls) == ["digraph { a }", "digraph { b }"]
+    assert [how for _, _, how in results].count("coalesced") == 1
+
+
+def test_full_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "graphviz_version", lambda engine: "test")
+    service = server.RenderService(RenderCache(str(tmp_path)), jobs=1, max_queue=1)
+    service.layout = StubLayout()
+    try:
+        threads, _ = render_in_threads(service, ["digraph { a }"])
+        service.layout.started.wait(10)
+        threads += render_in_threads(service, ["digraph { b }"])[0]
+        wait_for(lambda: service.waiting == 1)
+        assert service.render("digraph { c }")[0] == 503
+    finally:
+        service.layout.release.set()
+        for thread in threads:
+            thread.join(10)
+        service.shutdown()
+
+
+def test_syntax_error_is_400_without_graphviz(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "graphviz_version", lambda engine: "test")
+    service = server.RenderService(RenderCache(str(tmp_path)), jobs=1)
+    try:
+        status, body, _ = service.render("digraph {\n a -> }")
+        assert status == 400
+        assert body.startswith(b"Syntax error in line 2")
+    finally:
+        service.shutdown()
+
+
+def test_error_status():
+    assert server.error_status(GraphvizError("Error: <stdin>: syntax error in line 1 near '}'", returncode=1)) == 400
+    assert server.error_status(GraphvizError("Layout timed out", timed_out=True)) == 504
+    assert server.error_status(GraphvizError("killed", returncode=-9)) == 500
+    assert server.error_status(OSError("dot not found")) == 500
+
+
+def test_http(service):
+    service.layout.release.set()
+    httpd = server.make_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=10)
+        connection.request("POST", "/render", body=b"digraph { a }")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type") == "image/svg+xml"
+        assert response.read() == b"<svg>digraph { a }</svg>"
+
+        connection.request("POST", "/render?engine=nope", body=b"digraph { a }")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 400
+
+        connection.request("GET", "/metrics")
+        metrics = connection.getresponse().read().decode("utf-8")
+        assert 'graphviz_code_viewer_requests_total{status="200"} 1' in metrics
+        assert 'graphviz_code_viewer_requests_total{status="400"} 1' in metrics
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_socket_path_that_is_not_a_socket(service, tmp_path):
+    path = tmp_path / "file"
+    path.write_text("keep")
+    with pytest.raises(FileExistsError):
+        server.make_server(service, socket_path=str(path))
+    assert path.read_text() == "keep"